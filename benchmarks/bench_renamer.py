@@ -0,0 +1,228 @@
+"""Benchmarks for scanning, planning, renaming and undo on synthetic TV libraries.
+
+Usage:
+    python benchmarks/bench_renamer.py --sizes 100,10000,200000 --output results.json
+
+Each size gets a fresh season directory on tmpfs (/dev/shm) when available,
+otherwise in the system temp directory. Every phase is timed separately and
+reports ops/sec and peak traced memory, so runs can be diffed as JSON.
+Memory tracing slows Python down noticeably; pass --no-memory for timings
+that are comparable with production speed.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from renamer_engine import RenameEngine, RenamePlan  # noqa: E402
+from renamer_template import DEFAULT_TEMPLATE  # noqa: E402
+
+SHOWS = ["The Office", "Breaking Bad", "Doctor Who", "Star Trek The Next Generation",
+         "Parks and Recreation", "Better Call Saul", "The Expanse", "Twin Peaks"]
+TAGS = ["", "720p", "1080p.WEB-DL", "2160p.HDR", "HDTV.x264", "BluRay.x265-GROUP", "DVDRip"]
+VIDEO_EXTENSIONS = [".mkv", ".mp4", ".avi"]
+OTHER_EXTENSIONS = [".srt", ".nfo", ".jpg", ".txt"]
+EXTENSIONS = ".mp4,.mkv,.avi"
+
+
+def episode_name(rng: random.Random, show: str, season: int, episode: int) -> str:
+    """Build a release-style name in one of the common episode numbering styles."""
+    style = rng.randrange(5)
+    if style == 0:
+        core = f"{show}.S{season:02d}E{episode:02d}"
+    elif style == 1:
+        core = f"{show} - {season}x{episode:02d}"
+    elif style == 2:
+        core = f"{show} Episode {episode}"
+    elif style == 3:
+        core = f"{show} Part {episode}"
+    else:
+        core = f"{show.lower().replace(' ', '_')}_{episode}"
+    tag = rng.choice(TAGS)
+    return f"{core}.{tag}" if tag else core
+
+
+def generate_library(directory: str, count: int, seed: int = 0,
+                     other_ratio: float = 0.1) -> int:
+    """Fill a directory with empty episode files plus some non-matching extras.
+
+    Args:
+        directory (str): Directory to create the files in
+        count (int): Number of matching video files
+        seed (int): Random seed, so runs are comparable
+        other_ratio (float): Extra non-video files per video file
+
+    Returns:
+        int: Number of video files created
+    """
+    rng = random.Random(seed)
+    show = rng.choice(SHOWS)
+    season = rng.randint(1, 20)
+    names = set()
+    episode = 0
+    while len(names) < count:
+        episode += 1
+        names.add(episode_name(rng, show, season, episode) + rng.choice(VIDEO_EXTENSIONS))
+    for name in names:
+        open(os.path.join(directory, name), "wb").close()
+    for index in range(int(count * other_ratio)):
+        extra = f"{show} extra {index}{rng.choice(OTHER_EXTENSIONS)}"
+        open(os.path.join(directory, extra), "wb").close()
+    return count
+
+
+def measure(fn: Callable[[], object], ops: int, trace_memory: bool = True) -> Dict:
+    """Time one phase and record its peak traced memory.
+
+    Args:
+        fn (Callable[[], object]): Phase to run
+        ops (int): Number of operations the phase performs, for ops/sec
+        trace_memory (bool): Record peak memory with tracemalloc
+
+    Returns:
+        Dict: seconds, ops, ops_per_sec and peak_memory_bytes (None when not traced)
+    """
+    peak = None
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - started
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"seconds": seconds, "ops": ops,
+            "ops_per_sec": ops / seconds if seconds else None,
+            "peak_memory_bytes": peak}
+
+
+def bench_size(base_dir: str, count: int, seed: int, trace_memory: bool = True) -> Dict:
+    """Run every phase against a fresh directory of the given size.
+
+    Args:
+        base_dir (str): Directory to create the season directory in
+        count (int): Number of video files
+        seed (int): Random seed
+        trace_memory (bool): Record peak memory of every phase
+
+    Returns:
+        Dict: Results keyed by phase name
+    """
+    directory = tempfile.mkdtemp(prefix=f"bench-{count}-", dir=base_dir)
+    try:
+        generate_library(directory, count, seed)
+        engine = RenameEngine(directory=directory, season_number="7",
+                              file_extensions=EXTENSIONS)
+        results: Dict[str, Dict] = {}
+        state: Dict[str, object] = {}
+
+        def scan():
+            state["files"] = engine.get_files()
+        results["get_files"] = measure(scan, count, trace_memory)
+
+        def plan():
+            rename_plan = RenamePlan()
+            rename_plan.set_files(state["files"])
+            rename_plan.update(engine)
+            state["rename_plan"] = rename_plan
+            state["plan"] = rename_plan.pairs()
+        results["sort_and_plan"] = measure(plan, count, trace_memory)
+
+        def retemplate():
+            # Editing the naming template regenerates every name of the plan
+            engine.naming_template = "{show} - S{season:02}E{episode:03}[-E{episode_end:03}]{ext}"
+            state["rename_plan"].update(engine)
+            engine.naming_template = DEFAULT_TEMPLATE
+            state["rename_plan"].update(engine)
+        results["template_change"] = measure(retemplate, 2 * count, trace_memory)
+
+        files = state["files"]
+
+        def single_names():
+            for index, name in enumerate(files):
+                engine.generate_new_filename(name, index + 1)
+        results["generate_new_filename"] = measure(single_names, count, trace_memory)
+
+        def batch_names():
+            engine.generate_new_filenames(files, 1)
+        results["generate_new_filenames"] = measure(batch_names, count, trace_memory)
+
+        def apply():
+            state["rename"] = engine.apply_plan(state["plan"])
+        results["apply_plan"] = measure(apply, count, trace_memory)
+        results["apply_plan"]["errors"] = len(state["rename"].errors)
+
+        def undo():
+            state["undo"] = engine.undo_last()
+        results["undo_rename"] = measure(undo, count, trace_memory)
+        results["undo_rename"]["errors"] = len(state["undo"].errors)
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def default_base_dir() -> str:
+    """Prefer tmpfs so the numbers measure the code rather than the disk."""
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+def run(sizes: List[int], base_dir: str, seed: int, trace_memory: bool = True) -> Dict:
+    """Run the benchmark for every size.
+
+    Args:
+        sizes (List[int]): Directory sizes to test
+        base_dir (str): Directory to create the test directories in
+        seed (int): Random seed
+        trace_memory (bool): Record peak memory of every phase
+
+    Returns:
+        Dict: Environment description and per-size results
+    """
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "base_dir": base_dir,
+        "seed": seed,
+        "trace_memory": trace_memory,
+        "results": {},
+    }
+    for size in sizes:
+        report["results"][str(size)] = bench_size(base_dir, size, seed, trace_memory)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000",
+                        help="Comma separated directory sizes, from 100 up to 200000")
+    parser.add_argument("--dir", default=None, help="Where to create the test directories")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for file names")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip tracemalloc for undistorted timings")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = run(sizes, args.dir or default_base_dir(), args.seed, not args.no_memory)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
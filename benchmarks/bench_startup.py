@@ -0,0 +1,201 @@
+"""Startup benchmarks: import time, command-line start and time to first window.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10 --max-import-ms 150 --output startup.json
+
+Every measurement runs in a fresh interpreter inside an empty temporary
+directory, which also checks that importing the module loads no GUI
+modules and creates no log file. The time to first window needs a display
+and is reported as null without one. With --max-import-ms or
+--max-window-ms the exit code is 1 when the median exceeds the limit, so
+the script can guard against startup regressions.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from typing import Dict, List, Optional
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(REPO_DIR, "tv_show_renamer.py")
+GUI_MODULES = ("tkinter", "renamer_gui")
+
+IMPORT_PROBE = """
+import sys, time, json
+started = time.perf_counter()
+import tv_show_renamer
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed,
+                  "gui_modules": [name for name in %r if name in sys.modules]}))
+""" % (GUI_MODULES,)
+
+# Starts the GUI the way tv_show_renamer.main() does, but closes it as soon as
+# the first window has been drawn. Every state file is kept in the empty
+# working directory, so the real settings, journal, undo history, index
+# cache and titles are never touched and no recovery prompt can block it.
+WINDOW_PROBE = """
+import os
+from functools import partial
+import tv_show_renamer
+tv_show_renamer.setup_logging()
+import renamer_gui
+from renamer_gui import TVShowRenamer, tk
+from renamer_profiling import instrumentation
+state = os.getcwd()
+renamer_gui.INDEX_CACHE_FILE = os.path.join(state, "renamer_index_cache.json")
+renamer_gui.RenameJournal = partial(renamer_gui.RenameJournal,
+                                    path=os.path.join(state, "renamer_journal.jsonl"))
+renamer_gui.UndoHistory = partial(renamer_gui.UndoHistory,
+                                  path=os.path.join(state, "renamer_undo.jsonl"))
+renamer_gui.EpisodeTitleDB = partial(renamer_gui.EpisodeTitleDB,
+                                     path=os.path.join(state, "renamer_titles.sqlite3"))
+settings_path = os.path.join(state, "renamer_settings.json")
+renamer_gui.load_settings = partial(renamer_gui.load_settings, path=settings_path)
+renamer_gui.save_settings = partial(renamer_gui.save_settings, path=settings_path)
+instrumentation.configure(stats_path=os.path.join(state, "tv_show_renamer_stats.json"),
+                          profile_path=os.path.join(state, "tv_show_renamer.prof"))
+root = tk.Tk()
+app = TVShowRenamer(root)
+root.update()
+print("first-window", flush=True)
+app.on_close()
+"""
+
+WINDOW_TIMEOUT = 30.0
+
+
+def summarize(samples: List[float]) -> Dict:
+    """Reduce repeated timings to min, median and max milliseconds."""
+    return {"runs": len(samples),
+            "min_ms": min(samples) * 1000,
+            "median_ms": statistics.median(samples) * 1000,
+            "max_ms": max(samples) * 1000}
+
+
+def child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def measure_import(runs: int, workdir: str) -> Dict:
+    """Time `import tv_show_renamer` in fresh interpreters.
+
+    Args:
+        runs (int): Number of interpreters to start
+        workdir (str): Empty directory the interpreters run in
+
+    Returns:
+        Dict: Timing summary, GUI modules that got loaded and whether a log file appeared
+    """
+    samples = []
+    gui_modules = set()
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=workdir,
+                                env=child_env(), check=True, capture_output=True,
+                                text=True).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        samples.append(probe["seconds"])
+        gui_modules.update(probe["gui_modules"])
+    report = summarize(samples)
+    report["gui_modules_loaded"] = sorted(gui_modules)
+    report["log_file_created"] = os.path.exists(os.path.join(workdir, "tv_show_renamer.log"))
+    return report
+
+
+def measure_cli(runs: int, workdir: str) -> Dict:
+    """Time a complete `tv_show_renamer.py --help` run, interpreter start included."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, SCRIPT, "--help"], cwd=workdir, env=child_env(),
+                       check=True, capture_output=True)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def measure_first_window(runs: int, workdir: str) -> Dict:
+    """Time from launching the GUI until its first window has been drawn.
+
+    Args:
+        runs (int): Number of launches
+        workdir (str): Directory the GUI runs in
+
+    Returns:
+        Dict: Timing summary, or an error when no window could be opened
+    """
+    env = child_env()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "-c", WINDOW_PROBE], cwd=workdir, env=env,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            line = process.stdout.readline()
+            elapsed = time.perf_counter() - started
+            process.communicate(timeout=WINDOW_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            return {"error": "timed out waiting for the first window"}
+        if line.strip() != "first-window":
+            return {"error": "no window could be opened, is a display available?"}
+        samples.append(elapsed)
+    return summarize(samples)
+
+
+def check_limit(report: Dict, limit_ms: Optional[float], label: str) -> bool:
+    if limit_ms is None or "median_ms" not in report:
+        return True
+    if report["median_ms"] <= limit_ms:
+        return True
+    print(f"{label} regression: median {report['median_ms']:.1f}ms exceeds {limit_ms:.1f}ms",
+          file=sys.stderr)
+    return False
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--no-window", action="store_true",
+                        help="Skip the time to first window measurement")
+    parser.add_argument("--max-import-ms", type=float, default=None,
+                        help="Fail if the median import time exceeds this")
+    parser.add_argument("--max-window-ms", type=float, default=None,
+                        help="Fail if the median time to first window exceeds this")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as workdir:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "import": measure_import(args.runs, workdir),
+            "cli_help": measure_cli(args.runs, workdir),
+            "first_window": None if args.no_window else measure_first_window(args.runs, workdir),
+        }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    ok = check_limit(report["import"], args.max_import_ms, "Import time")
+    if report["first_window"] is not None:
+        ok = check_limit(report["first_window"], args.max_window_ms, "Time to first window") and ok
+    if report["import"]["gui_modules_loaded"] or report["import"]["log_file_created"]:
+        print("Importing tv_show_renamer has GUI or logging side effects", file=sys.stderr)
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
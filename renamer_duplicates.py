@@ -0,0 +1,211 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from renamer_profiling import instrumentation
+
+# Bytes hashed from each end of a file for the quick comparison
+PARTIAL_CHUNK = 64 * 1024
+# Read size while hashing whole files
+FULL_CHUNK = 1024 * 1024
+DEFAULT_HASH_WORKERS = 4
+DEFAULT_HASH_CACHE_SIZE = 100_000
+
+
+def partial_hash(path: str, size: int) -> bytes:
+    """Hash the size plus the first and last PARTIAL_CHUNK bytes of a file."""
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        digest.update(f.read(PARTIAL_CHUNK))
+        if size > 2 * PARTIAL_CHUNK:
+            f.seek(size - PARTIAL_CHUNK)
+            digest.update(f.read(PARTIAL_CHUNK))
+    instrumentation.count("bytes_hashed", min(size, 2 * PARTIAL_CHUNK))
+    return digest.digest()
+
+
+def full_hash(path: str) -> bytes:
+    """Hash a whole file in chunks read into one reused buffer."""
+    digest = hashlib.blake2b(digest_size=32)
+    buffer = bytearray(FULL_CHUNK)
+    view = memoryview(buffer)
+    total = 0
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+            total += read
+    instrumentation.count("bytes_hashed", total)
+    return digest.digest()
+
+
+class HashCache:
+    """Bounded LRU of file hashes, reused while a file's size and mtime are unchanged.
+
+    Entries are keyed by (device, inode), so renaming a file keeps its
+    hashes and a rescan after a rename hashes nothing.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_HASH_CACHE_SIZE):
+        """Initialize the cache.
+
+        Args:
+            max_entries (int): Number of files remembered before evicting the least recently used
+        """
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[int, int], Dict]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, st: os.stat_result, kind: str) -> Optional[bytes]:
+        """Get a cached "partial" or "full" hash, None if unknown or the file changed."""
+        key = (st.st_dev, st.st_ino)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry["signature"] != (st.st_size, st.st_mtime_ns):
+                return None
+            self.entries.move_to_end(key)
+            return entry.get(kind)
+
+    def put(self, st: os.stat_result, kind: str, value: bytes):
+        """Remember a "partial" or "full" hash of a file."""
+        key = (st.st_dev, st.st_ino)
+        signature = (st.st_size, st.st_mtime_ns)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry["signature"] != signature:
+                entry = self.entries[key] = {"signature": signature}
+            entry[kind] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+hash_cache = HashCache()
+
+
+def _group(names: Sequence[str], keys: Dict[str, object]) -> List[List[str]]:
+    """Group names sharing a key, keeping only groups of two or more."""
+    groups: Dict[object, List[str]] = {}
+    for name in names:
+        if keys.get(name) is not None:
+            groups.setdefault(keys[name], []).append(name)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def find_duplicates(directory: str, files: Sequence[str],
+                    max_workers: int = DEFAULT_HASH_WORKERS,
+                    cache: Optional[HashCache] = None) -> Dict[str, str]:
+    """Find files with identical content.
+
+    Files are compared by size first, then by a partial hash of their size
+    and head and tail chunks; only files that still collide are hashed in
+    full. Hashing runs on a thread pool and every hash is cached.
+
+    Args:
+        directory (str): Directory holding the files
+        files (Sequence[str]): File names in plan order; the first copy of each file is kept
+        max_workers (int): Number of files hashed at once
+        cache (Optional[HashCache]): Hashes to reuse, the shared cache by default
+
+    Returns:
+        Dict[str, str]: Each duplicate's name mapped to the name of the copy that is kept
+    """
+    cache = cache if cache is not None else hash_cache
+    stats: Dict[str, os.stat_result] = {}
+    for name in files:
+        try:
+            st = os.stat(os.path.join(directory, name))
+        except OSError as e:
+            logging.error(f"Error reading {name}: {str(e)}")
+            continue
+        if st.st_size > 0:
+            stats[name] = st
+    instrumentation.count("stats_issued", len(files))
+
+    candidates = [name for group in _group(files, {n: st.st_size for n, st in stats.items()})
+                  for name in group]
+    if not candidates:
+        return {}
+
+    def hashed(kind: str, compute: Callable[[str, os.stat_result], bytes]):
+        def run(name: str) -> Tuple[str, Optional[bytes]]:
+            st = stats[name]
+            value = cache.get(st, kind)
+            if value is None:
+                try:
+                    value = compute(os.path.join(directory, name), st)
+                except OSError as e:
+                    logging.error(f"Error hashing {name}: {str(e)}")
+                    return name, None
+                cache.put(st, kind, value)
+            return name, value
+        return run
+
+    with instrumentation.phase("hash"), ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        partial = dict(pool.map(hashed("partial", lambda path, st: partial_hash(path, st.st_size)),
+                                candidates))
+        partial_keys = {name: (stats[name].st_size, value)
+                        for name, value in partial.items() if value is not None}
+        duplicates: Dict[str, str] = {}
+        to_verify: List[str] = []
+        for group in _group(candidates, partial_keys):
+            if stats[group[0]].st_size <= 2 * PARTIAL_CHUNK:
+                # The partial hash already covered the whole file
+                for name in group[1:]:
+                    duplicates[name] = group[0]
+            else:
+                to_verify.extend(group)
+        if to_verify:
+            full = dict(pool.map(hashed("full", lambda path, st: full_hash(path)), to_verify))
+            for group in _group(to_verify, full):
+                for name in group[1:]:
+                    duplicates[name] = group[0]
+    return duplicates
+
+
+def update_duplicates(directory: str, files: Sequence[str], duplicates: Dict[str, str],
+                      changed: Iterable[str], max_workers: int = DEFAULT_HASH_WORKERS,
+                      cache: Optional[HashCache] = None) -> Dict[str, str]:
+    """Update the duplicates found earlier after some files were added, removed or rewritten.
+
+    Only the files that share a size with a changed file, or that were
+    paired with one before, are hashed again; every other pairing is kept.
+
+    Args:
+        directory (str): Directory holding the files
+        files (Sequence[str]): Current file names in plan order
+        duplicates (Dict[str, str]): Duplicates found before the change
+        changed (Iterable[str]): Names reported as added, removed or rewritten
+        max_workers (int): Number of files hashed at once
+        cache (Optional[HashCache]): Hashes to reuse, the shared cache by default
+
+    Returns:
+        Dict[str, str]: Each duplicate's name mapped to the name of the copy that is kept
+    """
+    changed = set(changed)
+    # Other copies of a changed file may now be duplicates of each other instead
+    linked = set(changed)
+    for name, copy in duplicates.items():
+        if name in changed or copy in changed:
+            linked.update((name, copy))
+    sizes: Dict[str, int] = {}
+    affected = set()
+    for name in files:
+        try:
+            sizes[name] = os.stat(os.path.join(directory, name)).st_size
+        except OSError:
+            continue  # Removed since, find_duplicates() reports any other error
+        if name in linked:
+            affected.add(sizes[name])
+    group = [name for name in files if name in linked or sizes.get(name) in affected]
+    members = linked.union(group)
+    kept = {name: copy for name, copy in duplicates.items()
+            if name not in members and copy not in members}
+    if group:
+        kept.update(find_duplicates(directory, group, max_workers, cache))
+    return kept
@@ -0,0 +1,1272 @@
+import os
+import uuid
+import queue
+import logging
+import threading
+from bisect import bisect_right
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from renamer_index import DirectoryIndex, DirectoryIndexCache, directory_signature
+from renamer_filter import FileFilter, normalize_extensions
+from renamer_ordering import SortKey, episode_span, sort_keys
+from renamer_template import DEFAULT_TEMPLATE, NameTemplate, TitleLookup, infer_show_name
+from renamer_titles import EpisodeTitleDB
+from renamer_duplicates import find_duplicates, update_duplicates
+from renamer_sidecars import (DEFAULT_SIDECAR_EXTENSIONS, companion_owners, match_sidecars,
+                              parse_sidecar_extensions, sidecar_pairs)
+from renamer_transfer import (DEFAULT_TRANSFER_WORKERS, TransferCallback, TransferResult,
+                              check_destination, transfer_files)
+from renamer_profiling import instrumentation
+from renamer_journal import RenameBatch, RenameJournal, RecoveryResult, UndoHistory, TEMP_PREFIX
+
+DEFAULT_SEASON = "01"
+DEFAULT_START_EPISODE = "01"
+DEFAULT_EXTENSIONS = ".mp4,.mkv,.avi"
+SCAN_BATCH_SIZE = 500
+DEFAULT_LIBRARY_WORKERS = 4
+# Seconds between progress callbacks while directories are renamed in parallel
+PROGRESS_INTERVAL = 0.05
+
+# New name shown for a duplicate that is left out of the numbering
+DUPLICATE_LABEL = "(duplicate of {original})"
+
+ProgressCallback = Callable[[int, int], None]
+ErrorCallback = Callable[[str, Exception], None]
+# (source, target, index of the planned pair the operation belongs to)
+RenameOp = Tuple[str, str, int]
+
+
+class EpisodeRangeError(ValueError):
+    """Raised when the end episode comes before the start episode."""
+
+
+class RenameResult:
+    """Outcome of applying a plan or undoing a batch."""
+
+    def __init__(self, total: int):
+        """Initialize an empty result.
+
+        Args:
+            total (int): Number of operations that were attempted
+        """
+        self.total = total
+        self.done: List[Tuple[str, str]] = []
+        self.errors: List[Tuple[str, str]] = []
+        # True if the batch was stopped early through its cancel event
+        self.cancelled = False
+        # Moves to or back from the destination directory, if any
+        self.transfer: Optional[TransferResult] = None
+
+    @property
+    def count(self) -> int:
+        return len(self.done)
+
+
+def order_renames(pairs: List[Tuple[str, str]], existing: Set[str],
+                  owners: Optional[Dict[int, int]] = None
+                  ) -> Tuple[List[RenameOp], List[Tuple[int, str]]]:
+    """Order renames so that no target is overwritten, breaking cycles through temporary names.
+
+    Renaming a source frees its name for the pair that targets it, so the
+    pairs form chains and cycles. Chains are emitted from their free end
+    backwards; each cycle first moves one file to a temporary name. Pairs
+    whose target is held by a file outside the plan are rejected, along with
+    any pair that would have needed the rejected file's name. Companion
+    pairs are ordered after all the other renames, and rejected with their
+    video. Runs in linear time.
+
+    Args:
+        pairs (List[Tuple[str, str]]): (old_name, new_name) pairs
+        existing (Set[str]): Names currently present in the directory
+        owners (Optional[Dict[int, int]]): Index of the video's pair by index of each
+            companion pair, as made by companion_owners
+
+    Returns:
+        Tuple[List[RenameOp], List[Tuple[int, str]]]: Operations in execution order,
+        and (pair index, reason) for every rejected pair
+    """
+    if not owners:
+        return _order_names(pairs, existing)
+    videos = [index for index in range(len(pairs)) if index not in owners]
+    ops, rejected = _order_names([pairs[index] for index in videos], existing)
+    ops = [(source, target, videos[index]) for source, target, index in ops]
+    rejected = [(videos[index], reason) for index, reason in rejected]
+
+    # Companions are planned against the names the videos leave behind
+    refused = {index for index, _ in rejected}
+    after = set(existing)
+    for source, target, _ in ops:
+        after.discard(source)
+        after.add(target)
+    companions = []
+    for index in sorted(owners):
+        if owners[index] in refused:
+            rejected.append((index, f"Not renamed with its video: {pairs[owners[index]][0]}"))
+        else:
+            companions.append(index)
+    companion_ops, companion_rejected = _order_names([pairs[index] for index in companions], after)
+    ops.extend((source, target, companions[index]) for source, target, index in companion_ops)
+    rejected.extend((companions[index], reason) for index, reason in companion_rejected)
+    rejected.sort()
+    return ops, rejected
+
+
+def _order_names(pairs: List[Tuple[str, str]], existing: Set[str]
+                 ) -> Tuple[List[RenameOp], List[Tuple[int, str]]]:
+    rejected: List[Tuple[int, str]] = []
+    target_of: Dict[str, Tuple[str, int]] = {}   # source -> (target, pair index)
+    source_for: Dict[str, str] = {}              # target -> source
+    for index, (source, target) in enumerate(pairs):
+        if source == target:
+            continue
+        if target in source_for or source in target_of:
+            rejected.append((index, f"Duplicate rename target: {target}"))
+            continue
+        target_of[source] = (target, index)
+        source_for[target] = source
+
+    # Reject pairs whose target stays occupied, cascading back along the chain
+    pending = [target for target in source_for if target in existing and target not in target_of]
+    while pending:
+        target = pending.pop()
+        source = source_for.pop(target)
+        _, index = target_of.pop(source)
+        rejected.append((index, f"File already exists: {target}"))
+        if source in source_for:
+            pending.append(source)
+
+    ops: List[RenameOp] = []
+    visited: Set[str] = set()
+
+    def unwind(source: str, stop: Optional[str] = None):
+        # Emit source's rename, then the rename that was waiting for its name
+        while source is not None and source != stop and source not in visited:
+            visited.add(source)
+            target, index = target_of[source]
+            ops.append((source, target, index))
+            source = source_for.get(source)
+
+    # Chains end in a target nobody is moving away from
+    for target, source in source_for.items():
+        if target not in target_of:
+            unwind(source)
+
+    # Everything left belongs to a cycle
+    taken = existing | set(source_for)
+    counter = 0
+    for source in list(target_of):
+        if source in visited:
+            continue
+        while True:
+            temp = f"{TEMP_PREFIX}{uuid.uuid4().hex[:8]}-{counter}{os.path.splitext(source)[1]}"
+            counter += 1
+            if temp not in taken:
+                break
+        taken.add(temp)
+        target, index = target_of[source]
+        visited.add(source)
+        ops.append((source, temp, index))
+        unwind(source_for[source], stop=source)
+        ops.append((temp, target, index))
+
+    rejected.sort()
+    return ops, rejected
+
+
+def episode_numbers(first_episode: int, spans: Optional[Sequence[int]], count: int = 0
+                    ) -> List[int]:
+    """Number consecutive files, letting multi-episode files use up several numbers.
+
+    Args:
+        first_episode (int): Episode number of the first file
+        spans (Optional[Sequence[int]]): Episodes held by each file, all single episodes if None
+        count (int): Number of files when spans is None
+
+    Returns:
+        List[int]: First episode number of each file
+    """
+    if spans is None:
+        return list(range(first_episode, first_episode + count))
+    episodes = []
+    episode = first_episode
+    for span in spans:
+        episodes.append(episode)
+        episode += span
+    return episodes
+
+
+def group_by_parent(pairs: List[Tuple[str, str]]) -> Optional[Dict[str, List[Tuple[str, str]]]]:
+    """Split relative (source, target) paths into per-directory batches of bare names.
+
+    Args:
+        pairs (List[Tuple[str, str]]): (source, target) paths relative to a common root
+
+    Returns:
+        Optional[Dict[str, List[Tuple[str, str]]]]: Names keyed by parent directory, None if
+        any pair moves a file to another directory
+    """
+    groups: Dict[str, List[Tuple[str, str]]] = {}
+    for source, target in pairs:
+        parent, source_name = os.path.split(source)
+        target_parent, target_name = os.path.split(target)
+        if target_parent != parent:
+            return None
+        groups.setdefault(parent, []).append((source_name, target_name))
+    return groups
+
+
+def existing_names(directory: str, names: Iterable[str]) -> Set[str]:
+    """List the directories the given names live in, once per directory.
+
+    Args:
+        directory (str): Base directory the names are relative to
+        names (Iterable[str]): Relative names, possibly with subdirectories
+
+    Returns:
+        Set[str]: Relative names of every entry in those directories
+    """
+    existing: Set[str] = set()
+    for parent in {os.path.dirname(name) for name in names}:
+        instrumentation.count("listdirs_issued")
+        try:
+            entries = os.listdir(os.path.join(directory, parent))
+        except OSError:
+            continue
+        existing.update(os.path.join(parent, entry) if parent else entry for entry in entries)
+    return existing
+
+
+class DirectoryScanner:
+    """Scan a directory on a worker thread and stream the results through a queue.
+
+    The queue receives ("batch", (names, sort_keys)) messages followed by a
+    single ("done", count) or ("error", message). Nothing is posted after
+    cancel(). Sort keys are computed here, once per file, and cached with
+    the directory index. When the engine renames sidecars, a ("sidecars",
+    names) message lists the possible sidecar files once the listing is
+    complete. When it skips duplicates, the files are then hashed and a
+    ("duplicates", mapping) message is posted before "done".
+    """
+
+    def __init__(self, engine: "RenameEngine", batch_size: int = SCAN_BATCH_SIZE):
+        """Initialize the scanner.
+
+        Args:
+            engine (RenameEngine): Engine holding the directory and extension settings
+            batch_size (int): Maximum number of names per batch message
+        """
+        # Copy the settings so later edits don't affect a running scan
+        self.engine = engine.clone()
+        self.batch_size = batch_size
+        self.queue: "queue.Queue[Tuple[str, object]]" = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def directory(self) -> str:
+        return self.engine.directory
+
+    def start(self):
+        """Start scanning in the background."""
+        self.thread.start()
+
+    def cancel(self):
+        """Ask the scan to stop as soon as possible."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def _run(self):
+        engine = self.engine
+        try:
+            cached = engine.cached_index()
+            if cached is not None:
+                files, keys = list(cached.files), list(cached.keys)
+                sidecars = list(cached.sidecars)
+                if not self.cancelled:
+                    self.queue.put(("batch", (files, keys)))
+            else:
+                signature = directory_signature(engine.directory)
+                files, keys, sidecars = [], [], []
+                for batch in engine.iter_scan(self.batch_size, self.cancel_event, sidecars):
+                    with instrumentation.phase("sort_keys"):
+                        batch_keys = sort_keys(batch)
+                    files.extend(batch)
+                    keys.extend(batch_keys)
+                    self.queue.put(("batch", (batch, batch_keys)))
+                if not self.cancelled and engine.uses_index_cache():
+                    engine.index_cache.put(engine.directory, engine.filter_key(), signature,
+                                           files, keys, sidecars)
+            if self.cancelled:
+                return
+            if engine.rename_sidecars:
+                self.queue.put(("sidecars", sidecars))
+            if engine.skip_duplicates:
+                # Hash in plan order so the first copy of each episode is the one kept
+                ordered = [name for _, name in sorted(zip(keys, files))]
+                duplicates = engine.find_duplicates(ordered)
+                if self.cancelled:
+                    return
+                self.queue.put(("duplicates", duplicates))
+            self.queue.put(("done", len(files)))
+        except Exception as e:
+            logging.error(f"Error scanning {self.directory}: {str(e)}")
+            if not self.cancelled:
+                self.queue.put(("error", str(e)))
+
+
+class RenamePlan:
+    """Sorted files and their new names, kept between previews and updated incrementally.
+
+    Files are ordered by their precomputed episode sort keys. Only the
+    settings that actually changed are recomputed: new files are merged into
+    the sorted list, a new season or start episode regenerates the names,
+    and a new end episode only moves the cut-off. Duplicates keep their
+    row but use up no episode number and are never renamed. Sidecar files
+    follow their video's new name. The plan can be indexed like a list of
+    (old_name, new_name) pairs of the videos.
+    """
+
+    def __init__(self):
+        self.files: List[str] = []
+        self.keys: Dict[str, SortKey] = {}
+        self.names: List[str] = []
+        # Episode number of each file, a double episode uses up two numbers
+        self.episodes: List[int] = []
+        self.spans: Dict[str, int] = {}
+        # Duplicate file mapped to the copy that is kept
+        self.duplicates: Dict[str, str] = {}
+        # Possible sidecar files, and those matched to each video by update()
+        self.sidecar_names: List[str] = []
+        self.sidecars: Dict[str, List[str]] = {}
+        self.sidecars_stale = False
+        self.count = 0
+        self.numbering: Optional[Tuple] = None
+        self.stale = True
+
+    def set_files(self, files: List[str], keys: Optional[List[SortKey]] = None):
+        """Replace the files of the plan.
+
+        Args:
+            files (List[str]): Matching files in any order
+            keys (Optional[List[SortKey]]): Sort key of each file, computed if omitted
+        """
+        with instrumentation.phase("sort"):
+            self.keys = dict(zip(files, keys if keys is not None else sort_keys(files)))
+            self.files = sorted(files, key=self.keys.__getitem__)
+        self.stale = True
+        self.sidecars_stale = True
+
+    def add_files(self, files: List[str], keys: Optional[List[SortKey]] = None):
+        """Merge newly found files into the sorted list.
+
+        Args:
+            files (List[str]): Additional matching files in any order
+            keys (Optional[List[SortKey]]): Sort key of each file, computed if omitted
+        """
+        if not files:
+            return
+        with instrumentation.phase("sort"):
+            self.keys.update(zip(files, keys if keys is not None else sort_keys(files)))
+            # Timsort merges the already sorted run with the new one in near-linear time
+            self.files.extend(files)
+            self.files.sort(key=self.keys.__getitem__)
+        self.stale = True
+        self.sidecars_stale = True
+
+    def remove_files(self, files: Iterable[str]):
+        """Drop files that disappeared from the directory.
+
+        Args:
+            files (Iterable[str]): Names to drop, names not in the plan are ignored
+        """
+        gone = {name for name in files if name in self.keys}
+        if not gone:
+            return
+        self.files = [name for name in self.files if name not in gone]
+        for name in gone:
+            del self.keys[name]
+            self.duplicates.pop(name, None)
+        self.stale = True
+        self.sidecars_stale = True
+
+    def set_duplicates(self, duplicates: Dict[str, str]):
+        """Leave duplicate files out of the numbering.
+
+        Args:
+            duplicates (Dict[str, str]): Each duplicate mapped to the copy that is kept
+        """
+        if duplicates != self.duplicates:
+            self.duplicates = dict(duplicates)
+            self.stale = True
+
+    def is_duplicate(self, index: int) -> bool:
+        """Check whether a row is a duplicate that won't be renamed."""
+        return self.files[index] in self.duplicates
+
+    def set_sidecars(self, names: List[str]):
+        """Set the possible sidecar files, matched to their videos by the next update().
+
+        Args:
+            names (List[str]): Files with sidecar extensions in the plan's directory
+        """
+        self.sidecar_names = names
+        self.sidecars_stale = True
+
+    def companions(self, index: int) -> List[Tuple[str, str]]:
+        """Get the (old_name, new_name) pairs of a row's sidecar files."""
+        video = self.files[index]
+        sidecars = self.sidecars.get(video)
+        if not sidecars or video in self.duplicates:
+            return []
+        return sidecar_pairs(video, self.names[index], sidecars)
+
+    def update(self, engine: "RenameEngine") -> Optional[List[int]]:
+        """Bring the new names and the cut-off in line with the engine settings.
+
+        Args:
+            engine (RenameEngine): Engine holding the season and episode settings
+
+        Returns:
+            Optional[List[int]]: Indices of the rows that changed, None if every row may have changed
+
+        Raises:
+            EpisodeRangeError: If the end episode is before the start episode
+            ValueError: If the season or episode numbers are not numbers
+        """
+        with instrumentation.phase("plan"):
+            return self._update(engine)
+
+    def _update(self, engine: "RenameEngine") -> Optional[List[int]]:
+        sidecars_changed = self.sidecars_stale
+        if sidecars_changed:
+            self.sidecars = match_sidecars(self.files, self.sidecar_names)
+            self.sidecars_stale = False
+        if not self.files:
+            changed = None if self.stale else list(range(self.count))
+            self.names = []
+            self.episodes = []
+            self.count = 0
+            self.stale = False
+            return changed
+
+        start_ep = int(engine.start_episode or 1)
+        end_ep = int(engine.end_episode) if engine.end_episode else None
+        if end_ep is not None and end_ep < start_ep:
+            raise EpisodeRangeError(
+                "End episode number must be greater than or equal to start episode.")
+
+        changed: Optional[List[int]] = []
+        numbering = (engine.naming_key(), start_ep)
+        if self.stale or numbering != self.numbering:
+            spans = self.spans
+            for name in self.files:
+                if name not in spans:
+                    spans[name] = episode_span(name)
+            duplicates = self.duplicates
+            file_spans = [0 if name in duplicates else spans[name] for name in self.files]
+            self.episodes = episode_numbers(start_ep, file_spans)
+            self.names = engine.generate_new_filenames(self.files, start_ep, file_spans)
+            for index, name in enumerate(self.files):
+                if name in duplicates:
+                    self.names[index] = DUPLICATE_LABEL.format(original=duplicates[name])
+            self.numbering = numbering
+            self.stale = False
+            changed = None
+
+        # Files whose first episode is past the end episode are left alone
+        count = len(self.files) if end_ep is None else bisect_right(self.episodes, end_ep)
+        if changed is not None and count != self.count:
+            changed.extend(range(min(count, self.count), max(count, self.count)))
+        self.count = count
+        return None if sidecars_changed else changed
+
+    def pairs(self) -> List[Tuple[str, str]]:
+        """Get the planned (old_name, new_name) pairs, each video followed by its sidecars.
+
+        Duplicates are left out.
+        """
+        duplicates = self.duplicates
+        pairs = []
+        for index in range(self.count):
+            video = self.files[index]
+            if video not in duplicates:
+                pairs.append((video, self.names[index]))
+                if video in self.sidecars:
+                    pairs.extend(self.companions(index))
+        return pairs
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> Tuple[str, str]:
+        if not 0 <= index < self.count:
+            raise IndexError("plan index out of range")
+        return self.files[index], self.names[index]
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return iter(zip(self.files[:self.count], self.names[:self.count]))
+
+
+class RenameEngine:
+    """Headless scanning, planning, renaming and undo logic.
+
+    The engine has no dependency on Tk, so it can be driven by the GUI,
+    the command line or scripts alike.
+    """
+
+    def __init__(self, directory: str = "", season_number: str = DEFAULT_SEASON,
+                 start_episode: str = DEFAULT_START_EPISODE, end_episode: str = "",
+                 file_extensions: str = DEFAULT_EXTENSIONS,
+                 index_cache: Optional[DirectoryIndexCache] = None,
+                 journal: Optional[RenameJournal] = None,
+                 undo_history: Optional[UndoHistory] = None,
+                 include_patterns: str = "", exclude_patterns: str = "",
+                 min_size_mb: str = "", sniff_headers: bool = False,
+                 naming_template: str = DEFAULT_TEMPLATE, show_name: str = "",
+                 title_lookup: Optional[TitleLookup] = None,
+                 title_db: Optional[EpisodeTitleDB] = None,
+                 skip_duplicates: bool = False, rename_sidecars: bool = False,
+                 sidecar_extensions: str = DEFAULT_SIDECAR_EXTENSIONS,
+                 destination: str = "", transfer_workers: int = DEFAULT_TRANSFER_WORKERS):
+        """Initialize the engine with the same settings the GUI exposes.
+
+        Args:
+            directory (str): Directory containing the episodes
+            season_number (str): Season number used in new names
+            start_episode (str): Episode number given to the first file
+            end_episode (str): Last episode number to rename, empty for all files
+            file_extensions (str): Comma separated list of extensions to include
+            index_cache (Optional[DirectoryIndexCache]): Cache of directory listings to reuse
+            journal (Optional[RenameJournal]): Write-ahead journal making batches crash safe
+            undo_history (Optional[UndoHistory]): On-disk undo history, in memory if omitted
+            include_patterns (str): Semicolon separated globs or 're:' regexes names must match
+            exclude_patterns (str): Semicolon separated globs or 're:' regexes that skip a file
+            min_size_mb (str): Smallest file size in megabytes, empty for no limit
+            sniff_headers (bool): Skip files whose header doesn't match their extension
+            naming_template (str): Template for new names, see NameTemplate
+            show_name (str): Show name for {show}, taken from the folder names if empty
+            title_lookup (Optional[TitleLookup]): Looks up episode titles for {title}, overrides title_db
+            title_db (Optional[EpisodeTitleDB]): Offline titles looked up by show, season and episode
+            skip_duplicates (bool): Hash the files and leave copies with identical content unnumbered
+            rename_sidecars (bool): Rename subtitles and other files named after a video along with it
+            sidecar_extensions (str): Comma separated list of sidecar extensions
+            destination (str): Directory renamed files are moved into, empty to leave them in place
+            transfer_workers (int): Files moved to the destination at once
+        """
+        self.directory = directory
+        self.season_number = season_number
+        self.start_episode = start_episode
+        self.end_episode = end_episode
+        self.file_extensions = file_extensions
+        self.index_cache = index_cache
+        self.journal = journal
+        self.undo_stack = undo_history if undo_history is not None else []
+        self.include_patterns = include_patterns
+        self.exclude_patterns = exclude_patterns
+        self.min_size_mb = min_size_mb
+        self.sniff_headers = sniff_headers
+        self.naming_template = naming_template
+        self.show_name = show_name
+        self.title_lookup = title_lookup
+        self.title_db = title_db
+        self.skip_duplicates = skip_duplicates
+        self.rename_sidecars = rename_sidecars
+        self.sidecar_extensions = sidecar_extensions
+        self.destination = destination
+        self.transfer_workers = transfer_workers
+        self._filter: Optional[Tuple[Tuple, FileFilter]] = None
+        self._template: Optional[NameTemplate] = None
+
+    def clone(self, **overrides) -> "RenameEngine":
+        """Copy the settings into a new engine sharing the index cache, without journal or undo.
+
+        Args:
+            **overrides: Settings to change in the copy, e.g. directory
+
+        Returns:
+            RenameEngine: The copy
+        """
+        settings = dict(directory=self.directory, season_number=self.season_number,
+                        start_episode=self.start_episode, end_episode=self.end_episode,
+                        file_extensions=self.file_extensions, index_cache=self.index_cache,
+                        include_patterns=self.include_patterns,
+                        exclude_patterns=self.exclude_patterns,
+                        min_size_mb=self.min_size_mb, sniff_headers=self.sniff_headers,
+                        naming_template=self.naming_template, show_name=self.show_name,
+                        title_lookup=self.title_lookup, title_db=self.title_db,
+                        skip_duplicates=self.skip_duplicates,
+                        rename_sidecars=self.rename_sidecars,
+                        sidecar_extensions=self.sidecar_extensions,
+                        destination=self.destination, transfer_workers=self.transfer_workers)
+        settings.update(overrides)
+        engine = RenameEngine(**settings)
+        engine._filter = self._filter
+        engine._template = self._template
+        return engine
+
+    def file_filter(self) -> FileFilter:
+        """Get the file filter, compiled again only when the filter settings change.
+
+        Raises:
+            ValueError: If a pattern or the minimum size is invalid
+        """
+        settings = (self.file_extensions, self.include_patterns, self.exclude_patterns,
+                    self.min_size_mb, bool(self.sniff_headers))
+        if self._filter is None or self._filter[0] != settings:
+            try:
+                min_size = int(float(self.min_size_mb or 0) * 1024 * 1024)
+            except ValueError:
+                raise ValueError("Invalid minimum file size")
+            self._filter = (settings, FileFilter(self.file_extensions, self.include_patterns,
+                                                 self.exclude_patterns, min_size,
+                                                 bool(self.sniff_headers)))
+        return self._filter[1]
+
+    def allowed_extensions(self) -> List[str]:
+        """Get the normalized list of extensions to include.
+
+        Returns:
+            List[str]: Lower-case extensions, each starting with a dot
+        """
+        return normalize_extensions(self.file_extensions)
+
+    def filter_key(self) -> str:
+        """Get a normalized key describing the file filter and sidecar settings."""
+        key = self.file_filter().key
+        if self.rename_sidecars:
+            key += "|sidecars:" + ",".join(sorted(parse_sidecar_extensions(self.sidecar_extensions)))
+        return key
+
+    def validate_file_type(self, filename: str) -> bool:
+        """Validate if the file extension matches user-specified extensions.
+
+        Args:
+            filename (str): The name of the file to validate
+
+        Returns:
+            bool: True if file extension matches specified extensions, False otherwise
+        """
+        try:
+            return self.file_filter().matches_name(filename)
+        except Exception:
+            return False
+
+    def iter_scan(self, batch_size: int = SCAN_BATCH_SIZE,
+                  cancel_event: Optional[threading.Event] = None,
+                  sidecars: Optional[List[str]] = None) -> Iterator[List[str]]:
+        """Stream valid files in the selected directory in batches.
+
+        Uses os.scandir so the file type comes from the cached directory
+        entry instead of one extra stat per file.
+
+        Args:
+            batch_size (int): Number of directory entries read per batch
+            cancel_event (Optional[threading.Event]): Stops the scan when set
+            sidecars (Optional[List[str]]): Collects possible sidecar files from the same pass
+                when the engine renames sidecars
+
+        Yields:
+            List[str]: Names of matching files, never empty
+        """
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+
+        matches = self.file_filter().matches_entry
+        extensions = (parse_sidecar_extensions(self.sidecar_extensions)
+                      if sidecars is not None and self.rename_sidecars else None)
+        with os.scandir(self.directory) as entries:
+            while True:
+                with instrumentation.phase("scan"):
+                    chunk = list(islice(entries, batch_size))
+                if not chunk or (cancel_event is not None and cancel_event.is_set()):
+                    return
+                with instrumentation.phase("filter"):
+                    if extensions:
+                        batch = []
+                        for entry in chunk:
+                            if matches(entry):
+                                batch.append(entry.name)
+                            elif (os.path.splitext(entry.name)[1].lower() in extensions
+                                  and entry.is_file()):
+                                sidecars.append(entry.name)
+                    else:
+                        batch = [entry.name for entry in chunk if matches(entry)]
+                instrumentation.count("files_scanned", len(chunk))
+                instrumentation.count("files_matched", len(batch))
+                if batch:
+                    yield batch
+
+    def uses_index_cache(self) -> bool:
+        """Check whether listings are cached.
+
+        Listings filtered by size or header are not, since files can grow or
+        change without touching the directory's mtime.
+        """
+        return (self.index_cache is not None and bool(self.directory)
+                and not self.file_filter().inspects_content)
+
+    def cached_index(self) -> Optional[DirectoryIndex]:
+        """Get the cached listing if the directory hasn't changed since it was scanned."""
+        if not self.uses_index_cache():
+            return None
+        return self.index_cache.get(self.directory, self.filter_key())
+
+    def scan_index(self, sidecars: Optional[List[str]] = None
+                   ) -> Tuple[List[str], List[SortKey]]:
+        """Get the valid files in the selected directory together with their sort keys.
+
+        Args:
+            sidecars (Optional[List[str]]): Collects possible sidecar files when the engine
+                renames sidecars
+
+        Returns:
+            Tuple[List[str], List[SortKey]]: File names and their episode sort keys
+        """
+        cached = self.cached_index()
+        if cached is not None:
+            if sidecars is not None:
+                sidecars.extend(cached.sidecars)
+            return list(cached.files), list(cached.keys)
+
+        signature = directory_signature(self.directory) if self.directory else None
+        files = []
+        found: List[str] = []
+        for batch in self.iter_scan(sidecars=found):
+            files.extend(batch)
+        with instrumentation.phase("sort_keys"):
+            keys = sort_keys(files)
+        if self.uses_index_cache():
+            self.index_cache.put(self.directory, self.filter_key(), signature, files, keys,
+                                 found)
+        if sidecars is not None:
+            sidecars.extend(found)
+        return files, keys
+
+    def get_files(self) -> List[str]:
+        """Get list of valid files in the selected directory."""
+        return self.scan_index()[0]
+
+    def plan_files(self, plan: RenamePlan, files: List[str], keys: Optional[List[SortKey]] = None,
+                   sidecars: Optional[List[str]] = None):
+        """Load scanned files into a plan, attaching sidecars and marking duplicates as configured.
+
+        Args:
+            plan (RenamePlan): Plan to fill
+            files (List[str]): Matching files in any order
+            keys (Optional[List[SortKey]]): Sort key of each file, computed if omitted
+            sidecars (Optional[List[str]]): Possible sidecar files from the same directory
+        """
+        plan.set_files(files, keys)
+        if self.rename_sidecars and sidecars:
+            plan.set_sidecars(sidecars)
+        if self.skip_duplicates:
+            plan.set_duplicates(self.find_duplicates(plan.files))
+
+    def apply_changes(self, plan: RenamePlan, names: Iterable[str]) -> bool:
+        """Apply entries added, removed or rewritten in the directory without rescanning it.
+
+        Each changed name is checked against the filter again and moved in
+        or out of the plan, its sidecar candidates and the cached index.
+        Duplicates are left as they were; update_duplicates() hashes the
+        affected files again and may take a while.
+
+        Args:
+            plan (RenamePlan): Plan of the engine's directory
+            names (Iterable[str]): Entry names reported by a DirectoryWatcher
+
+        Returns:
+            bool: True if the plan changed
+        """
+        names = set(names)
+        file_filter = self.file_filter()
+        matching = [name for name in names
+                    if file_filter.matches_file(os.path.join(self.directory, name))]
+        gone = [name for name in names if name in plan.keys]
+        changed = bool(gone or matching)
+        plan.remove_files(gone)
+        plan.add_files(matching)
+
+        if self.rename_sidecars:
+            extensions = parse_sidecar_extensions(self.sidecar_extensions)
+            found = set(matching)
+            candidates = [name for name in names if name not in found
+                          and os.path.splitext(name)[1].lower() in extensions
+                          and os.path.isfile(os.path.join(self.directory, name))]
+            if candidates or any(name in names for name in plan.sidecar_names):
+                plan.set_sidecars([name for name in plan.sidecar_names if name not in names]
+                                  + candidates)
+                changed = True
+
+        if changed and self.uses_index_cache():
+            self.index_cache.put(self.directory, self.filter_key(),
+                                 directory_signature(self.directory), list(plan.files),
+                                 [plan.keys[name] for name in plan.files],
+                                 list(plan.sidecar_names))
+        return changed
+
+    def find_duplicates(self, files: List[str]) -> Dict[str, str]:
+        """Find files in the selected directory with identical content.
+
+        Args:
+            files (List[str]): Files in episode order, the first copy of each is kept
+
+        Returns:
+            Dict[str, str]: Each duplicate mapped to the copy that is kept
+        """
+        if not self.directory:
+            return {}
+        return find_duplicates(self.directory, files)
+
+    def update_duplicates(self, files: List[str], duplicates: Dict[str, str],
+                          names: Iterable[str]) -> Dict[str, str]:
+        """Find duplicates again among only the files affected by a change in the directory.
+
+        Args:
+            files (List[str]): Files in episode order, the first copy of each is kept
+            duplicates (Dict[str, str]): Duplicates found before the change
+            names (Iterable[str]): Entry names reported by a DirectoryWatcher
+
+        Returns:
+            Dict[str, str]: Each duplicate mapped to the copy that is kept
+        """
+        if not self.directory:
+            return {}
+        return update_duplicates(self.directory, files, duplicates, names)
+
+    def name_template(self) -> NameTemplate:
+        """Get the naming template, compiled again only when the template text changes.
+
+        Raises:
+            ValueError: If the template is invalid
+        """
+        if self._template is None or self._template.template != self.naming_template:
+            self._template = NameTemplate(self.naming_template)
+        return self._template
+
+    def show(self) -> str:
+        """Get the show name for {show}, from the settings or the directory names."""
+        return self.show_name.strip() or infer_show_name(self.directory)
+
+    def naming_key(self) -> Tuple:
+        """Get the settings that new names depend on, besides the episode numbers."""
+        return (self.season_number, self.naming_template, self.show(), self.title_lookup,
+                self.title_db.version if self.title_db is not None else None)
+
+    def titles(self, template: NameTemplate) -> Optional[TitleLookup]:
+        """Get the title lookup for the current show, None if the template has no {title}."""
+        if "title" not in template.fields:
+            return None
+        if self.title_lookup is not None:
+            return self.title_lookup
+        if self.title_db is not None:
+            return self.title_db.titles_for(self.show())
+        return None
+
+    def generate_new_filename(self, old_name: str, episode_number: int) -> str:
+        """Generate new filename based on season and episode numbers."""
+        return self.generate_new_filenames([old_name], episode_number)[0]
+
+    def generate_new_filenames(self, files: List[str], first_episode: int,
+                               spans: Optional[Sequence[int]] = None) -> List[str]:
+        """Generate new filenames for consecutive episodes in one pass.
+
+        Args:
+            files (List[str]): Files in episode order
+            first_episode (int): Episode number of the first file
+            spans (Optional[Sequence[int]]): Episodes held by each file, one each if omitted
+
+        Returns:
+            List[str]: New names, one per file
+
+        Raises:
+            ValueError: If the season number or the naming template is invalid
+        """
+        try:
+            season = int(self.season_number)
+        except ValueError:
+            raise ValueError("Invalid season or episode number")
+        template = self.name_template()
+        episodes = episode_numbers(first_episode, spans, len(files))
+        return template.render_batch(files, season, episodes, spans, self.show(),
+                                     self.titles(template))
+
+    def build_plan(self, files: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+        """Pair every file with its new name.
+
+        Sidecar files follow their video when they are renamed, and
+        duplicates are left out when they are skipped.
+
+        Args:
+            files (Optional[List[str]]): Files to plan, scanned from the directory if omitted
+
+        Returns:
+            List[Tuple[str, str]]: (old_name, new_name) pairs in episode order
+
+        Raises:
+            EpisodeRangeError: If the end episode is before the start episode
+            ValueError: If the season or episode numbers are not numbers
+        """
+        keys = None
+        sidecars: List[str] = []
+        if files is None:
+            files, keys = self.scan_index(sidecars)
+        plan = RenamePlan()
+        self.plan_files(plan, files, keys, sidecars)
+        plan.update(self)
+        return plan.pairs()
+
+    def apply_plan(self, plan: List[Tuple[str, str]],
+                   on_progress: Optional[ProgressCallback] = None,
+                   on_error: Optional[ErrorCallback] = None,
+                   directory: Optional[str] = None, max_workers: int = 1,
+                   cancel_event: Optional[threading.Event] = None,
+                   on_transfer: Optional[TransferCallback] = None,
+                   destination: Optional[str] = None) -> RenameResult:
+        """Rename files according to a plan and record the batch for undo.
+
+        Swaps and renumbering cycles are handled by order_renames, so the
+        whole batch runs in one pass. Plans spanning several subdirectories,
+        such as a whole show, are renamed one directory per worker and
+        recorded as a single batch. With a destination, renamed files, and
+        planned files that already have their new names, are then moved
+        below it, keeping their relative paths. The batch is recorded for undo
+        before the move starts.
+
+        Args:
+            plan (List[Tuple[str, str]]): (old_name, new_name) pairs to apply, may be relative paths
+            on_progress (Optional[ProgressCallback]): Called with (done, total) after each file
+            on_error (Optional[ErrorCallback]): Called with (old_name, error) when a rename fails
+            directory (Optional[str]): Directory the names are relative to, the engine's by default
+            max_workers (int): Number of subdirectories renamed at once
+            cancel_event (Optional[threading.Event]): Stops the batch after the current file when set
+            on_transfer (Optional[TransferCallback]): Called with (bytes done, bytes total, bytes per
+                second) while files are moved to the destination
+            destination (Optional[str]): Directory to move renamed files into, the engine's by default
+
+        Returns:
+            RenameResult: The renamed pairs and the failures, including failed moves
+
+        Raises:
+            ValueError: If the destination is the directory itself
+        """
+        directory = directory or self.directory
+        destination = self.destination if destination is None else destination
+        check_destination(directory, destination)
+        result = self._execute_grouped(directory, plan, "rename", max_workers,
+                                       on_progress, on_error, cancel_event)
+
+        names: List[str] = []
+        if destination and not result.cancelled:
+            names = self._names_to_move(directory, plan, result.done)
+        # Recorded before a move that may take hours, so a crash leaves the batch undoable;
+        # undo only brings back the files it finds below the destination
+        if result.done or names:
+            self.undo_stack.append(RenameBatch(directory, result.done, destination, names))
+        if names:
+            result.transfer, moved = self._transfer(directory, destination, names,
+                                                    on_transfer, on_error, cancel_event)
+            result.errors.extend(result.transfer.errors)
+            result.cancelled = result.transfer.cancelled
+            if len(moved) != len(names):
+                # Keep only the files that landed
+                self.undo_stack.pop()
+                if result.done or moved:
+                    self.undo_stack.append(RenameBatch(directory, result.done, destination, moved))
+        return result
+
+    @staticmethod
+    def _names_to_move(directory: str, plan: List[Tuple[str, str]],
+                       done: List[Tuple[str, str]]) -> List[str]:
+        """Get the planned names to move to the destination, in plan order.
+
+        Besides the files renamed now, that is every file already carrying
+        its new name in the directory: names that needed no change and files
+        renamed by an earlier run whose move was cancelled or interrupted,
+        so their partial copies are resumed. Pairs rejected because another
+        file holds the new name are left alone.
+        """
+        renamed = {new_name for _, new_name in done}
+        names: List[str] = []
+        seen: Set[str] = set()
+        for old_name, new_name in plan:
+            if new_name in seen:
+                continue
+            if new_name not in renamed:
+                if not os.path.isfile(os.path.join(directory, new_name)):
+                    continue
+                if old_name != new_name and os.path.lexists(os.path.join(directory, old_name)):
+                    continue  # Not renamed, the new name belongs to another file
+            seen.add(new_name)
+            names.append(new_name)
+        return names
+
+    def _transfer(self, source_dir: str, target_dir: str, names: List[str],
+                  on_transfer: Optional[TransferCallback], on_error: Optional[ErrorCallback],
+                  cancel_event: Optional[threading.Event]) -> Tuple[TransferResult, List[str]]:
+        """Move files between two directories, keeping their relative paths.
+
+        Returns:
+            Tuple[TransferResult, List[str]]: The outcome and the names that were moved
+        """
+        pairs = [(os.path.join(source_dir, name), os.path.join(target_dir, name)) for name in names]
+        name_of = dict(zip((source for source, _ in pairs), names))
+        result = transfer_files(pairs, self.transfer_workers, on_transfer=on_transfer,
+                                on_error=on_error, cancel_event=cancel_event)
+        return result, [name_of[source] for source, _ in result.done]
+
+    def undo_last(self, on_progress: Optional[ProgressCallback] = None,
+                  on_error: Optional[ErrorCallback] = None,
+                  max_workers: int = DEFAULT_LIBRARY_WORKERS,
+                  cancel_event: Optional[threading.Event] = None) -> Optional[RenameResult]:
+        """Undo the last rename batch.
+
+        Args:
+            on_progress (Optional[ProgressCallback]): Called with (done, total) after each file
+            on_error (Optional[ErrorCallback]): Called with (new_name, error) when a restore fails
+            max_workers (int): Number of subdirectories restored at once for library batches
+            cancel_event (Optional[threading.Event]): Stops the undo after the current file when set;
+                the files not yet restored stay on the undo stack
+
+        Returns:
+            Optional[RenameResult]: The restored pairs and failures, None if there is nothing to undo
+        """
+        if not self.undo_stack:
+            return None
+
+        batch = self.undo_stack.pop()
+        transfer = None
+        stranded: Set[str] = set()  # New names still below the destination
+        if batch.moved:
+            # Bring moved files back first so they can be renamed back in place; a batch
+            # interrupted while moving lists files that never arrived
+            moved = [name for name in batch.moved
+                     if os.path.lexists(os.path.join(batch.destination, name))]
+            transfer, returned = self._transfer(batch.destination, batch.directory, moved,
+                                                None, on_error, cancel_event)
+            stranded = set(moved).difference(returned)
+            if transfer.cancelled:
+                self.undo_stack.append(RenameBatch(batch.directory, batch.pairs,
+                                                   batch.destination, sorted(stranded)))
+                result = RenameResult(len(batch.pairs))
+                result.errors = list(transfer.errors)
+                result.cancelled = True
+                result.transfer = transfer
+                return result
+        restore = [(new_name, old_name) for old_name, new_name in batch.pairs
+                   if new_name not in stranded]
+        result = self._execute_grouped(batch.directory, restore, "undo", max_workers,
+                                       on_progress, on_error, cancel_event)
+        result.done = [(old_name, new_name) for new_name, old_name in result.done]
+        if transfer is not None:
+            result.total = len(batch.pairs)
+            result.errors = transfer.errors + result.errors
+            result.transfer = transfer
+        if result.cancelled or stranded:
+            # Files not restored, or not brought back, stay undoable
+            restored = set(result.done)
+            remaining = [pair for pair in batch.pairs if pair not in restored]
+            if remaining or stranded:
+                self.undo_stack.append(RenameBatch(batch.directory, remaining,
+                                                   batch.destination, sorted(stranded)))
+        return result
+
+    def _execute_grouped(self, directory: str, pairs: List[Tuple[str, str]], kind: str,
+                         max_workers: int, on_progress: Optional[ProgressCallback],
+                         on_error: Optional[ErrorCallback],
+                         cancel_event: Optional[threading.Event] = None) -> RenameResult:
+        """Run a batch one subdirectory per worker, reporting back on the calling thread.
+
+        Each subdirectory is ordered and journaled on its own. Progress is
+        summed over all workers and, like errors, delivered on the calling
+        thread, so callbacks may touch the GUI.
+
+        Args:
+            directory (str): Directory the paths are relative to
+            pairs (List[Tuple[str, str]]): (source, target) paths
+            kind (str): "rename" or "undo", recorded in the journal
+            max_workers (int): Number of subdirectories processed at once
+            on_progress (Optional[ProgressCallback]): Called with (done, total) as files complete
+            on_error (Optional[ErrorCallback]): Called with (source, error) when a pair fails
+            cancel_event (Optional[threading.Event]): Stops every worker after its current file
+
+        Returns:
+            RenameResult: The (source, target) paths that completed and the failures
+        """
+        groups = group_by_parent(pairs)
+        if groups is None or len(groups) <= 1 or max_workers <= 1:
+            return self._execute(directory, pairs, kind, on_progress, on_error, cancel_event)
+
+        result = RenameResult(len(pairs))
+        lock = threading.Lock()
+        progress = [0]
+        failures: "queue.Queue[Tuple[str, Exception]]" = queue.Queue()
+
+        def run(parent: str, names: List[Tuple[str, str]]) -> Tuple[str, RenameResult]:
+            def count(done: int, total: int):
+                with lock:
+                    progress[0] += 1
+
+            def fail(name: str, error: Exception):
+                failures.put((os.path.join(parent, name), error))
+
+            return parent, self._execute(os.path.join(directory, parent), names, kind,
+                                         count, fail, cancel_event)
+
+        reported = 0
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(groups))) as executor:
+            pending = {executor.submit(run, parent, names) for parent, names in groups.items()}
+            while pending:
+                finished, pending = wait(pending, timeout=PROGRESS_INTERVAL)
+                for future in finished:
+                    parent, group_result = future.result()
+                    join = os.path.join
+                    result.done.extend((join(parent, source), join(parent, target))
+                                       for source, target in group_result.done)
+                    result.errors.extend((join(parent, source), message)
+                                         for source, message in group_result.errors)
+                    result.cancelled = result.cancelled or group_result.cancelled
+                while not failures.empty():
+                    name, error = failures.get_nowait()
+                    if on_error:
+                        on_error(name, error)
+                with lock:
+                    done = progress[0]
+                if on_progress and done != reported:
+                    reported = done
+                    on_progress(done, result.total)
+        return result
+
+    def _execute(self, directory: str, pairs: List[Tuple[str, str]], kind: str,
+                 on_progress: Optional[ProgressCallback],
+                 on_error: Optional[ErrorCallback],
+                 cancel_event: Optional[threading.Event] = None) -> RenameResult:
+        """Order, journal and run a batch of renames, continuing past failures.
+
+        Args:
+            directory (str): Directory the names are relative to
+            pairs (List[Tuple[str, str]]): (source, target) names
+            kind (str): "rename" or "undo", recorded in the journal
+            on_progress (Optional[ProgressCallback]): Called with (done, total) after each pair
+            on_error (Optional[ErrorCallback]): Called with (source, error) when a pair fails
+            cancel_event (Optional[threading.Event]): Stops the batch after the current file;
+                a cycle in progress is always completed so no file is left on a temporary name
+
+        Returns:
+            RenameResult: The (source, target) pairs that completed and the failures
+        """
+        with instrumentation.phase("apply"):
+            result = self._run_batch(directory, pairs, kind, on_progress, on_error, cancel_event)
+        instrumentation.count("renames", result.count)
+        instrumentation.count("rename_errors", len(result.errors))
+        return result
+
+    def _run_batch(self, directory: str, pairs: List[Tuple[str, str]], kind: str,
+                   on_progress: Optional[ProgressCallback],
+                   on_error: Optional[ErrorCallback],
+                   cancel_event: Optional[threading.Event]) -> RenameResult:
+        result = RenameResult(len(pairs))
+
+        failed: Set[int] = set()
+
+        def fail(index: int, error: Exception):
+            failed.add(index)
+            source = pairs[index][0]
+            logging.error(f"Error renaming {source}: {str(error)}")
+            result.errors.append((source, str(error)))
+            if on_error:
+                on_error(source, error)
+
+        # One directory listing replaces an existence check per file
+        owners = companion_owners(pairs)
+        ops, rejected = order_renames(pairs, existing_names(directory, (p[1] for p in pairs)),
+                                      owners)
+        for index, reason in rejected:
+            fail(index, FileExistsError(reason))
+
+        batch_id = None
+        if self.journal and ops:
+            batch_id = self.journal.begin(directory, [(src, dst) for src, dst, _ in ops], kind)
+
+        stuck: Set[str] = set()            # Names still held by files whose rename failed
+        parked: Dict[str, str] = {}        # Temporary name -> original source
+        for op_index, (source, target, index) in enumerate(ops):
+            # Only stop between cycles, files parked on a temporary name must get their new name
+            if (cancel_event is not None and cancel_event.is_set()
+                    and all(temp in stuck for temp in parked)):
+                result.cancelled = True
+                break
+            try:
+                if owners.get(index) in failed:
+                    raise FileNotFoundError(
+                        f"Not renamed because its video wasn't: {pairs[owners[index]][0]}")
+                if source in stuck:
+                    raise FileNotFoundError(f"Not renamed after an earlier failure: {source}")
+                if target in stuck:
+                    raise FileExistsError(f"Target is still in use: {target}")
+                os.rename(os.path.join(directory, source), os.path.join(directory, target))
+                if batch_id:
+                    # Parking is synced, so recovery knows a cycle started before later
+                    # renames reuse the parked file's name
+                    self.journal.done(batch_id, op_index, sync=target != pairs[index][1])
+            except Exception as e:
+                failed.add(index)
+                stuck.add(source)
+                if target != pairs[index][1]:
+                    stuck.add(target)  # The temporary name never got the file
+                if source not in parked:
+                    fail(index, e)
+                continue
+
+            if target != pairs[index][1]:
+                parked[target] = source
+                continue
+            parked.pop(source, None)
+            result.done.append(pairs[index])
+            if on_progress:
+                on_progress(result.count, result.total)
+
+        # Put files parked under a temporary name by an unfinished cycle back
+        for temp, source in parked.items():
+            try:
+                if source in stuck or os.path.exists(os.path.join(directory, source)):
+                    raise FileExistsError(f"Left as {temp}, original name is in use")
+                os.rename(os.path.join(directory, temp), os.path.join(directory, source))
+            except Exception as e:
+                logging.error(f"Error restoring {source}: {str(e)}")
+                result.errors.append((source, str(e)))
+
+        if batch_id:
+            self.journal.commit(batch_id)
+        return result
+
+    def pending_recovery(self) -> bool:
+        """Check whether the journal holds batches interrupted by a crash."""
+        return bool(self.journal and self.journal.pending())
+
+    def recover(self, roll_forward: bool = True) -> List[RecoveryResult]:
+        """Finish or revert batches interrupted by a crash and restore their undo history.
+
+        Args:
+            roll_forward (bool): Complete interrupted batches if True, revert them if False
+
+        Returns:
+            List[RecoveryResult]: One result per interrupted batch
+        """
+        if not self.journal:
+            return []
+        results = self.journal.recover(roll_forward)
+        for result in results:
+            if not result.settled:
+                continue
+            if result.kind == "rename" and result.rolled_forward:
+                # A completed rename batch can be undone like any other
+                self.undo_stack.append(RenameBatch(result.directory, result.settled))
+            elif result.kind == "undo" and not result.rolled_forward:
+                # A reverted undo puts the original rename batch back on the stack
+                self.undo_stack.append(RenameBatch(
+                    result.directory, [(old, new) for new, old in result.settled]))
+        return results
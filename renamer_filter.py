@@ -0,0 +1,294 @@
+import os
+import re
+import stat
+import fnmatch
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from renamer_profiling import instrumentation
+
+# Patterns starting with this prefix are regular expressions, the rest are globs
+REGEX_PREFIX = "re:"
+PATTERN_SEPARATOR = ";"
+
+SNIFF_BYTES = 16
+DEFAULT_SNIFF_CACHE_SIZE = 100_000
+
+# Header checks per container: (offset, magic bytes) that must all match
+_CONTAINER_MAGIC: Dict[str, Tuple[Tuple[int, bytes], ...]] = {
+    "matroska": ((0, b"\x1a\x45\xdf\xa3"),),
+    "isobmff": ((4, b"ftyp"),),
+    "avi": ((0, b"RIFF"), (8, b"AVI ")),
+    "asf": ((0, b"\x30\x26\xb2\x75\x8e\x66\xcf\x11"),),
+    "flv": ((0, b"FLV"),),
+    "mpeg-ps": ((0, b"\x00\x00\x01\xba"),),
+    "mpeg-ts": ((0, b"\x47"),),
+}
+
+# Container used by each video MIME type
+_MIME_CONTAINERS = {
+    "video/x-matroska": "matroska",
+    "video/webm": "matroska",
+    "video/mp4": "isobmff",
+    "video/quicktime": "isobmff",
+    "video/3gpp": "isobmff",
+    "video/x-m4v": "isobmff",
+    "video/x-msvideo": "avi",
+    "video/x-ms-asf": "asf",
+    "video/x-ms-wmv": "asf",
+    "video/x-flv": "flv",
+    "video/mpeg": "mpeg-ps",
+    "video/mp2t": "mpeg-ts",
+}
+
+# Common video extensions the platform MIME database may not know
+_FALLBACK_MIME_TYPES = {
+    ".mkv": "video/x-matroska",
+    ".webm": "video/webm",
+    ".m4v": "video/x-m4v",
+    ".wmv": "video/x-ms-wmv",
+    ".flv": "video/x-flv",
+    ".ts": "video/mp2t",
+    ".m2ts": "video/mp2t",
+}
+
+
+def container_for_extension(ext: str) -> Optional[str]:
+    """Get the container format a file extension promises.
+
+    Args:
+        ext (str): Lower-case extension with its leading dot
+
+    Returns:
+        Optional[str]: Container name, None if it isn't a known video container
+    """
+    import mimetypes  # Reads the platform MIME database, so only load it when sniffing
+
+    mime_type = mimetypes.types_map.get(ext) or _FALLBACK_MIME_TYPES.get(ext)
+    return _MIME_CONTAINERS.get(mime_type) if mime_type else None
+
+
+def header_matches(header: bytes, container: str) -> bool:
+    """Check the first bytes of a file against a container's magic bytes."""
+    return all(header[offset:offset + len(magic)] == magic
+               for offset, magic in _CONTAINER_MAGIC[container])
+
+
+def normalize_extensions(extensions: str) -> List[str]:
+    """Split a comma separated extension list into lower-case extensions with a leading dot."""
+    return [
+        ext.strip().lower() if ext.strip().startswith('.') else f'.{ext.strip().lower()}'
+        for ext in extensions.split(',')
+    ]
+
+
+def split_patterns(patterns: str) -> List[str]:
+    """Split a semicolon separated pattern list, dropping empty entries."""
+    return [pattern.strip() for pattern in patterns.split(PATTERN_SEPARATOR) if pattern.strip()]
+
+
+def compile_patterns(patterns: Iterable[str]) -> Optional[Callable[[str], bool]]:
+    """Compile glob and 're:' patterns into one case-insensitive check of a name.
+
+    Globs are combined into one regex that must match the whole name;
+    regular expressions are combined into another that may match anywhere
+    in it, like re.search.
+
+    Args:
+        patterns (Iterable[str]): Glob patterns, or regular expressions prefixed with 're:'
+
+    Returns:
+        Optional[Callable[[str], bool]]: True for a name matching any pattern, None if there are
+        no patterns
+
+    Raises:
+        ValueError: If a regular expression is invalid
+    """
+    globs = []
+    expressions = []
+    for pattern in patterns:
+        if pattern.startswith(REGEX_PREFIX):
+            expression = pattern[len(REGEX_PREFIX):]
+            try:
+                re.compile(expression)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern {pattern}: {str(e)}")
+            expressions.append(f"(?:{expression})")
+        else:
+            globs.append(f"(?:{fnmatch.translate(pattern)})")
+    glob = re.compile("|".join(globs), re.IGNORECASE).fullmatch if globs else None
+    search = re.compile("|".join(expressions), re.IGNORECASE).search if expressions else None
+    if glob is None and search is None:
+        return None
+    if search is None:
+        return lambda name: glob(name) is not None
+    if glob is None:
+        return lambda name: search(name) is not None
+    return lambda name: glob(name) is not None or search(name) is not None
+
+
+class SniffCache:
+    """Bounded LRU of header check results, keyed by file identity.
+
+    An entry is only reused while the file's mtime and size are unchanged,
+    so a download that is still growing is checked again.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_SNIFF_CACHE_SIZE):
+        """Initialize the cache.
+
+        Args:
+            max_entries (int): Number of files remembered before evicting the least recently used
+        """
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[int, int], Tuple[int, int, bool]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, st: os.stat_result) -> Optional[bool]:
+        """Get the cached result for a file, None if it is unknown or changed."""
+        key = (st.st_dev, st.st_ino)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[:2] != (st.st_mtime_ns, st.st_size):
+                return None
+            self.entries.move_to_end(key)
+            return entry[2]
+
+    def put(self, st: os.stat_result, verdict: bool):
+        """Remember the result of checking a file."""
+        key = (st.st_dev, st.st_ino)
+        with self.lock:
+            self.entries[key] = (st.st_mtime_ns, st.st_size, verdict)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+sniff_cache = SniffCache()
+
+
+class FileFilter:
+    """File filter compiled once per settings change and applied to every directory entry.
+
+    Cheap name checks (extension set, include and exclude patterns) run
+    first; only names that pass them are stat'ed for the minimum size and
+    have their header bytes read when sniffing is on.
+    """
+
+    def __init__(self, extensions: str, include: str = "", exclude: str = "",
+                 min_size: int = 0, sniff: bool = False,
+                 cache: Optional[SniffCache] = None):
+        """Compile the filter.
+
+        Args:
+            extensions (str): Comma separated list of extensions to include
+            include (str): Semicolon separated globs or 're:' regexes a name must match, empty for all
+            exclude (str): Semicolon separated globs or 're:' regexes that reject a name
+            min_size (int): Smallest file size in bytes, e.g. to skip samples
+            sniff (bool): Reject files whose header doesn't match the container of their extension
+            cache (Optional[SniffCache]): Header check results to reuse, the shared cache by default
+
+        Raises:
+            ValueError: If a pattern is invalid
+        """
+        self.extensions: FrozenSet[str] = frozenset(normalize_extensions(extensions))
+        self.include_patterns = split_patterns(include)
+        self.exclude_patterns = split_patterns(exclude)
+        self.include = compile_patterns(self.include_patterns)
+        self.exclude = compile_patterns(self.exclude_patterns)
+        self.min_size = max(0, int(min_size))
+        self.sniff = sniff
+        self.cache = cache if cache is not None else sniff_cache
+        self.key = "|".join([
+            ",".join(sorted(self.extensions)),
+            PATTERN_SEPARATOR.join(self.include_patterns),
+            PATTERN_SEPARATOR.join(self.exclude_patterns),
+            str(self.min_size),
+            "sniff" if sniff else "",
+        ])
+
+    @property
+    def inspects_content(self) -> bool:
+        """True if matching depends on file sizes or contents, not just names."""
+        return self.min_size > 0 or self.sniff
+
+    def matches_name(self, name: str) -> bool:
+        """Check the extension and the include and exclude patterns."""
+        if os.path.splitext(name)[1].lower() not in self.extensions:
+            return False
+        if self.include is not None and not self.include(name):
+            return False
+        return self.exclude is None or not self.exclude(name)
+
+    def matches_entry(self, entry: os.DirEntry) -> bool:
+        """Check a directory entry against every rule.
+
+        Args:
+            entry (os.DirEntry): Entry from os.scandir
+
+        Returns:
+            bool: True if the entry is a matching regular file
+        """
+        if not self.matches_name(entry.name) or not entry.is_file():
+            return False
+        if not self.inspects_content:
+            return True
+        try:
+            instrumentation.count("stats_issued")
+            st = entry.stat()
+        except OSError:
+            return False
+        if st.st_size < self.min_size:
+            return False
+        return not self.sniff or self.check_header(entry.path, st)
+
+    def matches_file(self, path: str) -> bool:
+        """Check a path against every rule, like matches_entry() without a directory entry.
+
+        Args:
+            path (str): File to check
+
+        Returns:
+            bool: True if the path is a matching regular file
+        """
+        if not self.matches_name(os.path.basename(path)):
+            return False
+        try:
+            instrumentation.count("stats_issued")
+            st = os.stat(path)
+        except OSError:
+            return False
+        if not stat.S_ISREG(st.st_mode) or st.st_size < self.min_size:
+            return False
+        return not self.sniff or self.check_header(path, st)
+
+    def check_header(self, path: str, st: os.stat_result) -> bool:
+        """Check that a file starts like the container its extension promises.
+
+        Files shorter than the header, such as interrupted downloads, are
+        rejected; extensions without a known container are accepted.
+
+        Args:
+            path (str): File to check
+            st (os.stat_result): Its stat result, identifying the cache entry
+
+        Returns:
+            bool: True if the header matches
+        """
+        container = container_for_extension(os.path.splitext(path)[1].lower())
+        if container is None:
+            return True
+        verdict = self.cache.get(st)
+        if verdict is not None:
+            return verdict
+        instrumentation.count("headers_sniffed")
+        try:
+            with open(path, "rb") as f:
+                header = f.read(SNIFF_BYTES)
+            verdict = len(header) == SNIFF_BYTES and header_matches(header, container)
+        except OSError as e:
+            logging.error(f"Error reading header of {path}: {str(e)}")
+            return False
+        self.cache.put(st, verdict)
+        return verdict
@@ -0,0 +1,1284 @@
+import os
+import threading
+import tkinter as tk
+import tkinter.ttk as ttk
+from tkinter import filedialog, messagebox
+import queue
+import logging
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+from renamer_engine import (RenameEngine, RenamePlan, RenameResult, DirectoryScanner,
+                            EpisodeRangeError,
+                            DEFAULT_SEASON, DEFAULT_START_EPISODE, DEFAULT_EXTENSIONS,
+                            DEFAULT_LIBRARY_WORKERS)
+from renamer_index import DirectoryIndexCache, INDEX_CACHE_FILE, Signature, directory_signature
+from renamer_library import LibraryPlan, LibraryScanner
+from renamer_journal import RenameJournal, UndoHistory
+from renamer_planfile import PlanFileError, PlanInfo, PlanResult, PlanWriter, apply_plan_file
+from renamer_profiling import instrumentation
+from renamer_selection import SelectionModel, parse_row_range
+from renamer_settings import DEFAULT_SETTINGS, load_settings, save_settings
+from renamer_transfer import check_destination, format_bytes
+from renamer_watch import DirectoryWatcher
+from renamer_template import DEFAULT_TEMPLATE
+from renamer_titles import EpisodeTitleDB
+
+def debounce(wait: float):
+    """ Decorator that will postpone a method's execution until after wait seconds
+        have elapsed since the last time it was invoked. 
+
+        The call is scheduled with Tk's after() on the instance's master window,
+        so it always runs on the Tk main thread.
+        
+        Args:
+            wait (float): Time to wait in seconds before executing the function
+    """
+    def decorator(fn):
+        attr = f"_debounce_{fn.__name__}"
+
+        @wraps(fn)
+        def debounced(self, *args, **kwargs):
+            def call_it():
+                setattr(self, attr, None)
+                fn(self, *args, **kwargs)
+            pending = getattr(self, attr, None)
+            if pending is not None:
+                self.master.after_cancel(pending)
+            setattr(self, attr, self.master.after(int(wait * 1000), call_it))
+        return debounced
+    return decorator
+
+PREVIEW_ROW_HEIGHT = 24
+PREVIEW_HEADER_HEIGHT = 26
+SCAN_POLL_MS = 50
+# How often changes found by the directory watcher are picked up
+WATCH_POLL_MS = 250
+# Progress redraws per second while renaming, independent of the file rate
+PROGRESS_FRAME_MS = 1000 // 30
+# Seconds without edits before the settings are written
+SETTINGS_SAVE_DELAY = 1.0
+PLAN_FILE_TYPES = [("Rename plans", "*.jsonl"), ("All files", "*.*")]
+# Errors listed in the summary dialog, the rest go to the log only
+ERROR_SUMMARY_LIMIT = 10
+CHECKED = "☑"
+UNCHECKED = "☐"
+# Mark of rows that are never renamed, such as duplicates
+SKIPPED = "⊘"
+
+class VirtualPreviewList(ttk.Frame):
+    """A preview list that only creates Treeview items for the visible rows.
+
+    The rename plan stays a plain in-memory sequence of (old_name, new_name)
+    pairs and the selection a SelectionModel indexed by row; scrolling
+    rewrites the values of a small pool of recycled items, so neither the
+    widget count nor the number of Tcl variables grows with the files.
+    The current name of every row is remembered, so the selection follows
+    its files when rows are inserted or removed.
+    """
+
+    def __init__(self, master, **kwargs):
+        """Initialize the preview list.
+
+        Args:
+            master: Parent widget
+        """
+        super().__init__(master, **kwargs)
+        self.rows: Sequence[Tuple[str, str]] = []
+        self.selection = SelectionModel()
+        # Current name of each row the selection was last set for
+        self.keys: List[str] = []
+        # Called after the selection changed, e.g. to update a count
+        self.on_selection_changed: Optional[Callable[[], None]] = None
+        self.offset = 0
+        self.slots: List[str] = []
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(self, columns=("selected", "old", "arrow", "new"),
+                                 show="headings", selectmode="none", height=12)
+        self.tree.heading("selected", text="")
+        self.tree.heading("old", text="Current Name", anchor="w")
+        self.tree.heading("arrow", text="")
+        self.tree.heading("new", text="New Name", anchor="w")
+        self.tree.column("selected", width=30, minwidth=30, stretch=False, anchor="center")
+        self.tree.column("old", width=300, minwidth=100, stretch=True)
+        self.tree.column("arrow", width=30, minwidth=30, stretch=False, anchor="center")
+        self.tree.column("new", width=200, minwidth=100, stretch=True)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+
+        self.v_scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.v_scrollbar.grid(row=0, column=1, sticky="ns")
+        h_scrollbar = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        h_scrollbar.grid(row=1, column=0, sticky="ew")
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<Button-1>", self._on_click)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+
+    def set_rows(self, rows: Sequence[Tuple[str, str]], selected: bool = True):
+        """Replace the rows shown in the list.
+
+        Args:
+            rows (Sequence[Tuple[str, str]]): (old_name, new_name) pairs
+            selected (bool): Initial selection state of every row
+        """
+        self.rows = rows
+        self.keys = self._row_keys()
+        self.selection.reset(len(rows), selected)
+        self.offset = min(self.offset, self.max_offset())
+        self.selection_changed()
+
+    def refresh(self, changed: Optional[Iterable[int]] = None):
+        """Redraw after the rows changed in place, keeping the selection of existing rows.
+
+        Args:
+            changed (Optional[Iterable[int]]): Indices of changed rows, None to redraw every visible row
+        """
+        keys = self._row_keys()
+        if keys != self.keys:
+            # Files were added or removed, possibly in the middle of the sorted rows
+            self.selection.remap(self.keys, keys)
+            self.keys = keys
+            changed = None
+        self.offset = min(self.offset, self.max_offset())
+        if self.on_selection_changed is not None:
+            self.on_selection_changed()
+
+        if changed is None:
+            self.render()
+            return
+        with instrumentation.phase("render"):
+            first = self.offset
+            last = self.offset + len(self.slots)
+            for index in changed:
+                if first <= index < last:
+                    self._render_slot(index - first)
+            self._update_scrollbar()
+
+    def _row_keys(self) -> List[str]:
+        """Get the current name of every row."""
+        # A plan's file list copies without a call per row
+        files = getattr(self.rows, "files", None)
+        if isinstance(files, list):
+            return files[:len(self.rows)]
+        return [row[0] for row in self.rows]
+
+    def clear(self):
+        """Remove all rows and scroll back to the top."""
+        self.offset = 0
+        self.set_rows([])
+
+    def set_all(self, selected: bool):
+        """Select or deselect every row."""
+        self.selection.set_all(selected)
+        self.selection_changed()
+
+    def selection_changed(self):
+        """Redraw the visible marks after a bulk selection change."""
+        self.render()
+        if self.on_selection_changed is not None:
+            self.on_selection_changed()
+
+    def visible_count(self) -> int:
+        """Number of rows that fit in the list."""
+        return len(self.slots)
+
+    def max_offset(self) -> int:
+        """Largest first-row index that still fills the list."""
+        return max(0, len(self.rows) - self.visible_count())
+
+    def scroll(self, delta: int):
+        """Scroll the list by a number of rows."""
+        self.offset = min(max(0, self.offset + delta), self.max_offset())
+        self.render()
+
+    def yview(self, *args):
+        """Scrollbar command handling 'moveto' and 'scroll' requests."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.offset = min(max(0, int(float(args[1]) * len(self.rows))), self.max_offset())
+            self.render()
+        elif args[0] == "scroll":
+            step = self.visible_count() if args[2] == "pages" else 1
+            self.scroll(int(args[1]) * step)
+
+    def render(self):
+        """Write the visible window of rows into the recycled items."""
+        with instrumentation.phase("render"):
+            for slot in range(len(self.slots)):
+                self._render_slot(slot)
+            self._update_scrollbar()
+
+    def _render_slot(self, slot: int):
+        """Write one visible row into its recycled item."""
+        item = self.slots[slot]
+        index = self.offset + slot
+        if index < len(self.rows):
+            old_name, new_name = self.rows[index]
+            is_duplicate = getattr(self.rows, "is_duplicate", None)
+            if is_duplicate is not None and is_duplicate(index):
+                mark = SKIPPED
+            else:
+                mark = CHECKED if self.selection[index] else UNCHECKED
+                companions = getattr(self.rows, "companions", None)
+                sidecars = len(companions(index)) if companions is not None else 0
+                if sidecars:
+                    new_name = f"{new_name}  (+{sidecars} sidecar{'s' if sidecars > 1 else ''})"
+            self.tree.item(item, values=(mark, old_name, "→", new_name))
+        else:
+            self.tree.item(item, values=("", "", "", ""))
+
+    def _update_scrollbar(self):
+        """Match the scrollbar to the visible window."""
+        total = len(self.rows)
+        if total:
+            first = self.offset / total
+            last = min(1.0, (self.offset + self.visible_count()) / total)
+            self.v_scrollbar.set(first, last)
+        else:
+            self.v_scrollbar.set(0.0, 1.0)
+
+    def _on_configure(self, event):
+        """Grow or shrink the item pool to the number of rows that fit."""
+        wanted = max(1, (event.height - PREVIEW_HEADER_HEIGHT) // PREVIEW_ROW_HEIGHT)
+        while len(self.slots) < wanted:
+            self.slots.append(self.tree.insert("", "end", values=("", "", "", "")))
+        while len(self.slots) > wanted:
+            self.tree.delete(self.slots.pop())
+        self.offset = min(self.offset, self.max_offset())
+        self.render()
+
+    def _on_click(self, event):
+        """Toggle the selection of the clicked row."""
+        item = self.tree.identify_row(event.y)
+        if not item or item not in self.slots:
+            return
+        index = self.offset + self.slots.index(item)
+        if index < len(self.rows):
+            self.selection.toggle(index)
+            self._render_slot(index - self.offset)
+            if self.on_selection_changed is not None:
+                self.on_selection_changed()
+
+    def _on_mousewheel(self, event):
+        """Handle mousewheel scrolling."""
+        self.scroll(int(-1*(event.delta/120)) * 3)
+
+class TVShowRenamer:
+    """A GUI application for renaming TV show files with consistent naming patterns."""
+    
+    def __init__(self, master: tk.Tk):
+        """Initialize the TV Show Renamer application.
+        
+        Args:
+            master (tk.Tk): The root window of the application
+        """
+        self.master = master
+        master.title("TV Show File Renamer")
+        master.geometry("800x800")
+        
+        # Make the window resizable
+        master.resizable(True, True)
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        self.configure_styles()
+
+        # Initialize variables
+        self.directory = tk.StringVar()
+        self.season_number = tk.StringVar(value=DEFAULT_SEASON)
+        self.start_episode = tk.StringVar(value=DEFAULT_START_EPISODE)
+        self.end_episode = tk.StringVar(value="")
+        self.file_extensions = tk.StringVar(value=DEFAULT_EXTENSIONS)
+        self.show_name = tk.StringVar(value="")
+        self.naming_template = tk.StringVar(value=DEFAULT_TEMPLATE)
+        self.include_patterns = tk.StringVar(value="")
+        self.exclude_patterns = tk.StringVar(value="")
+        self.min_size_mb = tk.StringVar(value="")
+        self.sniff_headers = tk.BooleanVar(value=False)
+        self.library_mode = tk.BooleanVar(value=False)
+        self.skip_duplicates = tk.BooleanVar(value=False)
+        self.rename_sidecars = tk.BooleanVar(value=False)
+        self.destination = tk.StringVar(value="")
+
+        self.previous_directory = None  # Track the previous directory
+        self.index_cache = DirectoryIndexCache(path=INDEX_CACHE_FILE)
+        self.index_cache.load()
+        self.title_db = EpisodeTitleDB()
+        self.engine = RenameEngine(index_cache=self.index_cache, journal=RenameJournal(),
+                                   undo_history=UndoHistory(), title_db=self.title_db)
+        self.saved_settings: Dict[str, object] = {}
+        self.restore_settings()
+
+        # Background directory scan state
+        self.scanner: Optional[Union[DirectoryScanner, LibraryScanner]] = None
+        self.scanned_key: Optional[Tuple[str, str, bool, bool]] = None
+        # The scanned directory's signature, taken before it was listed
+        self.scan_signature: Optional[Signature] = None
+        # Keeps the preview of a scanned directory in line with files that land later
+        self.watcher: Optional[DirectoryWatcher] = None
+        # Changes reported while a scan or rename ran, applied once it's over
+        self.watch_changes: Set[str] = set()
+        self.watch_rescan = False
+        # Hashes the files the watcher touched while skipping duplicates
+        self.duplicate_check: Optional[threading.Thread] = None
+        self.rehash_names: Set[str] = set()
+        self.plan: Union[RenamePlan, LibraryPlan] = RenamePlan()
+        self.scan_status = tk.StringVar()
+        self.select_pattern = tk.StringVar(value="")
+        self.select_rows = tk.StringVar(value="")
+        self.selection_status = tk.StringVar()
+        
+        # Create progress bar (hidden by default)
+        self.progress_var = tk.DoubleVar()
+        self.progress_bar = None
+
+        # Rename or undo running on a worker thread
+        self.task: Optional[threading.Thread] = None
+        self.task_cancel: Optional[threading.Event] = None
+        self.task_progress = (0, 0)
+        # (bytes done, bytes total, bytes per second) while moving to the destination
+        self.task_transfer: Optional[Tuple[int, int, float]] = None
+        self.task_outcome = None
+        
+        self.create_widgets()
+        self.recover_journal()
+
+    def configure_styles(self):
+        """Configure the visual styles for the application."""
+        try:
+            self.style = ttk.Style()
+            self.style.theme_use('clam')
+            
+            colors = {
+                "PRIMARY_COLOR": "#2196F3",
+                "SECONDARY_COLOR": "#1976D2",
+                "BACKGROUND_COLOR": "#F5F5F5",
+                "SURFACE_COLOR": "#FFFFFF",
+                "TEXT_COLOR": "#212121",
+                "ACCENT_COLOR": "#FF4081",
+                "BORDER_COLOR": "#E0E0E0"
+            }
+            
+            # Configure widget styles
+            self.style.configure('TFrame', background=colors["BACKGROUND_COLOR"])
+            self.style.configure('TLabel', 
+                               background=colors["BACKGROUND_COLOR"], 
+                               foreground=colors["TEXT_COLOR"], 
+                               font=('Segoe UI', 11))
+            self.style.configure('TEntry', 
+                               fieldbackground=colors["SURFACE_COLOR"], 
+                               foreground=colors["TEXT_COLOR"], 
+                               font=('Segoe UI', 11),
+                               borderwidth=1)
+            self.style.configure('TButton', 
+                               background=colors["PRIMARY_COLOR"], 
+                               foreground=colors["SURFACE_COLOR"], 
+                               font=('Segoe UI', 11, 'bold'),
+                               borderwidth=0,
+                               padding=(10, 5))
+            self.style.configure('Treeview',
+                               background=colors["SURFACE_COLOR"],
+                               fieldbackground=colors["SURFACE_COLOR"],
+                               foreground=colors["TEXT_COLOR"],
+                               font=('Segoe UI', 11),
+                               rowheight=PREVIEW_ROW_HEIGHT)
+            self.style.configure('Horizontal.TProgressbar',
+                               background=colors["PRIMARY_COLOR"],
+                               troughcolor=colors["BACKGROUND_COLOR"])
+            
+            # Configure widget states
+            self.style.map('TEntry', 
+                          fieldbackground=[('readonly', colors["SURFACE_COLOR"])])
+            self.style.map('TButton', 
+                          background=[('active', colors["SECONDARY_COLOR"])])
+            
+        except Exception as e:
+            self.handle_error("Error configuring styles", e)
+
+    def create_widgets(self):
+        """Create and arrange all GUI widgets."""
+        try:
+            # Create main frame
+            main_frame = ttk.Frame(self.master, padding="50 50 50 50", style='TFrame')
+            main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+            self.master.columnconfigure(0, weight=1)
+            self.master.rowconfigure(0, weight=1)
+
+            # Configure main_frame to be expandable
+            main_frame.columnconfigure(1, weight=1)
+            main_frame.rowconfigure(7, weight=1)
+
+            # Directory selection
+            ttk.Label(main_frame, text="Directory:").grid(row=0, column=0, sticky="w", padx=5, pady=10)
+            entry_frame = ttk.Frame(main_frame, style='TFrame')
+            entry_frame.grid(row=0, column=1, padx=5, pady=10, sticky="we")
+            entry_frame.columnconfigure(0, weight=1)
+            self.dir_entry = tk.Entry(entry_frame, textvariable=self.directory, 
+                                    font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
+            self.dir_entry.grid(row=0, column=0, sticky="we", ipady=5, ipadx=5)
+            ttk.Button(main_frame, text="Browse", command=self.browse_directory).grid(row=0, column=2, padx=(10,0), pady=10)
+
+            # Season number
+            ttk.Label(main_frame, text="Season Number:").grid(row=1, column=0, sticky="w", padx=5, pady=10)
+            season_frame = ttk.Frame(main_frame, style='TFrame')
+            season_frame.grid(row=1, column=1, columnspan=2, sticky="w", padx=5, pady=10)
+            self.season_entry = tk.Entry(season_frame, textvariable=self.season_number, width=10, 
+                                       font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
+            self.season_entry.grid(row=0, column=0, sticky="w", ipady=5, ipadx=5)
+
+            # Show name (from the folder names if empty) and naming template
+            ttk.Label(season_frame, text="Show:").grid(row=0, column=1, sticky="w", padx=(15, 5))
+            self.show_entry = tk.Entry(season_frame, textvariable=self.show_name, width=16,
+                                       font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
+            self.show_entry.grid(row=0, column=2, sticky="w", ipady=5, ipadx=5)
+            ttk.Label(season_frame, text="Template:").grid(row=0, column=3, sticky="w", padx=(15, 5))
+            self.template_entry = tk.Entry(season_frame, textvariable=self.naming_template, width=34,
+                                           font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
+            self.template_entry.grid(row=0, column=4, sticky="w", ipady=5, ipadx=5)
+
+            # Episode range
+            ttk.Label(main_frame, text="Start Episode:").grid(row=2, column=0, sticky="w", padx=5, pady=10)
+            self.start_ep_entry = tk.Entry(main_frame, textvariable=self.start_episode, width=10, 
+                                         font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
+            self.start_ep_entry.grid(row=2, column=1, sticky="w", padx=5, pady=10, ipady=5, ipadx=5)
+
+            ttk.Label(main_frame, text="End Episode:").grid(row=3, column=0, sticky="w", padx=5, pady=10)
+            self.end_ep_entry = tk.Entry(main_frame, textvariable=self.end_episode, width=10, 
+                                       font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
+            self.end_ep_entry.grid(row=3, column=1, sticky="w", padx=5, pady=10, ipady=5, ipadx=5)
+
+            # File extensions
+            ttk.Label(main_frame, text="File Extensions:").grid(row=4, column=0, sticky="w", padx=5, pady=10)
+            ext_frame = ttk.Frame(main_frame, style='TFrame')
+            ext_frame.grid(row=4, column=1, columnspan=2, sticky="w", padx=5, pady=10)
+            self.ext_entry = tk.Entry(ext_frame, textvariable=self.file_extensions, width=30, 
+                                    font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
+            self.ext_entry.grid(row=0, column=0, sticky="w", ipady=5, ipadx=5)
+
+            # Renamed files are moved here when set, copied when it's on another disk
+            ttk.Label(ext_frame, text="Move to:").grid(row=0, column=1, sticky="w", padx=(15, 5))
+            tk.Entry(ext_frame, textvariable=self.destination, width=30,
+                     font=('Segoe UI', 11), bd=1, relief=tk.SOLID).grid(row=0, column=2, sticky="w",
+                                                                      ipady=5, ipadx=5)
+            ttk.Button(ext_frame, text="Browse",
+                       command=self.browse_destination).grid(row=0, column=3, padx=(10, 0))
+
+            # Filters: ';' separated globs or 're:' regexes, minimum size and header check
+            ttk.Label(main_frame, text="Filters:").grid(row=5, column=0, sticky="nw", padx=5, pady=10)
+            filter_frame = ttk.Frame(main_frame, style='TFrame')
+            filter_frame.grid(row=5, column=1, columnspan=2, sticky="w", padx=5, pady=10)
+            filter_entries = []
+            for column, (label, variable, width) in enumerate((
+                    ("Include", self.include_patterns, 16),
+                    ("Exclude", self.exclude_patterns, 16),
+                    ("Min MB", self.min_size_mb, 6))):
+                ttk.Label(filter_frame, text=label).grid(row=0, column=column * 2, sticky="w", padx=(0, 5))
+                entry = tk.Entry(filter_frame, textvariable=variable, width=width,
+                                 font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
+                entry.grid(row=0, column=column * 2 + 1, sticky="w", padx=(0, 10), ipady=5, ipadx=5)
+                filter_entries.append(entry)
+            self.include_entry, self.exclude_entry, self.min_size_entry = filter_entries
+            tk.Checkbutton(filter_frame, text="Check file headers", variable=self.sniff_headers,
+                           command=self.update_preview).grid(row=1, column=0, columnspan=3,
+                                                             sticky="w", pady=(5, 0))
+
+            # Library mode: the directory is a show root with season folders
+            tk.Checkbutton(filter_frame, text="Library mode (season from folder names)",
+                           variable=self.library_mode,
+                           command=self.update_preview).grid(row=1, column=3, columnspan=3,
+                                                             sticky="w", pady=(5, 0))
+
+            # Duplicates are hashed after the scan and left out of the numbering
+            tk.Checkbutton(filter_frame, text="Skip duplicates (compare file contents)",
+                           variable=self.skip_duplicates,
+                           command=self.update_preview).grid(row=2, column=0, columnspan=3,
+                                                             sticky="w", pady=(5, 0))
+
+            # Subtitles, .nfo files and thumbnails follow their video's new name
+            tk.Checkbutton(filter_frame, text="Rename subtitles and other sidecar files",
+                           variable=self.rename_sidecars,
+                           command=self.update_preview).grid(row=2, column=3, columnspan=3,
+                                                             sticky="w", pady=(5, 0))
+
+            # Buttons
+            button_frame = ttk.Frame(main_frame, style='TFrame')
+            button_frame.grid(row=6, column=0, columnspan=3, pady=20)
+            ttk.Button(button_frame, text="Preview", command=self.preview_rename).grid(row=0, column=0, padx=5)
+            ttk.Button(button_frame, text="Rename", command=self.rename_files).grid(row=0, column=1, padx=5)
+            ttk.Button(button_frame, text="Undo", command=self.undo_rename).grid(row=0, column=2, padx=5)
+            ttk.Button(button_frame, text="Reset", command=self.reset_fields).grid(row=0, column=3, padx=5)
+            ttk.Button(button_frame, text="Import Titles", command=self.import_titles).grid(row=0, column=4, padx=5)
+            ttk.Button(button_frame, text="Export Plan", command=self.export_plan).grid(row=0, column=5, padx=5)
+            ttk.Button(button_frame, text="Apply Plan", command=self.run_plan_file).grid(row=0, column=6, padx=5)
+
+            # Progress bar
+            self.progress_bar = ttk.Progressbar(main_frame, variable=self.progress_var,
+                                              maximum=100, mode='determinate')
+            self.progress_bar.grid(row=7, column=0, columnspan=2, sticky="ew", pady=10)
+            self.progress_bar.grid_remove()  # Hide initially
+            self.cancel_button = ttk.Button(main_frame, text="Cancel", command=self.cancel_task)
+            self.cancel_button.grid(row=7, column=2, padx=(10,0), pady=10)
+            self.cancel_button.grid_remove()
+
+            # Preview area
+            preview_frame = ttk.Frame(main_frame, style='TFrame')
+            preview_frame.grid(row=8, column=0, columnspan=3, sticky="nsew", pady=20)
+            preview_frame.columnconfigure(0, weight=1)
+            preview_frame.rowconfigure(2, weight=1)
+
+            ttk.Label(preview_frame, text="File Names Preview", font=('Segoe UI', 11, 'bold')).grid(row=0, column=0, pady=(0, 5))
+
+            self.select_all_var = tk.BooleanVar(value=True)
+            select_all_checkbox = tk.Checkbutton(preview_frame, text="Select All", 
+                                               variable=self.select_all_var, 
+                                               command=self.toggle_select_all)
+            select_all_checkbox.grid(row=1, column=0, sticky="w", padx=5)
+            ttk.Label(preview_frame, textvariable=self.scan_status).grid(row=1, column=0, sticky="e", padx=5)
+
+            # Virtualized preview list
+            self.preview_list = VirtualPreviewList(preview_frame, style='TFrame')
+            self.preview_list.grid(row=2, column=0, sticky="nsew")
+            self.preview_list.on_selection_changed = self.update_selection_status
+
+            # Bulk selection: none, invert, changed names, regex or row range
+            select_frame = ttk.Frame(preview_frame, style='TFrame')
+            select_frame.grid(row=3, column=0, sticky="we", pady=(5, 0))
+            ttk.Button(select_frame, text="None",
+                       command=lambda: self.change_selection(lambda model: model.set_all(False))
+                       ).grid(row=0, column=0, padx=(0, 5))
+            ttk.Button(select_frame, text="Invert",
+                       command=lambda: self.change_selection(SelectionModel.invert)
+                       ).grid(row=0, column=1, padx=5)
+            ttk.Button(select_frame, text="Changed",
+                       command=lambda: self.change_selection(
+                           lambda model: model.select_changed(self.preview_list.rows))
+                       ).grid(row=0, column=2, padx=5)
+            ttk.Label(select_frame, text="Match:").grid(row=0, column=3, sticky="w", padx=(15, 5))
+            pattern_entry = tk.Entry(select_frame, textvariable=self.select_pattern, width=16,
+                                     font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
+            pattern_entry.grid(row=0, column=4, sticky="w", ipady=3, ipadx=3)
+            pattern_entry.bind('<Return>', lambda event: self.select_matching())
+            ttk.Label(select_frame, text="Rows:").grid(row=0, column=5, sticky="w", padx=(15, 5))
+            rows_entry = tk.Entry(select_frame, textvariable=self.select_rows, width=10,
+                                  font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
+            rows_entry.grid(row=0, column=6, sticky="w", ipady=3, ipadx=3)
+            rows_entry.bind('<Return>', lambda event: self.select_row_range())
+            ttk.Label(select_frame, textvariable=self.selection_status).grid(row=0, column=7, sticky="e", padx=(15, 0))
+            select_frame.columnconfigure(7, weight=1)
+
+            # Bind input fields to preview update
+            for widget in (self.dir_entry, self.season_entry, self.start_ep_entry, 
+                         self.end_ep_entry, self.ext_entry, self.show_entry,
+                         self.template_entry, self.include_entry,
+                         self.exclude_entry, self.min_size_entry):
+                widget.bind('<KeyRelease>', self.update_preview)
+            self.directory.trace_add("write", self._on_directory_changed)
+
+        except Exception as e:
+            self.handle_error("Error creating widgets", e)
+
+    def browse_directory(self):
+        """Open directory selection dialog and update the directory path."""
+        try:
+            directory = filedialog.askdirectory()
+            if directory:
+                if not os.path.isdir(directory):
+                    raise NotADirectoryError(f"Selected path is not a directory: {directory}")
+                self.directory.set(directory)
+                self.update_preview()
+        except Exception as e:
+            self.handle_error("Error browsing directory", e)
+
+    def browse_destination(self):
+        """Pick the directory renamed files are moved into."""
+        try:
+            directory = filedialog.askdirectory(title="Move Renamed Files To")
+            if directory:
+                check_destination(self.directory.get(), directory)
+                self.destination.set(directory)
+        except ValueError as ve:
+            self.show_error("Invalid Destination", str(ve))
+        except Exception as e:
+            self.handle_error("Error browsing directory", e)
+
+    def preview_rename(self):
+        """Generate preview of renamed files, scanning the directory in the background if needed."""
+        try:
+            if self.task is not None:
+                return  # Refreshed once the running rename or undo finishes
+            self.sync_engine()
+            try:
+                key = (self.engine.directory, self.engine.filter_key(), self.library_mode.get(),
+                       self.engine.skip_duplicates)
+                self.engine.name_template()
+            except ValueError as ve:
+                # Shown inline, patterns and templates are often invalid halfway through typing
+                self.invalidate_files()
+                self.clear_preview()
+                self.scan_status.set(str(ve))
+                return
+            if key == self.scanned_key and self.scanner is not None:
+                return  # The running scan for these settings will refresh the preview
+            if key == self.scanned_key and self.scan_is_current():
+                self.show_plan()
+            else:
+                # Unchanged directories are served from the index cache without rescanning
+                self.start_scan()
+        except Exception as e:
+            self.handle_error("Error generating preview", e)
+
+    def show_plan(self, report_errors: bool = True):
+        """Update the plan for the current settings and redraw only the rows that changed.
+
+        Args:
+            report_errors (bool): Show dialogs for empty or invalid input
+        """
+        try:
+            if not self.plan.files:
+                self.clear_preview()
+                if report_errors:
+                    self.show_info("No Files", "No matching files found in the selected directory.")
+                return
+
+            # Number files in episode order, reusing whatever didn't change
+            self.sync_engine()
+            changed = self.plan.update(self.engine)
+
+            if self.preview_list.rows is not self.plan:
+                self.preview_list.set_rows(self.plan, selected=self.select_all_var.get())
+            else:
+                self.preview_list.refresh(changed)
+
+        except EpisodeRangeError as range_error:
+            self.clear_preview()
+            if report_errors:
+                self.show_error("Invalid Episode Range", str(range_error))
+        except ValueError as ve:
+            self.clear_preview()
+            if report_errors:
+                self.show_error("Invalid Input", str(ve))
+        except Exception as e:
+            self.handle_error("Error generating preview", e)
+
+    def scan_is_current(self) -> bool:
+        """Check whether the scanned files still match what is on disk.
+
+        Independent of the index cache, which size and header filters bypass,
+        so changing the numbering never rescans an unchanged directory.
+        """
+        if isinstance(self.plan, LibraryPlan):
+            return not self.plan.changed_on_disk()
+        if self.watcher is not None:
+            return True  # Every change is applied to the plan as it happens
+        return (self.scan_signature is not None
+                and directory_signature(self.engine.directory) == self.scan_signature)
+
+    def start_scan(self):
+        """Cancel any running scan and start scanning the current directory or show tree."""
+        self.invalidate_files()
+        self.scan_signature = directory_signature(self.engine.directory)
+        self.scanned_key = (self.engine.directory, self.engine.filter_key(),
+                            self.library_mode.get(), self.engine.skip_duplicates)
+        self.clear_preview()
+        if self.library_mode.get():
+            self.plan = LibraryPlan(self.engine.directory)
+            self.scanner = LibraryScanner(self.engine)
+        else:
+            self.plan = RenamePlan()
+            self.scanner = DirectoryScanner(self.engine)
+            # Watching from before the listing, files landing during the scan are caught
+            self.start_watcher(self.engine.directory)
+        self.scanner.start()
+        self.scan_status.set("Scanning... 0 files found")
+        self.master.after(SCAN_POLL_MS, self._poll_scan, self.scanner)
+
+    def invalidate_files(self):
+        """Cancel any running scan and forget the scanned files so the next preview rescans."""
+        self.stop_watcher()
+        if self.scanner is not None:
+            self.scanner.cancel()
+            self.scanner = None
+        self.duplicate_check = None
+        self.rehash_names = set()
+        self.scanned_key = None
+        self.scan_signature = None
+        self.scan_status.set("")
+
+    def _poll_scan(self, scanner: Union[DirectoryScanner, LibraryScanner]):
+        """Drain scan results from the worker queue into the preview."""
+        if scanner is not self.scanner:
+            return  # Cancelled or superseded by a newer scan
+
+        changed = False
+        finished = False
+        try:
+            while True:
+                kind, payload = scanner.queue.get_nowait()
+                if kind == "batch":
+                    self.plan.add_files(*payload)
+                    changed = True
+                elif kind == "library":
+                    self.plan = payload
+                    changed = True
+                elif kind == "duplicates":
+                    self.plan.set_duplicates(payload)
+                    changed = True
+                elif kind == "sidecars":
+                    self.plan.set_sidecars(payload)
+                    changed = True
+                elif kind == "error":
+                    self.invalidate_files()
+                    self.show_error("Scan Error", f"Error scanning directory: {payload}")
+                    return
+                else:
+                    finished = True
+        except queue.Empty:
+            pass
+
+        if finished:
+            self.scanner = None
+            self.show_plan()
+            self.show_file_count()
+            return
+
+        self.scan_status.set(f"Scanning... {len(self.plan.files)} files found")
+        if changed:
+            self.show_plan(report_errors=False)
+        self.master.after(SCAN_POLL_MS, self._poll_scan, scanner)
+
+    def show_file_count(self):
+        """Show how many files the scan found and how many of them are skipped duplicates."""
+        count = len(self.plan.files)
+        duplicates = sum(map(self.plan.is_duplicate, range(len(self.plan))))
+        self.scan_status.set(f"{count} files found, {duplicates} duplicates skipped"
+                             if duplicates else f"{count} files found")
+
+    def start_watcher(self, directory: str):
+        """Watch the scanned directory so files that land later show up without a rescan."""
+        self.stop_watcher()
+        self.watch_changes = set()
+        self.watch_rescan = False
+        try:
+            self.watcher = DirectoryWatcher(directory)
+            self.watcher.start()
+        except OSError as e:
+            logging.error(f"Error watching {directory}: {str(e)}")
+            self.watcher = None
+            return
+        self.master.after(WATCH_POLL_MS, self._poll_watcher, self.watcher)
+
+    def stop_watcher(self):
+        """Stop watching the previously scanned directory."""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def _poll_watcher(self, watcher: DirectoryWatcher):
+        """Apply only the entries the watcher reported as changed to the plan and the preview."""
+        if watcher is not self.watcher:
+            return  # Stopped or replaced by a newer watcher
+        try:
+            while True:
+                kind, payload = watcher.queue.get_nowait()
+                if kind == "rescan":
+                    self.watch_rescan = True
+                else:
+                    self.watch_changes.update(payload)
+        except queue.Empty:
+            pass
+        self.master.after(WATCH_POLL_MS, self._poll_watcher, watcher)
+        if self.task is not None or self.scanner is not None:
+            return  # Kept until the scan has filled the plan; a rename rescans once it finishes
+        names, rescan = self.watch_changes, self.watch_rescan
+        if not (names or rescan):
+            return
+        self.watch_changes = set()
+        self.watch_rescan = False
+        try:
+            if rescan:
+                self.start_scan()
+                return
+            if self.engine.apply_changes(self.plan, names):
+                self.show_file_count()
+                self.show_plan(report_errors=False)
+            if self.engine.skip_duplicates:
+                self.rehash_names.update(names)
+                self.start_duplicate_check()
+        except Exception as e:
+            self.handle_error("Error applying directory changes", e)
+
+    def start_duplicate_check(self):
+        """Hash the files sharing a size with the changed ones in the background, one check at a time."""
+        if self.duplicate_check is not None or not self.rehash_names:
+            return
+        names, self.rehash_names = self.rehash_names, set()
+        plan, engine = self.plan, self.engine.clone()
+        files, duplicates = list(plan.files), dict(plan.duplicates)
+        results: "queue.Queue[Dict[str, str]]" = queue.Queue()
+
+        def run():
+            try:
+                results.put(engine.update_duplicates(files, duplicates, names))
+            except Exception as e:
+                logging.error(f"Error finding duplicates in {engine.directory}: {str(e)}")
+                results.put(duplicates)
+
+        self.duplicate_check = threading.Thread(target=run, daemon=True)
+        self.duplicate_check.start()
+        self.master.after(WATCH_POLL_MS, self._poll_duplicate_check, self.duplicate_check, plan,
+                          results)
+
+    def _poll_duplicate_check(self, check: threading.Thread, plan: RenamePlan,
+                              results: "queue.Queue[Dict[str, str]]"):
+        """Mark the duplicates a background check found, keeping the preview and selection."""
+        if check is not self.duplicate_check:
+            return  # A rescan hashes every file again
+        try:
+            duplicates = results.get_nowait()
+        except queue.Empty:
+            self.master.after(WATCH_POLL_MS, self._poll_duplicate_check, check, plan, results)
+            return
+        self.duplicate_check = None
+        if plan is self.plan:
+            plan.set_duplicates(duplicates)
+            self.show_file_count()
+            self.show_plan(report_errors=False)
+        # Changes reported while this check ran
+        self.start_duplicate_check()
+
+    def _on_directory_changed(self, *args):
+        """Cancel a scan of the previous directory as soon as the field changes."""
+        if self.scanner is not None and self.scanner.directory != self.directory.get():
+            self.invalidate_files()
+
+    def rename_files(self):
+        """Rename the selected files according to the preview on a worker thread."""
+        try:
+            if self.task is not None:
+                self.show_info("Rename In Progress", "Please wait for the current operation to finish.")
+                return
+
+            if not self.directory.get() or not os.path.isdir(self.directory.get()):
+                self.show_error("Invalid Directory", "Please select a valid directory.")
+                return
+
+            if self.scanner is not None:
+                self.show_info("Scan In Progress", "Please wait for the directory scan to finish.")
+                return
+
+            files_to_rename = self.selected_pairs()
+            rows = self.preview_list.rows
+            library = isinstance(rows, LibraryPlan)
+            if not files_to_rename:
+                self.show_info("No Files Selected", "Please select files to rename.")
+                return
+
+            # Perform renaming, continuing with remaining files on errors. A
+            # library is renamed one season folder per worker and undone as one batch.
+            directory = rows.root if library else self.engine.directory
+            check_destination(directory, self.engine.destination)
+            max_workers = DEFAULT_LIBRARY_WORKERS if library else 1
+            self.run_task("Rename", lambda cancel_event: self.engine.apply_plan(
+                files_to_rename, on_progress=self._update_progress, directory=directory,
+                max_workers=max_workers, cancel_event=cancel_event,
+                on_transfer=self._update_transfer))
+
+        except ValueError as ve:
+            self.show_error("Invalid Input", str(ve))
+        except Exception as e:
+            self.handle_error("Error renaming files", e)
+
+    def selected_pairs(self) -> List[Tuple[str, str]]:
+        """Collect the selected renames for the current fields, with sidecars and without duplicates.
+
+        Returns:
+            List[Tuple[str, str]]: (old_name, new_name) pairs, relative to the show root in library mode
+        """
+        # Bring the names in line with the current fields before collecting them
+        self.sync_engine()
+        changed = self.plan.update(self.engine)
+        if self.preview_list.rows is self.plan:
+            self.preview_list.refresh(changed)
+        rows = self.preview_list.rows
+        pairs = []
+        for i in self.preview_list.selection.indices():
+            if not rows.is_duplicate(i):
+                # Sidecars are renamed in the same batch, so one undo restores both
+                pairs.append(rows[i])
+                pairs.extend(rows.companions(i))
+        return pairs
+
+    def export_plan(self):
+        """Write the selected renames to a plan file that can be reviewed and applied later."""
+        try:
+            if self.scanner is not None:
+                self.show_info("Scan In Progress", "Please wait for the directory scan to finish.")
+                return
+            pairs = self.selected_pairs()
+            if not pairs:
+                self.show_info("No Files Selected", "Please select files to export.")
+                return
+            path = filedialog.asksaveasfilename(title="Export Rename Plan", defaultextension=".jsonl",
+                                                filetypes=PLAN_FILE_TYPES)
+            if not path:
+                return
+            rows = self.preview_list.rows
+            directory = rows.root if isinstance(rows, LibraryPlan) else self.engine.directory
+            with PlanWriter(path) as writer:
+                skipped = writer.add(directory, pairs, self.engine.destination)
+            message = f"Wrote {writer.operations} renames to {path}."
+            if skipped:
+                for name, reason in skipped:
+                    logging.error(f"Left out of the plan, {name}: {reason}")
+                message += f"\n\n{len(skipped)} files were left out, see the log file."
+            self.show_info("Plan Exported", message)
+        except ValueError as ve:
+            self.show_error("Invalid Input", str(ve))
+        except Exception as e:
+            self.handle_error("Error exporting plan", e)
+
+    def run_plan_file(self):
+        """Apply a plan file on a worker thread, one chunk of renames at a time."""
+        try:
+            if self.task is not None:
+                self.show_info("Rename In Progress", "Please wait for the current operation to finish.")
+                return
+            path = filedialog.askopenfilename(title="Apply Rename Plan", filetypes=PLAN_FILE_TYPES)
+            if not path:
+                return
+            # Reads the whole file once, so a damaged plan is refused before anything is renamed
+            info = PlanInfo(path)
+            message = f"Rename {info.operations} files in {info.directories} directories"
+            if info.moves:
+                message += " and move them to their destination"
+            if not messagebox.askyesno("Apply Rename Plan", message + "?"):
+                return
+            self.run_task("Rename", lambda cancel_event: apply_plan_file(
+                self.engine, path, on_progress=self._update_progress, cancel_event=cancel_event,
+                on_transfer=self._update_transfer))
+        except PlanFileError as pe:
+            self.show_error("Invalid Plan", str(pe))
+        except Exception as e:
+            self.handle_error("Error applying plan", e)
+
+    def undo_rename(self):
+        """Undo the last rename operation on a worker thread."""
+        try:
+            if self.task is not None:
+                self.show_info("Rename In Progress", "Please wait for the current operation to finish.")
+                return
+
+            if not self.engine.undo_stack:
+                self.show_info("Nothing to Undo", "No rename operations to undo.")
+                return
+
+            # Perform undo, continuing with remaining files on errors
+            self.run_task("Undo", lambda cancel_event: self.engine.undo_last(
+                on_progress=self._update_progress, cancel_event=cancel_event))
+
+        except Exception as e:
+            self.handle_error("Error undoing rename", e)
+
+    def run_task(self, title: str, work: Callable[[threading.Event], RenameResult]):
+        """Run a rename or undo on a worker thread while the window keeps responding.
+
+        Args:
+            title (str): "Rename" or "Undo", used in the summary
+            work (Callable[[threading.Event], RenameResult]): Runs the batch, stopping when the event is set
+        """
+        cancel_event = threading.Event()
+        self.task_progress = (0, 0)
+        self.task_transfer = None
+        self.task_outcome = None
+
+        def run():
+            try:
+                outcome = (work(cancel_event), None)
+            except Exception as e:
+                outcome = (None, e)
+            self.task_outcome = outcome
+
+        self.task = threading.Thread(target=run, daemon=True)
+        self.task_cancel = cancel_event
+        self.progress_var.set(0)
+        self.progress_bar.grid()
+        self.cancel_button.state(["!disabled"])
+        self.cancel_button.grid()
+        self.task.start()
+        self.master.after(PROGRESS_FRAME_MS, self._poll_task, title)
+
+    def cancel_task(self):
+        """Stop the running rename or undo after the current file."""
+        if self.task_cancel is not None:
+            self.task_cancel.set()
+            self.cancel_button.state(["disabled"])
+
+    def _poll_task(self, title: str):
+        """Redraw progress at a fixed frame rate and report once the worker finishes."""
+        done, total = self.task_progress
+        if self.task_transfer is not None:
+            moved, total_bytes, rate = self.task_transfer
+            if total_bytes:
+                self.progress_var.set((moved / total_bytes) * 100)
+            self.scan_status.set(f"Moving {format_bytes(moved)} of {format_bytes(total_bytes)} "
+                                 f"at {format_bytes(rate)}/s")
+        elif total:
+            self.progress_var.set((done / total) * 100)
+        if self.task.is_alive():
+            self.master.after(PROGRESS_FRAME_MS, self._poll_task, title)
+            return
+
+        self.task = None
+        self.task_cancel = None
+        self.progress_bar.grid_remove()
+        self.cancel_button.grid_remove()
+        self.progress_var.set(0)
+
+        result, error = self.task_outcome
+        if error is not None:
+            self.handle_error(f"Error during {title.lower()}", error)
+        else:
+            self.show_task_summary(title, result)
+
+        # Rescan, the watcher's changes were set aside while the batch ran
+        self.invalidate_files()
+        self.clear_preview()
+        self.preview_rename()
+
+    def show_task_summary(self, title: str, result: RenameResult):
+        """Report the outcome of a rename or undo in a single dialog.
+
+        Args:
+            title (str): "Rename" or "Undo"
+            result (RenameResult): Outcome of the batch
+        """
+        verb = "renamed" if title == "Rename" else "restored"
+        message = f"Successfully {verb} {result.count} out of {result.total} files."
+        if result.transfer is not None and result.transfer.bytes_done:
+            message += (f"\nMoved {format_bytes(result.transfer.bytes_done)} at "
+                        f"{format_bytes(result.transfer.bytes_per_sec)}/s.")
+        if isinstance(result, PlanResult) and result.already_done:
+            message += f"\n{result.already_done} files already had their new names."
+        if result.cancelled:
+            skipped = result.total - result.count - len(result.errors)
+            message += f"\n\nCancelled, {skipped} files were not touched."
+        if not result.errors:
+            self.show_info(f"{title} Complete", message)
+            return
+
+        for name, error in result.errors:
+            logging.error(f"{title} error, {name}: {error}")
+        lines = [f"{name}: {error}" for name, error in result.errors[:ERROR_SUMMARY_LIMIT]]
+        if len(result.errors) > ERROR_SUMMARY_LIMIT:
+            lines.append(f"... and {len(result.errors) - ERROR_SUMMARY_LIMIT} more, see the log file")
+        messagebox.showwarning(f"{title} Finished With Errors",
+                               f"{message}\n\n{len(result.errors)} errors:\n" + "\n".join(lines))
+
+    def reset_fields(self):
+        """Reset all input fields to their default values."""
+        try:
+            self.directory.set("")
+            self.season_number.set(DEFAULT_SEASON)
+            self.start_episode.set(DEFAULT_START_EPISODE)
+            self.end_episode.set("")
+            self.file_extensions.set(DEFAULT_EXTENSIONS)
+            self.show_name.set("")
+            self.naming_template.set(DEFAULT_TEMPLATE)
+            self.include_patterns.set("")
+            self.exclude_patterns.set("")
+            self.min_size_mb.set("")
+            self.sniff_headers.set(False)
+            self.skip_duplicates.set(False)
+            self.rename_sidecars.set(False)
+            self.destination.set("")
+            self.clear_preview()
+            self.invalidate_files()
+        except Exception as e:
+            self.handle_error("Error resetting fields", e)
+
+    def import_titles(self):
+        """Import episode titles for {title} from a CSV, JSON or SQLite file."""
+        try:
+            path = filedialog.askopenfilename(
+                title="Import Episode Titles",
+                filetypes=[("Episode titles", "*.csv *.json *.sqlite *.sqlite3 *.db"),
+                           ("All files", "*.*")])
+            if not path:
+                return
+            self.sync_engine()
+            count = self.title_db.import_file(path, show=self.engine.show() or None)
+            self.show_info("Titles Imported", f"Imported {count} episode titles.")
+            # The database version changed, so the next update regenerates the names
+            if self.scanner is None and self.plan.files:
+                self.show_plan(report_errors=False)
+        except Exception as e:
+            self.handle_error("Error importing titles", e)
+
+    def recover_journal(self):
+        """Finish or roll back renames interrupted by a crash in a previous session."""
+        try:
+            if not self.engine.pending_recovery():
+                return
+            roll_forward = messagebox.askyesno(
+                "Recover Interrupted Rename",
+                "A previous rename was interrupted before it finished.\n\n"
+                "Yes: complete the interrupted rename\n"
+                "No: roll it back to the original names")
+            results = self.engine.recover(roll_forward)
+            errors = sum(len(result.errors) for result in results)
+            action = "Completed" if roll_forward else "Rolled back"
+            self.show_info("Recovery Complete",
+                           f"{action} {len(results)} interrupted batch(es) with {errors} error(s).")
+        except Exception as e:
+            self.handle_error("Error recovering interrupted rename", e)
+
+    def on_close(self):
+        """Persist the directory index cache, close the journal and close the window."""
+        if self.task is not None:
+            # Let the running batch stop cleanly so the journal is committed
+            self.task_cancel.set()
+            self.task.join()
+        self.invalidate_files()
+        self.store_settings()
+        self.index_cache.save()
+        self.engine.journal.close()
+        self.title_db.close()
+        self.master.destroy()
+
+    def restore_settings(self):
+        """Fill the fields, and engine settings that have no field, from the saved settings."""
+        self.saved_settings = load_settings()
+        for name, value in self.saved_settings.items():
+            variable = getattr(self, name, None)
+            if isinstance(variable, tk.Variable):
+                variable.set(value)
+                variable.trace_add("write", self.save_settings_later)
+            else:
+                setattr(self.engine, name, value)
+
+    def store_settings(self):
+        """Save the settings if they changed since they were loaded or last saved."""
+        settings = {}
+        for name in DEFAULT_SETTINGS:
+            variable = getattr(self, name, None)
+            settings[name] = (variable.get() if isinstance(variable, tk.Variable)
+                              else getattr(self.engine, name))
+        if settings != self.saved_settings:
+            save_settings(settings)
+            self.saved_settings = settings
+
+    @debounce(SETTINGS_SAVE_DELAY)
+    def save_settings_later(self, *args):
+        """Save the settings once the fields stop changing."""
+        self.store_settings()
+
+    def sync_engine(self):
+        """Copy the current field values into the rename engine."""
+        self.engine.directory = self.directory.get()
+        self.engine.season_number = self.season_number.get()
+        self.engine.start_episode = self.start_episode.get()
+        self.engine.end_episode = self.end_episode.get()
+        self.engine.file_extensions = self.file_extensions.get()
+        self.engine.show_name = self.show_name.get()
+        self.engine.naming_template = self.naming_template.get()
+        self.engine.include_patterns = self.include_patterns.get()
+        self.engine.exclude_patterns = self.exclude_patterns.get()
+        self.engine.min_size_mb = self.min_size_mb.get()
+        self.engine.sniff_headers = self.sniff_headers.get()
+        self.engine.skip_duplicates = self.skip_duplicates.get()
+        self.engine.rename_sidecars = self.rename_sidecars.get()
+        self.engine.destination = self.destination.get().strip()
+
+    def _update_progress(self, done: int, total: int):
+        """Record engine progress from the worker thread, _poll_task draws it."""
+        self.task_progress = (done, total)
+
+    def _update_transfer(self, done: int, total: int, rate: float):
+        """Record bytes moved to the destination from the worker thread, _poll_task draws it."""
+        self.task_transfer = (done, total, rate)
+
+    def clear_preview(self):
+        """Clear the preview area."""
+        self.preview_list.clear()
+
+    def toggle_select_all(self):
+        """Toggle selection state of all files."""
+        try:
+            self.preview_list.set_all(self.select_all_var.get())
+        except Exception as e:
+            self.handle_error("Error toggling selection", e)
+
+    def change_selection(self, operation: Callable[[SelectionModel], None]):
+        """Apply a bulk operation to the selection and redraw the visible rows.
+
+        Args:
+            operation (Callable[[SelectionModel], None]): Changes the preview's selection
+        """
+        try:
+            operation(self.preview_list.selection)
+            self.preview_list.selection_changed()
+        except ValueError as ve:
+            self.show_error("Invalid Selection", str(ve))
+        except Exception as e:
+            self.handle_error("Error changing selection", e)
+
+    def select_matching(self):
+        """Select exactly the rows whose current name matches the Match regex."""
+        pattern = self.select_pattern.get()
+        self.change_selection(lambda model: model.select_matching(self.preview_list.rows, pattern))
+
+    def select_row_range(self):
+        """Select only the 1-based row range typed in the Rows field, e.g. '10-20'."""
+        def select(model: SelectionModel):
+            start, stop = parse_row_range(self.select_rows.get(), len(model))
+            model.set_all(False)
+            model.select_range(start, stop)
+        self.change_selection(select)
+
+    def update_selection_status(self):
+        """Show how many rows are selected."""
+        total = len(self.preview_list.rows)
+        self.selection_status.set(
+            f"{self.preview_list.selection.count()} of {total} selected" if total else "")
+
+    @debounce(0.2)
+    def update_preview(self, event=None):
+        """Update the preview when input fields change."""
+        # The scan is keyed on directory and extensions, so changing either rescans
+        self.preview_rename()
+
+    def generate_new_filename(self, old_name: str, episode_number: int) -> str:
+        """Generate new filename based on season and episode numbers."""
+        self.engine.season_number = self.season_number.get()
+        return self.engine.generate_new_filename(old_name, episode_number)
+
+    def show_error(self, title: str, message: str):
+        """Show error message dialog."""
+        messagebox.showerror(title, message)
+        logging.error(f"{title}: {message}")
+
+    def show_info(self, title: str, message: str):
+        """Show information message dialog."""
+        messagebox.showinfo(title, message)
+
+    def handle_error(self, context: str, error: Exception):
+        """Handle and log errors."""
+        message = f"{context}: {str(error)}"
+        logging.error(message)
+        self.show_error("Error", message)
+
+def main():
+    """Create the main window and run the Tk event loop."""
+    try:
+        instrumentation.configure()
+        root = tk.Tk()
+        TVShowRenamer(root)
+        root.mainloop()
+    except Exception as e:
+        logging.error(f"Application error: {str(e)}")
+        messagebox.showerror("Fatal Error", f"Application failed to start: {str(e)}")
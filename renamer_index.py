@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from renamer_ordering import SortKey, key_from_json
+from renamer_profiling import instrumentation
+
+INDEX_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "renamer_index_cache.json")
+INDEX_CACHE_VERSION = 3
+DEFAULT_MAX_ENTRIES = 32
+
+# Directory mtimes closer than this to the scan time may hide changes made
+# within the same timestamp tick, so such entries are never trusted.
+RACY_WINDOW_SECONDS = 2.0
+
+Signature = Tuple[int, int]
+
+
+def directory_signature(directory: str) -> Optional[Signature]:
+    """Get the (mtime_ns, inode) pair used to validate a cached directory listing.
+
+    Args:
+        directory (str): Directory to stat
+
+    Returns:
+        Optional[Signature]: The signature, or None if the directory can't be read
+    """
+    instrumentation.count("stats_issued")
+    try:
+        st = os.stat(directory)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_ino)
+
+
+class DirectoryIndex:
+    """A cached listing of the matching files in one directory, with their sort keys."""
+
+    def __init__(self, directory: str, filter_key: str, signature: Signature,
+                 files: List[str], keys: List[SortKey], scanned_at: float,
+                 sidecars: Optional[List[str]] = None):
+        """Initialize the index entry.
+
+        Args:
+            directory (str): Directory that was scanned
+            filter_key (str): Normalized filter settings the files were matched with
+            signature (Signature): Directory (mtime_ns, inode) taken before the scan
+            files (List[str]): Matching file names
+            keys (List[SortKey]): Episode sort key of each file
+            scanned_at (float): Wall-clock time of the scan
+            sidecars (Optional[List[str]]): Possible sidecar files found by the same scan
+        """
+        self.directory = directory
+        self.filter_key = filter_key
+        self.signature = signature
+        self.files = files
+        self.keys = keys
+        self.scanned_at = scanned_at
+        self.sidecars = sidecars or []
+
+    @property
+    def racy(self) -> bool:
+        """True if the directory changed too close to the scan to trust its mtime."""
+        return self.scanned_at - self.signature[0] / 1e9 < RACY_WINDOW_SECONDS
+
+    def to_dict(self) -> Dict:
+        return {"directory": self.directory, "filter_key": self.filter_key,
+                "signature": list(self.signature), "files": self.files,
+                "keys": self.keys, "scanned_at": self.scanned_at, "sidecars": self.sidecars}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DirectoryIndex":
+        return cls(data["directory"], data["filter_key"], tuple(data["signature"]),
+                   data["files"], [key_from_json(key) for key in data["keys"]],
+                   data["scanned_at"], data.get("sidecars"))
+
+
+class DirectoryIndexCache:
+    """LRU cache of directory listings validated against the directory mtime and inode.
+
+    Entries are keyed by directory path plus filter settings. The cache is
+    safe to use from scanner threads and can optionally be persisted to disk.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, path: Optional[str] = None):
+        """Initialize the cache.
+
+        Args:
+            max_entries (int): Number of directories kept before evicting the least recently used
+            path (Optional[str]): JSON file to load from and save to, None to keep it in memory
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.entries: "OrderedDict[Tuple[str, str], DirectoryIndex]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.dirty = False
+
+    def get(self, directory: str, filter_key: str) -> Optional[DirectoryIndex]:
+        """Get the cached listing for a directory if the directory hasn't changed.
+
+        Args:
+            directory (str): Directory to look up
+            filter_key (str): Normalized filter settings
+
+        Returns:
+            Optional[DirectoryIndex]: The cached listing, None on a miss or a stale entry
+        """
+        key = (os.path.abspath(directory), filter_key)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry.racy or directory_signature(directory) != entry.signature:
+                del self.entries[key]
+                self.dirty = True
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, directory: str, filter_key: str, signature: Optional[Signature],
+            files: List[str], keys: List[SortKey], sidecars: Optional[List[str]] = None):
+        """Store the files found by a scan.
+
+        Args:
+            directory (str): Directory that was scanned
+            filter_key (str): Normalized filter settings
+            signature (Optional[Signature]): Directory signature taken before the scan started
+            files (List[str]): Matching file names
+            keys (List[SortKey]): Episode sort key of each file
+            sidecars (Optional[List[str]]): Possible sidecar files found by the same scan
+        """
+        if signature is None:
+            return
+        key = (os.path.abspath(directory), filter_key)
+        with self.lock:
+            self.entries[key] = DirectoryIndex(key[0], filter_key, signature, files, keys,
+                                               time.time(), sidecars)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.dirty = True
+
+    def invalidate(self, directory: Optional[str] = None):
+        """Drop the entries for one directory, or every entry.
+
+        Args:
+            directory (Optional[str]): Directory to drop, None to clear the cache
+        """
+        with self.lock:
+            if directory is None:
+                self.entries.clear()
+            else:
+                path = os.path.abspath(directory)
+                for key in [key for key in self.entries if key[0] == path]:
+                    del self.entries[key]
+            self.dirty = True
+
+    def load(self):
+        """Load persisted entries, ignoring a missing or unreadable cache file."""
+        if not self.path or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_CACHE_VERSION:
+                return
+            with self.lock:
+                for item in data.get("entries", [])[-self.max_entries:]:
+                    entry = DirectoryIndex.from_dict(item)
+                    self.entries[(entry.directory, entry.filter_key)] = entry
+                self.dirty = False
+        except Exception as e:
+            logging.error(f"Error loading index cache {self.path}: {str(e)}")
+
+    def save(self):
+        """Write the entries to disk atomically, least recently used first."""
+        if not self.path or not self.dirty:
+            return
+        try:
+            with self.lock:
+                data = {"version": INDEX_CACHE_VERSION,
+                        "entries": [entry.to_dict() for entry in self.entries.values()]}
+                self.dirty = False
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.error(f"Error saving index cache {self.path}: {str(e)}")
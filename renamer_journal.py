@@ -0,0 +1,477 @@
+import os
+import json
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows, where only one process uses these files at a time
+    fcntl = None
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JOURNAL_FILE = os.path.join(_BASE_DIR, "renamer_journal.jsonl")
+UNDO_HISTORY_FILE = os.path.join(_BASE_DIR, "renamer_undo.jsonl")
+
+# Number of "done" records written between fsyncs. Every record reaches the
+# OS right away, so only a power loss can drop the unsynced tail, and
+# recovery checks the filesystem for operations that aren't marked done.
+FSYNC_EVERY = 64
+DEFAULT_UNDO_LIMIT = 50
+# Names files are parked on while a cycle of renames is broken up
+TEMP_PREFIX = ".tvrenamer-tmp-"
+
+
+def is_temp_name(name: str) -> bool:
+    """Check if a possibly relative name is a temporary name used to break a rename cycle."""
+    return os.path.basename(name).startswith(TEMP_PREFIX)
+
+
+@contextmanager
+def locked_file(path: str) -> Iterator[None]:
+    """Hold an exclusive lock on a file shared by several processes.
+
+    The lock is taken on a separate '.lock' file, so it survives the file
+    itself being replaced. Without fcntl this only locks within the process
+    through the callers' own threading locks.
+
+    Args:
+        path (str): File to lock
+    """
+    try:
+        f = open(f"{path}.lock", "a") if fcntl is not None else None
+    except OSError:
+        f = None  # A read-only location, where nothing is written either
+    if f is None:
+        yield
+        return
+    with f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        yield
+
+
+class RenameBatch:
+    """A group of renames applied together, kept for undo."""
+
+    def __init__(self, directory: str, pairs: List[Tuple[str, str]], destination: str = "",
+                 moved: Optional[List[str]] = None):
+        """Initialize the batch.
+
+        Args:
+            directory (str): Directory the files were renamed in
+            pairs (List[Tuple[str, str]]): (old_name, new_name) for every renamed file
+            destination (str): Directory renamed files were then moved to, empty if none
+            moved (Optional[List[str]]): New names now found below the destination instead
+        """
+        self.directory = directory
+        self.pairs = pairs
+        self.destination = destination
+        self.moved = moved or []
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def to_dict(self) -> Dict:
+        data = {"directory": self.directory, "pairs": [list(pair) for pair in self.pairs]}
+        if self.moved:
+            data["destination"] = self.destination
+            data["moved"] = self.moved
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RenameBatch":
+        return cls(data["directory"], [tuple(pair) for pair in data["pairs"]],
+                   data.get("destination", ""), data.get("moved"))
+
+
+class RecoveryResult:
+    """What recovery did with one interrupted batch."""
+
+    def __init__(self, batch_id: str, kind: str, directory: str, rolled_forward: bool):
+        """Initialize the result.
+
+        Args:
+            batch_id (str): Journal id of the batch
+            kind (str): "rename" or "undo"
+            directory (str): Directory the batch ran in
+            rolled_forward (bool): True if the batch was completed, False if it was reverted
+        """
+        self.batch_id = batch_id
+        self.kind = kind
+        self.directory = directory
+        self.rolled_forward = rolled_forward
+        # (source, target) operations now fully applied when rolled forward,
+        # or fully reverted when rolled back
+        self.settled: List[Tuple[str, str]] = []
+        self.errors: List[Tuple[str, str]] = []
+
+
+class RenameJournal:
+    """Append-only write-ahead journal of rename batches.
+
+    Every batch is written with all of its planned operations and synced
+    before the first file is touched. Progress records are synced in groups,
+    and the journal is truncated once no batch is open, so it stays small.
+    While a batch is open the process holds an fcntl lock on the file, so
+    recovery in another process leaves a live batch alone.
+    """
+
+    def __init__(self, path: str = JOURNAL_FILE, fsync_every: int = FSYNC_EVERY):
+        """Initialize the journal.
+
+        Args:
+            path (str): Journal file
+            fsync_every (int): Number of progress records written between fsyncs
+        """
+        self.path = path
+        self.fsync_every = fsync_every
+        self.lock = threading.Lock()
+        self.open_batches: Set[str] = set()
+        self.unsynced = 0
+        self.file = None
+
+    def _open(self):
+        while True:
+            f = open(self.path, "a", encoding="utf-8")
+            if fcntl is None:
+                return f
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            if os.fstat(f.fileno()).st_nlink:
+                return f
+            f.close()  # Recovered and removed by another process while waiting for the lock
+
+    @contextmanager
+    def _claim(self) -> Iterator[bool]:
+        """Lock the journal for recovery, yielding False if another live process holds it."""
+        if self.file is not None or fcntl is None or not os.path.isfile(self.path):
+            yield True  # This process's own journal, or nothing to recover
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            yield True
+
+    def _write(self, record: Dict, sync: bool):
+        if self.file is None:
+            self.file = self._open()
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        # Survives the process being killed; only the fsync is batched
+        self.file.flush()
+        self.unsynced += 1
+        if sync or self.unsynced >= self.fsync_every:
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+
+    def begin(self, directory: str, ops: List[Tuple[str, str]], kind: str = "rename") -> str:
+        """Record a batch of planned renames before any of them runs.
+
+        Args:
+            directory (str): Directory the names are relative to
+            ops (List[Tuple[str, str]]): (source, target) names in execution order
+            kind (str): "rename" for a rename batch, "undo" for an undo batch
+
+        Returns:
+            str: Id of the batch for the following done() and commit() calls
+        """
+        batch_id = uuid.uuid4().hex
+        with self.lock:
+            self._write({"type": "begin", "batch": batch_id, "kind": kind,
+                         "directory": directory, "ops": [list(op) for op in ops]}, sync=True)
+            self.open_batches.add(batch_id)
+        return batch_id
+
+    def done(self, batch_id: str, index: int, sync: bool = False):
+        """Record that one operation of a batch has been applied.
+
+        Args:
+            batch_id (str): Id returned by begin()
+            index (int): Position of the operation in the batch
+            sync (bool): Sync right away instead of with the next group
+        """
+        with self.lock:
+            self._write({"type": "done", "batch": batch_id, "index": index}, sync=sync)
+
+    def commit(self, batch_id: str):
+        """Record that a batch finished, truncating the journal if nothing else is open.
+
+        Args:
+            batch_id (str): Id returned by begin()
+        """
+        with self.lock:
+            self._write({"type": "commit", "batch": batch_id}, sync=True)
+            self.open_batches.discard(batch_id)
+            if not self.open_batches:
+                self._truncate()
+
+    def _truncate(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        with open(self.path, "w", encoding="utf-8") as f:
+            os.fsync(f.fileno())
+
+    def close(self):
+        """Flush and close the journal file."""
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.file = None
+
+    def pending(self) -> List[Dict]:
+        """Read the batches that were begun but never committed, unless another process runs them.
+
+        Returns:
+            List[Dict]: Begin records with an added "done" set of applied operation indices
+        """
+        with self._claim() as claimed:
+            return self._read_pending() if claimed else []
+
+    def _read_pending(self) -> List[Dict]:
+        if not os.path.isfile(self.path):
+            return []
+        batches: Dict[str, Dict] = {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # Torn write at the end of the journal
+                if record["type"] == "begin":
+                    record["done"] = set()
+                    batches[record["batch"]] = record
+                elif record["type"] == "done" and record["batch"] in batches:
+                    batches[record["batch"]]["done"].add(record["index"])
+                elif record["type"] == "commit":
+                    batches.pop(record["batch"], None)
+        return list(batches.values())
+
+    def recover(self, roll_forward: bool = True, remove: bool = False) -> List[RecoveryResult]:
+        """Finish or revert every batch that was interrupted, then truncate the journal.
+
+        Whether an operation ran is taken from its done record or, since those
+        are synced in groups, from which of its two names exists on disk.
+        Files parked on a temporary name to break a cycle are always given a
+        real name again, and results list whole renames without temporary names.
+        A journal locked by another process is still in use and left alone.
+
+        Args:
+            roll_forward (bool): Complete interrupted batches if True, revert them if False
+            remove (bool): Delete the journal file afterwards instead of truncating it
+
+        Returns:
+            List[RecoveryResult]: One result per interrupted batch
+        """
+        results = []
+        with self.lock, self._claim() as claimed:
+            if not claimed:
+                return results
+            for batch in self._read_pending():
+                results.append(self._recover_batch(batch, roll_forward))
+            self.open_batches.clear()
+            if os.path.isfile(self.path):
+                self._truncate()
+                if remove:
+                    os.remove(self.path)
+        return results
+
+    @staticmethod
+    def _recover_batch(batch: Dict, roll_forward: bool) -> RecoveryResult:
+        directory = batch["directory"]
+        ops = [tuple(op) for op in batch["ops"]]
+        result = RecoveryResult(batch["batch"], batch["kind"], directory, roll_forward)
+
+        def exists(name: str) -> bool:
+            return os.path.lexists(os.path.join(directory, name))
+
+        # Operations after a park, up to the one that unparks, by (park index, temporary name)
+        cycle_of: Dict[int, Tuple[int, str]] = {}
+        for park, (_, temp) in enumerate(ops):
+            if is_temp_name(temp):
+                for index in range(park + 1, len(ops)):
+                    cycle_of[index] = (park, temp)
+                    if ops[index][0] == temp:
+                        break
+
+        def applied(index: int) -> bool:
+            source, target = ops[index]
+            if index in batch["done"]:
+                return True
+            if is_temp_name(target):
+                # Temporary names are unique, and parking is synced before the
+                # cycle goes on, so a parked file means only this rename ran
+                return exists(target)
+            if index in cycle_of:
+                park, temp = cycle_of[index]
+                if park in batch["done"] and not exists(temp):
+                    return True  # Only the last rename of the cycle removes its temporary name
+                if is_temp_name(source):
+                    return False
+            # Checked just before the operation would be completed or reverted,
+            # so names reused later in the batch have been settled already
+            return not exists(source) and exists(target)
+
+        # Complete unapplied operations in order, or revert applied ones in reverse order
+        order = range(len(ops)) if roll_forward else reversed(range(len(ops)))
+        settled: Set[int] = set()
+        for index in order:
+            source, target = ops[index]
+            if applied(index) != roll_forward:
+                src, dst = (source, target) if roll_forward else (target, source)
+                try:
+                    if os.path.lexists(os.path.join(directory, dst)):
+                        raise FileExistsError(f"File already exists: {dst}")
+                    os.rename(os.path.join(directory, src), os.path.join(directory, dst))
+                except Exception as e:
+                    logging.error(f"Error recovering {src}: {str(e)}")
+                    result.errors.append((src, str(e)))
+                    continue
+            settled.add(index)
+
+        # Report whole renames: a file parked on a temporary name counts once,
+        # as its original name and final name, when both halves settled
+        parked = {target: index for index, (_, target) in enumerate(ops) if is_temp_name(target)}
+        for index, (source, target) in enumerate(ops):
+            if is_temp_name(target):
+                continue
+            if is_temp_name(source):
+                park = parked.get(source)
+                if park is None or park not in settled or index not in settled:
+                    continue
+                source = ops[park][0]
+            elif index not in settled:
+                continue
+            result.settled.append((source, target))
+        return result
+
+
+class UndoHistory:
+    """Bounded undo history stored on disk as one JSON line per batch.
+
+    Only the byte offset of each batch is held in memory. Popping a batch
+    reads its line and truncates the file; once the history grows past its
+    limit the file is compacted to the most recent batches. Several
+    processes may share the file: each change is made under a file lock,
+    after indexing again any batches other processes wrote since.
+    """
+
+    def __init__(self, path: str = UNDO_HISTORY_FILE, limit: int = DEFAULT_UNDO_LIMIT):
+        """Initialize the history, indexing any batches already on disk.
+
+        Args:
+            path (str): History file
+            limit (int): Maximum number of batches kept after compaction
+        """
+        self.path = path
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.offsets: List[int] = []
+        # Size of the file as last indexed or written by this instance
+        self.size = 0
+        with self.lock, locked_file(self.path):
+            self._index()
+
+    def _refresh(self):
+        """Index the file again if another process changed it."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size != self.size:
+            self._index()
+
+    def _index(self):
+        self.offsets = []
+        self.size = 0
+        if not os.path.isfile(self.path):
+            return
+        offset = 0
+        valid_end = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if line.endswith(b"\n"):
+                    self.offsets.append(offset)
+                    valid_end = offset + len(line)
+                offset += len(line)
+        if valid_end != offset:
+            # Drop a partially written last batch
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)
+        self.size = valid_end
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def append(self, batch: RenameBatch):
+        """Add a batch to the end of the history.
+
+        Args:
+            batch (RenameBatch): Batch that was applied
+        """
+        line = (json.dumps(batch.to_dict(), separators=(",", ":")) + "\n").encode("utf-8")
+        with self.lock, locked_file(self.path):
+            self._refresh()
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.offsets.append(offset)
+            self.size = offset + len(line)
+            # Leave some slack so compaction doesn't run on every append
+            if len(self.offsets) > self.limit + max(1, self.limit // 4):
+                self._compact()
+
+    def pop(self) -> RenameBatch:
+        """Remove and return the most recent batch.
+
+        Returns:
+            RenameBatch: The batch
+
+        Raises:
+            IndexError: If the history is empty
+        """
+        with self.lock, locked_file(self.path):
+            self._refresh()
+            if not self.offsets:
+                raise IndexError("pop from empty undo history")
+            offset = self.offsets[-1]
+            with open(self.path, "r+b") as f:
+                f.seek(offset)
+                batch = RenameBatch.from_dict(json.loads(f.readline()))
+                f.truncate(offset)
+                os.fsync(f.fileno())
+            self.offsets.pop()
+            self.size = offset
+            return batch
+
+    def _compact(self):
+        keep = self.offsets[-self.limit:] if self.limit > 0 else []
+        tmp_path = f"{self.path}.tmp"
+        offsets = []
+        with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+            if keep:
+                src.seek(keep[0])
+                for _ in keep:
+                    offsets.append(dst.tell())
+                    dst.write(src.readline())
+            dst.flush()
+            os.fsync(dst.fileno())
+            size = dst.tell()
+        os.replace(tmp_path, self.path)
+        self.offsets = offsets
+        self.size = size
+
+    def clear(self):
+        """Forget every batch."""
+        with self.lock, locked_file(self.path):
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.offsets = []
+            self.size = 0
@@ -0,0 +1,265 @@
+import os
+import queue
+import logging
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+from renamer_engine import DEFAULT_LIBRARY_WORKERS, RenameEngine, RenamePlan
+from renamer_index import Signature, directory_signature
+from renamer_ordering import natural_key, season_from_dirname
+
+# How deep below the root season folders are looked for, so a root holding
+# several shows (Library/Show/Season NN) works as well as a single show
+MAX_LIBRARY_DEPTH = 3
+
+
+def find_season_dirs(root: str, max_depth: int = MAX_LIBRARY_DEPTH) -> List[Tuple[str, int]]:
+    """Find the season folders below a show or library root.
+
+    Season folders are not searched any further.
+
+    Args:
+        root (str): Show or library root
+        max_depth (int): Number of folder levels searched below the root
+
+    Returns:
+        List[Tuple[str, int]]: (path relative to root, season number) in natural path order
+    """
+    found: List[Tuple[str, int]] = []
+    pending = [("", 0)]
+    while pending:
+        relative, depth = pending.pop()
+        try:
+            with os.scandir(os.path.join(root, relative)) as entries:
+                subdirs = [entry.name for entry in entries
+                           if entry.is_dir() and not entry.name.startswith(".")]
+        except OSError as e:
+            logging.error(f"Error scanning {os.path.join(root, relative)}: {str(e)}")
+            continue
+        for name in subdirs:
+            path = os.path.join(relative, name)
+            season = season_from_dirname(name)
+            if season is not None:
+                found.append((path, season))
+            elif depth + 1 < max_depth:
+                pending.append((path, depth + 1))
+    found.sort(key=lambda item: natural_key(item[0]))
+    return found
+
+
+class SeasonPlan:
+    """The rename plan of one season folder."""
+
+    def __init__(self, directory: str, season: int, plan: RenamePlan,
+                 signature: Optional[Signature]):
+        """Initialize the season plan.
+
+        Args:
+            directory (str): Season folder relative to the library root
+            season (int): Season number inferred from the folder name
+            plan (RenamePlan): Plan of the files in the folder
+            signature (Optional[Signature]): Folder signature taken before it was scanned
+        """
+        self.directory = directory
+        self.season = season
+        self.plan = plan
+        self.signature = signature
+
+
+class LibraryPlan:
+    """Rename plans for every season of a show tree, indexed like one list of relative paths.
+
+    Each season is numbered from the start episode with the season number
+    taken from its folder; the end episode setting does not apply, since
+    seasons differ in length. Like RenamePlan, the plan is updated in place
+    when the numbering settings change.
+    """
+
+    def __init__(self, root: str):
+        """Initialize an empty plan.
+
+        Args:
+            root (str): Show or library root the paths are relative to
+        """
+        self.root = root
+        self.root_signature = directory_signature(root)
+        self.seasons: List[SeasonPlan] = []
+        self.offsets: List[int] = []
+        self.count = 0
+
+    def add_season(self, season: SeasonPlan):
+        """Add a scanned season, keeping seasons in library order."""
+        self.seasons.append(season)
+        self.seasons.sort(key=lambda item: natural_key(item.directory))
+        self._index()
+
+    def _index(self):
+        self.offsets = []
+        self.count = 0
+        for season in self.seasons:
+            self.offsets.append(self.count)
+            self.count += len(season.plan)
+
+    @property
+    def files(self) -> List[str]:
+        """Get every matching file as a path relative to the root."""
+        return [os.path.join(season.directory, name)
+                for season in self.seasons for name in season.plan.files]
+
+    def changed_on_disk(self) -> bool:
+        """Check whether the root or any season folder changed since the scan."""
+        if directory_signature(self.root) != self.root_signature:
+            return True
+        return any(directory_signature(os.path.join(self.root, season.directory))
+                   != season.signature for season in self.seasons)
+
+    def update(self, engine: RenameEngine) -> Optional[List[int]]:
+        """Renumber every season for the engine's start episode and naming settings.
+
+        Args:
+            engine (RenameEngine): Engine holding the start episode and naming settings
+
+        Returns:
+            Optional[List[int]]: Indices of the rows that changed, None if every row may have changed
+        """
+        changed: Optional[List[int]] = []
+        old_offsets = list(self.offsets)
+        for index, season in enumerate(self.seasons):
+            # The season folder's parent names the show for {show}
+            season_engine = engine.clone(directory=os.path.join(self.root, season.directory),
+                                         season_number=str(season.season), end_episode="")
+            rows = season.plan.update(season_engine)
+            if rows is None:
+                changed = None
+            elif changed is not None and index < len(old_offsets):
+                changed.extend(old_offsets[index] + row for row in rows)
+        self._index()
+        if self.offsets != old_offsets:
+            return None
+        return changed
+
+    def pairs(self) -> List[Tuple[str, str]]:
+        """Get the planned (old_path, new_path) pairs relative to the root, see RenamePlan.pairs()."""
+        return [(os.path.join(season.directory, old_name), os.path.join(season.directory, new_name))
+                for season in self.seasons for old_name, new_name in season.plan.pairs()]
+
+    def is_duplicate(self, index: int) -> bool:
+        """Check whether a row is a duplicate that won't be renamed."""
+        position = bisect_right(self.offsets, index) - 1
+        return self.seasons[position].plan.is_duplicate(index - self.offsets[position])
+
+    def companions(self, index: int) -> List[Tuple[str, str]]:
+        """Get the (old_path, new_path) pairs of a row's sidecar files."""
+        position = bisect_right(self.offsets, index) - 1
+        season = self.seasons[position]
+        return [(os.path.join(season.directory, old_name), os.path.join(season.directory, new_name))
+                for old_name, new_name in season.plan.companions(index - self.offsets[position])]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> Tuple[str, str]:
+        if not 0 <= index < self.count:
+            raise IndexError("plan index out of range")
+        # The last season starting at or before the index always holds it
+        position = bisect_right(self.offsets, index) - 1
+        season = self.seasons[position]
+        old_name, new_name = season.plan[index - self.offsets[position]]
+        return (os.path.join(season.directory, old_name),
+                os.path.join(season.directory, new_name))
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        for season in self.seasons:
+            for old_name, new_name in season.plan:
+                yield (os.path.join(season.directory, old_name),
+                       os.path.join(season.directory, new_name))
+
+
+def scan_library(engine: RenameEngine, root: Optional[str] = None,
+                 max_workers: int = DEFAULT_LIBRARY_WORKERS,
+                 cancel_event: Optional[threading.Event] = None) -> LibraryPlan:
+    """Scan every season folder below a root and plan the whole library in one pass.
+
+    Args:
+        engine (RenameEngine): Engine holding the extension and start episode settings
+        root (Optional[str]): Show or library root, the engine's directory by default
+        max_workers (int): Number of season folders scanned at once
+        cancel_event (Optional[threading.Event]): Skips the remaining folders when set
+
+    Returns:
+        LibraryPlan: The plan, numbered for the engine's settings
+    """
+    root = root or engine.directory
+    library = LibraryPlan(root)
+
+    def scan(directory: str, season: int) -> Optional[SeasonPlan]:
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        path = os.path.join(root, directory)
+        signature = directory_signature(path)
+        season_engine = engine.clone(directory=path)
+        plan = RenamePlan()
+        sidecars: List[str] = []
+        files, keys = season_engine.scan_index(sidecars)
+        season_engine.plan_files(plan, files, keys, sidecars)
+        return SeasonPlan(directory, season, plan, signature)
+
+    season_dirs = find_season_dirs(root)
+    if season_dirs:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(season_dirs)))) as executor:
+            for season in executor.map(lambda item: scan(*item), season_dirs):
+                if season is not None:
+                    library.add_season(season)
+    library.update(engine)
+    return library
+
+
+class LibraryScanner:
+    """Scan a show tree on a worker thread, using the DirectoryScanner queue protocol.
+
+    The queue receives a single ("library", LibraryPlan) message followed by
+    ("done", count), or ("error", message). Nothing is posted after cancel().
+    """
+
+    def __init__(self, engine: RenameEngine, max_workers: int = DEFAULT_LIBRARY_WORKERS):
+        """Initialize the scanner.
+
+        Args:
+            engine (RenameEngine): Engine holding the root directory and extension settings
+            max_workers (int): Number of season folders scanned at once
+        """
+        # Copy the settings so later edits don't affect a running scan
+        self.engine = engine.clone()
+        self.max_workers = max_workers
+        self.queue: "queue.Queue[Tuple[str, object]]" = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def directory(self) -> str:
+        return self.engine.directory
+
+    def start(self):
+        """Start scanning in the background."""
+        self.thread.start()
+
+    def cancel(self):
+        """Ask the scan to stop as soon as possible."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def _run(self):
+        try:
+            library = scan_library(self.engine, max_workers=self.max_workers,
+                                   cancel_event=self.cancel_event)
+            if not self.cancelled:
+                self.queue.put(("library", library))
+                self.queue.put(("done", len(library.files)))
+        except Exception as e:
+            logging.error(f"Error scanning library {self.directory}: {str(e)}")
+            if not self.cancelled:
+                self.queue.put(("error", str(e)))
@@ -0,0 +1,111 @@
+import re
+from typing import List, Optional, Sequence, Tuple
+
+# Sort key: (has_no_metadata, season, episode, part, natural_key). Files whose
+# names carry episode numbers come first, in episode order; the rest follow
+# in natural order. The natural key alternates text and numbers, so every
+# position holds the same type and keys always compare cleanly.
+SortKey = Tuple[int, int, int, int, Tuple]
+
+_SEASON_EPISODE = re.compile(r'(?<![A-Za-z0-9])S(\d{1,3})[ ._-]?E(\d{1,4})', re.IGNORECASE)
+_CROSS_EPISODE = re.compile(r'(?<!\d)(\d{1,2})x(\d{1,3})(?!\d)', re.IGNORECASE)
+_EPISODE = re.compile(r'(?<![A-Za-z])(?:Episode|Ep|E)[ ._-]?(\d{1,4})(?!\d)', re.IGNORECASE)
+_PART = re.compile(r'(?<![A-Za-z])(?:Part|Pt)[ ._-]?(\d{1,3})(?!\d)', re.IGNORECASE)
+_DIGITS = re.compile(r'(\d+)')
+# Double episodes: "S01E01-E02", "S01E01E02", "S01E01-02", "S01E01.E02"
+_MULTI_EPISODE = re.compile(
+    r'(?<![A-Za-z0-9])S\d{1,3}[ ._-]?E(\d{1,4})(?:-E?|[ ._]?E)(\d{1,4})(?!\d)', re.IGNORECASE)
+# Longest run of episodes one file is believed to hold
+MAX_EPISODE_SPAN = 4
+
+# "Season 1", "Season.01", "Series 2", "S03"; "Specials" is season 0
+_SEASON_DIR = re.compile(r'^(?:season|series|s)[ ._-]*(\d{1,3})$', re.IGNORECASE)
+_SPECIALS_DIR = re.compile(r'^specials?$', re.IGNORECASE)
+
+
+def natural_key(name: str) -> Tuple:
+    """Get a key that sorts embedded numbers by value, so 'Episode 2' comes before 'Episode 10'.
+
+    Args:
+        name (str): File name
+
+    Returns:
+        Tuple: Alternating lower-case text and integer chunks
+    """
+    parts = _DIGITS.split(name.lower())
+    parts[1::2] = [int(part) for part in parts[1::2]]
+    return tuple(parts)
+
+
+def episode_sort_key(name: str) -> SortKey:
+    """Get the sort key for a file from the season, episode and part numbers in its name.
+
+    Recognizes 'S01E05', '1x05', 'Episode 5'/'Ep5' and 'Part 5'/'Pt 5'; names
+    without any of them fall back to natural order.
+
+    Args:
+        name (str): File name
+
+    Returns:
+        SortKey: The key
+    """
+    season = episode = part = 0
+    found = False
+    match = _SEASON_EPISODE.search(name) or _CROSS_EPISODE.search(name)
+    if match:
+        season, episode = int(match.group(1)), int(match.group(2))
+        found = True
+    else:
+        match = _EPISODE.search(name)
+        if match:
+            episode = int(match.group(1))
+            found = True
+    match = _PART.search(name)
+    if match:
+        part = int(match.group(1))
+        found = True
+    return (0 if found else 1, season, episode, part, natural_key(name))
+
+
+def episode_span(name: str) -> int:
+    """Get the number of consecutive episodes a file holds, e.g. 2 for 'S01E01-E02'.
+
+    Args:
+        name (str): File name
+
+    Returns:
+        int: Number of episodes, 1 unless the name gives a plausible range
+    """
+    match = _MULTI_EPISODE.search(name)
+    if match:
+        first, last = int(match.group(1)), int(match.group(2))
+        if first < last < first + MAX_EPISODE_SPAN:
+            return last - first + 1
+    return 1
+
+
+def sort_keys(names: Sequence[str]) -> List[SortKey]:
+    """Compute the sort keys for a batch of names."""
+    return [episode_sort_key(name) for name in names]
+
+
+def key_from_json(data: List) -> SortKey:
+    """Rebuild a sort key loaded from JSON, where tuples come back as lists."""
+    return (data[0], data[1], data[2], data[3], tuple(data[4]))
+
+
+def season_from_dirname(name: str) -> Optional[int]:
+    """Infer the season number from a folder name.
+
+    Args:
+        name (str): Folder name, e.g. 'Season 02'
+
+    Returns:
+        Optional[int]: The season number, None if the folder isn't a season folder
+    """
+    match = _SEASON_DIR.match(name.strip())
+    if match:
+        return int(match.group(1))
+    if _SPECIALS_DIR.match(name.strip()):
+        return 0
+    return None
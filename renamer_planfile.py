@@ -0,0 +1,434 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from renamer_engine import (RenameEngine, RenameResult, ProgressCallback, ErrorCallback,
+                            order_renames, group_by_parent, existing_names)
+from renamer_sidecars import companion_owners
+from renamer_transfer import TransferCallback, TransferResult, check_destination
+
+# A plan file is JSON Lines: a header, then for every directory a
+# {"directory": ..., "destination": ...} line followed by its operations,
+# then a trailer with the operation count so truncated files are refused.
+# An operation is [old_name, new_name, size, mtime_ns], with the video's old
+# name appended for a sidecar that follows its video; renames that swap
+# names in a cycle share one {"cycle": [operation, ...]} line so they are
+# always applied together. Operations are written in execution order, so
+# a plan can be applied in chunks of lines.
+PLAN_FORMAT = "tvrenamer-plan"
+PLAN_VERSION = 1
+# Operations renamed, journaled and recorded for undo as one batch
+PLAN_CHUNK_SIZE = 2000
+
+# (old_name, new_name, size, mtime_ns, video), video is empty unless the file is a sidecar
+PlanOp = Tuple[str, str, int, int, str]
+
+
+class PlanFileError(ValueError):
+    """Raised when a plan file is malformed, truncated or of an unknown version."""
+
+
+class PlanWriter:
+    """Write a plan file one directory at a time.
+
+    The file is written next to its final path and only takes that name
+    once close() wrote the trailer, so a plan is either complete or absent.
+    """
+
+    def __init__(self, path: str):
+        """Start a new plan file.
+
+        Args:
+            path (str): Plan file to create or replace
+        """
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.operations = 0
+        self.lock = threading.Lock()
+        self.file = open(self.tmp_path, "w", encoding="utf-8")
+        self._write({"format": PLAN_FORMAT, "version": PLAN_VERSION,
+                     "created": time.strftime("%Y-%m-%dT%H:%M:%S")})
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def add(self, directory: str, pairs: List[Tuple[str, str]],
+            destination: str = "") -> List[Tuple[str, str]]:
+        """Add the renames of one directory, or of a show root with season folders.
+
+        Pairs are ordered the same way apply_plan orders them, against the
+        files on disk now; pairs that can't be applied are left out.
+
+        Args:
+            directory (str): Directory the names are relative to
+            pairs (List[Tuple[str, str]]): (old_name, new_name) pairs, may be relative paths
+            destination (str): Directory renamed files are moved into, empty for none
+
+        Returns:
+            List[Tuple[str, str]]: (old_name, reason) for every pair left out
+
+        Raises:
+            ValueError: If a pair moves a file to another directory, or the destination
+                is the directory itself
+        """
+        check_destination(directory, destination)
+        groups = group_by_parent(pairs)
+        if groups is None:
+            raise ValueError("A plan can't move files between directories")
+        skipped: List[Tuple[str, str]] = []
+        with self.lock:
+            for parent, names in groups.items():
+                section = os.path.join(directory, parent) if parent else directory
+                target_dir = os.path.join(destination, parent) if destination and parent else destination
+                skipped.extend((os.path.join(parent, name), reason)
+                               for name, reason in self._add_section(section, names, target_dir))
+        return skipped
+
+    def _add_section(self, directory: str, pairs: List[Tuple[str, str]],
+                     destination: str) -> List[Tuple[str, str]]:
+        skipped: List[Tuple[str, str]] = []
+        stats: Dict[str, os.stat_result] = {}
+        for old_name, new_name in pairs:
+            if old_name == new_name and not destination:
+                continue  # Only files moved to a destination need no new name
+            try:
+                stats[old_name] = os.stat(os.path.join(directory, old_name))
+            except OSError as e:
+                skipped.append((old_name, str(e)))
+        pairs = [pair for pair in pairs if pair[0] in stats]
+        owners = companion_owners(pairs)
+        ops, rejected = order_renames(pairs, existing_names(directory, (p[1] for p in pairs)),
+                                      owners)
+        skipped.extend((pairs[index][0], reason) for index, reason in rejected)
+        unchanged = [index for index, (old_name, new_name) in enumerate(pairs)
+                     if old_name == new_name]
+        if not ops and not unchanged:
+            return skipped
+
+        def operation(index: int) -> List:
+            old_name, new_name = pairs[index]
+            st = stats[old_name]
+            if index in owners:
+                return [old_name, new_name, st.st_size, st.st_mtime_ns, pairs[owners[index]][0]]
+            return [old_name, new_name, st.st_size, st.st_mtime_ns]
+
+        section = {"directory": directory}
+        if destination:
+            section["destination"] = destination
+        self._write(section)
+        for index in unchanged:
+            self._write(operation(index))
+            self.operations += 1
+        cycle: Optional[List[List]] = None
+        for source, target, index in ops:
+            if cycle is None and target != pairs[index][1]:
+                # A cycle starts by parking a file on a temporary name
+                cycle = [operation(index)]
+            elif cycle is not None and source != pairs[index][0]:
+                # ...and ends when that file leaves the temporary name
+                self._write({"cycle": cycle})
+                self.operations += len(cycle)
+                cycle = None
+            elif cycle is not None:
+                cycle.append(operation(index))
+            else:
+                self._write(operation(index))
+                self.operations += 1
+        return skipped
+
+    def close(self):
+        """Write the trailer and move the finished plan into place."""
+        self._write({"operations": self.operations})
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        """Discard the unfinished plan."""
+        self.file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+    def __enter__(self) -> "PlanWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _read_ops(record, line_number: int) -> List[PlanOp]:
+    """Validate one operation or cycle line."""
+    items = record["cycle"] if isinstance(record, dict) and "cycle" in record else [record]
+    ops: List[PlanOp] = []
+    for item in items:
+        if (not isinstance(item, list) or len(item) not in (4, 5)
+                or not all(isinstance(name, str) and name for name in item[:2] + item[4:])
+                or not all(isinstance(number, int) for number in item[2:4])):
+            raise PlanFileError(f"Invalid operation on line {line_number}")
+        if any(os.path.basename(name) != name for name in item[:2] + item[4:]):
+            raise PlanFileError(f"Operation on line {line_number} leaves its directory")
+        ops.append((item[0], item[1], item[2], item[3], item[4] if len(item) == 5 else ""))
+    return ops
+
+
+def read_plan(path: str) -> Iterator[Tuple[str, str, List[PlanOp]]]:
+    """Stream the lines of a plan file without loading it.
+
+    Yields:
+        Tuple[str, str, List[PlanOp]]: (directory, destination, operations) for every
+        operation line; a cycle line yields all of its operations at once
+
+    Raises:
+        PlanFileError: If the file is malformed, of an unknown version or truncated
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline() or "null")
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("format") != PLAN_FORMAT:
+            raise PlanFileError(f"Not a plan file: {path}")
+        if header.get("version") != PLAN_VERSION:
+            raise PlanFileError(f"Unsupported plan version: {header.get('version')}")
+        directory = destination = None
+        operations = 0
+        for line_number, line in enumerate(f, 2):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise PlanFileError(f"Invalid JSON on line {line_number}")
+            if isinstance(record, dict) and "operations" in record:
+                if record["operations"] != operations:
+                    raise PlanFileError(f"Plan lists {record['operations']} operations "
+                                        f"but holds {operations}")
+                return
+            if isinstance(record, dict) and "directory" in record:
+                directory = record["directory"]
+                destination = record.get("destination", "")
+                if not isinstance(directory, str) or not isinstance(destination, str):
+                    raise PlanFileError(f"Invalid directory on line {line_number}")
+                continue
+            if directory is None:
+                raise PlanFileError(f"Operation before any directory on line {line_number}")
+            ops = _read_ops(record, line_number)
+            operations += len(ops)
+            yield directory, destination, ops
+    raise PlanFileError(f"Plan file is truncated: {path}")
+
+
+class PlanInfo:
+    """Summary of a plan file, gathered in one streaming pass."""
+
+    def __init__(self, path: str):
+        """Read and validate the whole plan.
+
+        Args:
+            path (str): Plan file
+
+        Raises:
+            PlanFileError: If the file is malformed, of an unknown version or truncated
+        """
+        self.path = path
+        self.operations = 0
+        self.directories = 0
+        self.moves = False
+        last = None
+        for directory, destination, ops in read_plan(path):
+            self.operations += len(ops)
+            if directory != last:
+                self.directories += 1
+                last = directory
+            self.moves = self.moves or bool(destination)
+
+
+def iter_plan_chunks(path: str, chunk_size: int = PLAN_CHUNK_SIZE
+                     ) -> Iterator[Tuple[str, str, List[PlanOp]]]:
+    """Group a plan's operations into chunks of one directory.
+
+    A chunk never splits a cycle, so it may run over chunk_size by the
+    rest of one cycle.
+
+    Yields:
+        Tuple[str, str, List[PlanOp]]: (directory, destination, operations)
+    """
+    chunk: List[PlanOp] = []
+    current: Optional[Tuple[str, str]] = None
+    for directory, destination, ops in read_plan(path):
+        if chunk and (current != (directory, destination) or len(chunk) >= chunk_size):
+            yield current[0], current[1], chunk
+            chunk = []
+        current = (directory, destination)
+        chunk.extend(ops)
+    if chunk:
+        yield current[0], current[1], chunk
+
+
+class PlanResult(RenameResult):
+    """Outcome of applying a plan file; only counts are kept, not every renamed pair."""
+
+    def __init__(self, total: int):
+        """Initialize an empty result.
+
+        Args:
+            total (int): Number of operations in the plan
+        """
+        super().__init__(total)
+        self.renamed = 0
+        # Operations a previous, interrupted run already applied
+        self.already_done = 0
+        self.batches = 0
+
+    @property
+    def count(self) -> int:
+        return self.renamed
+
+
+def _check_source(directory: str, destination: str, op: PlanOp) -> Optional[bool]:
+    """Check that an operation still applies to the file it was planned for.
+
+    Files are recognized by size and mtime, which renaming and moving keep.
+
+    Returns:
+        Optional[bool]: True if the file is unchanged, None if it already has its new name
+
+    Raises:
+        FileNotFoundError: If the file is gone
+        ValueError: If the file changed since the plan was made
+    """
+    old_name, new_name, size, mtime_ns, _ = op
+    try:
+        st = os.stat(os.path.join(directory, old_name))
+        if (st.st_size, st.st_mtime_ns) == (size, mtime_ns):
+            return True
+        changed = True
+    except FileNotFoundError:
+        changed = False
+    # Applied by an earlier run of the same plan, renamed and maybe moved; a
+    # later rename may have given the old name to another file
+    for done_dir in filter(None, (directory, destination)):
+        try:
+            st = os.stat(os.path.join(done_dir, new_name))
+        except OSError:
+            continue
+        if (st.st_size, st.st_mtime_ns) == (size, mtime_ns):
+            return None
+    if changed:
+        raise ValueError(f"Changed since the plan was made: {old_name}")
+    raise FileNotFoundError(f"File not found: {old_name}")
+
+
+def apply_plan_file(engine: RenameEngine, path: str, chunk_size: int = PLAN_CHUNK_SIZE,
+                    on_progress: Optional[ProgressCallback] = None,
+                    on_error: Optional[ErrorCallback] = None,
+                    cancel_event: Optional[threading.Event] = None,
+                    on_transfer: Optional[TransferCallback] = None) -> PlanResult:
+    """Apply a plan file in chunks, never holding more than one chunk in memory.
+
+    The plan is validated in a first streaming pass before any file is
+    touched. Each chunk then runs through engine.apply_plan, so it is
+    journaled and recorded as its own undo batch. Files that changed since
+    the plan was made are skipped, as are the sidecars of videos that
+    weren't renamed, and operations an interrupted run already applied are
+    recognized, so a plan can simply be applied again.
+
+    Args:
+        engine (RenameEngine): Engine holding the journal, undo history and transfer settings
+        path (str): Plan file
+        chunk_size (int): Operations applied as one batch
+        on_progress (Optional[ProgressCallback]): Called with (done, total) over the whole plan
+        on_error (Optional[ErrorCallback]): Called with (old_name, error) when an operation fails
+        cancel_event (Optional[threading.Event]): Stops after the current file; the plan can be
+            applied again later to finish it
+        on_transfer (Optional[TransferCallback]): Called while a chunk's files are moved
+
+    Returns:
+        PlanResult: Counts, failures and bytes moved
+
+    Raises:
+        PlanFileError: If the plan file is malformed, of an unknown version or truncated
+    """
+    result = PlanResult(PlanInfo(path).operations)
+    processed = 0
+    # Old names of the current directory's files that failed, for their sidecars in later chunks
+    unrenamed: Set[str] = set()
+    section = None
+
+    def fail(name: str, error: Exception):
+        logging.error(f"Error renaming {name}: {str(error)}")
+        result.errors.append((name, str(error)))
+        if on_error:
+            on_error(name, error)
+
+    for directory, destination, ops in iter_plan_chunks(path, chunk_size):
+        if cancel_event is not None and cancel_event.is_set():
+            result.cancelled = True
+            break
+        if section != directory:
+            section = directory
+            unrenamed.clear()
+        try:
+            check_destination(directory, destination)
+        except ValueError as e:
+            for op in ops:
+                fail(op[0], e)
+            processed += len(ops)
+            continue
+        pairs: List[Tuple[str, str]] = []
+        # Files already named by an earlier run that may still need moving
+        to_move: List[Tuple[str, str]] = []
+        for op in ops:
+            if op[0] == op[1]:
+                # Written only for plans with a destination, the file just moves
+                result.already_done += 1
+                to_move.append((op[0], op[1]))
+                continue
+            try:
+                if op[4] in unrenamed:
+                    raise FileNotFoundError(f"Not renamed because its video wasn't: {op[4]}")
+                if _check_source(directory, destination, op):
+                    pairs.append((op[0], op[1]))
+                else:
+                    result.already_done += 1
+                    if destination:
+                        to_move.append((op[1], op[1]))
+            except (OSError, ValueError) as e:
+                unrenamed.add(op[0])
+                fail(op[0], e)
+        base = processed + len(ops) - len(pairs)
+        processed += len(ops)
+        if on_progress:
+            on_progress(base, result.total)
+        if not pairs and not to_move:
+            continue
+
+        def progress(done: int, total: int, base: int = base):
+            if on_progress:
+                on_progress(base + done, result.total)
+
+        chunk = engine.apply_plan(pairs + to_move, on_progress=progress, on_error=on_error,
+                                  directory=directory, cancel_event=cancel_event,
+                                  on_transfer=on_transfer, destination=destination)
+        result.batches += 1
+        result.renamed += chunk.count
+        result.errors.extend(chunk.errors)
+        unrenamed.update(name for name, _ in chunk.errors)
+        if chunk.transfer is not None:
+            if result.transfer is None:
+                result.transfer = TransferResult(0, 0)
+            result.transfer.total += chunk.transfer.total
+            result.transfer.total_bytes += chunk.transfer.total_bytes
+            result.transfer.bytes_done += chunk.transfer.bytes_done
+            result.transfer.seconds += chunk.transfer.seconds
+            result.transfer.errors.extend(chunk.transfer.errors)
+        if chunk.cancelled:
+            result.cancelled = True
+            break
+    return result
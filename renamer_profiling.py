@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    import cProfile
+
+PROFILE_ENV = "TVRENAMER_PROFILE"
+STATS_FILE = "tv_show_renamer_stats.json"
+PROFILE_FILE = "tv_show_renamer.prof"
+
+_DISABLED = nullcontext()
+
+
+class _Phase:
+    """Context manager timing one run of a phase."""
+
+    __slots__ = ("owner", "name", "started")
+
+    def __init__(self, owner: "Instrumentation", name: str):
+        self.owner = owner
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.owner.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Instrumentation:
+    """Phase timers and counters for the scan, filter, sort, plan, render and apply hot paths.
+
+    Disabled instrumentation hands out one shared no-op context manager and
+    returns from count() immediately, so call sites cost a flag check.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.started = time.time()
+        self.profiler: Optional["cProfile.Profile"] = None
+        self.stats_path = STATS_FILE
+        self.profile_path = PROFILE_FILE
+        self._dump_registered = False
+
+    def configure(self, mode: Optional[str] = None, stats_path: str = STATS_FILE,
+                  profile_path: str = PROFILE_FILE):
+        """Turn instrumentation on or off.
+
+        Args:
+            mode (Optional[str]): "stats" for timers and counters, "cprofile" to also capture
+                a cProfile trace, anything false to disable; read from TVRENAMER_PROFILE if None
+            stats_path (str): File the session report is written to at exit
+            profile_path (str): File the cProfile trace is written to at exit
+        """
+        if mode is None:
+            mode = os.environ.get(PROFILE_ENV, "")
+        mode = mode.strip().lower()
+        self.enabled = mode not in ("", "0", "off", "false", "no")
+        self.stats_path = stats_path
+        self.profile_path = profile_path
+        if self.enabled and mode == "cprofile" and self.profiler is None:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        if self.enabled and not self._dump_registered:
+            atexit.register(self.dump)
+            self._dump_registered = True
+
+    def phase(self, name: str):
+        """Time a block of code under the given phase name.
+
+        Args:
+            name (str): Phase name, e.g. "scan" or "render"
+
+        Returns:
+            A context manager
+        """
+        if not self.enabled:
+            return _DISABLED
+        return _Phase(self, name)
+
+    def record(self, name: str, seconds: float):
+        """Add one timed run to a phase."""
+        with self.lock:
+            phase = self.phases.get(name)
+            if phase is None:
+                phase = self.phases[name] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0}
+            phase["calls"] += 1
+            phase["seconds"] += seconds
+            phase["max_seconds"] = max(phase["max_seconds"], seconds)
+
+    def count(self, name: str, amount: int = 1):
+        """Increase a counter.
+
+        Args:
+            name (str): Counter name, e.g. "files_scanned"
+            amount (int): Amount to add
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self) -> Dict:
+        """Build the session report, including derived rates such as renames per second."""
+        with self.lock:
+            phases = {name: dict(phase) for name, phase in self.phases.items()}
+            counters = dict(self.counters)
+        apply_seconds = phases.get("apply", {}).get("seconds", 0.0)
+        scan_seconds = phases.get("scan", {}).get("seconds", 0.0)
+        return {
+            "session_seconds": time.time() - self.started,
+            "phases": phases,
+            "counters": counters,
+            "rates": {
+                "renames_per_sec": counters.get("renames", 0) / apply_seconds if apply_seconds else None,
+                "files_scanned_per_sec": counters.get("files_scanned", 0) / scan_seconds if scan_seconds else None,
+            },
+        }
+
+    def dump(self):
+        """Write the session report, and the cProfile trace if one was captured."""
+        if not self.enabled:
+            return
+        try:
+            if self.profiler is not None:
+                self.profiler.disable()
+                self.profiler.dump_stats(self.profile_path)
+            with open(self.stats_path, "w", encoding="utf-8") as f:
+                json.dump(self.report(), f, indent=2)
+        except Exception as e:
+            logging.error(f"Error writing profiling report: {str(e)}")
+
+    def reset(self):
+        """Forget every recorded timing and counter."""
+        with self.lock:
+            self.phases.clear()
+            self.counters.clear()
+            self.started = time.time()
+
+
+instrumentation = Instrumentation()
@@ -0,0 +1,131 @@
+import re
+from typing import Iterator, Sequence, Tuple
+
+_INVERT = bytes([1, 0]) + bytes(254)
+
+
+def parse_row_range(text: str, total: int) -> Tuple[int, int]:
+    """Parse a 1-based inclusive row range such as '5', '10-20', '-20' or '10-'.
+
+    Args:
+        text (str): The range as typed by the user
+        total (int): Number of rows, the end of an open range
+
+    Returns:
+        Tuple[int, int]: 0-based (start, stop) slice bounds, clamped to the rows
+
+    Raises:
+        ValueError: If the range is malformed
+    """
+    match = re.fullmatch(r"\s*(\d*)\s*(-?)\s*(\d*)\s*", text)
+    if not match or not (match.group(1) or match.group(3)):
+        raise ValueError(f"Invalid row range: {text}")
+    first, dash, last = match.groups()
+    start = int(first) if first else 1
+    stop = (int(last) if last else total) if dash else start
+    if start < 1 or stop < start:
+        raise ValueError(f"Invalid row range: {text}")
+    return min(start - 1, total), min(stop, total)
+
+
+class SelectionModel:
+    """Selection state of every plan row, one byte per row.
+
+    Rows are addressed by plan index. Single toggles are O(1) and the bulk
+    operations run over the whole array in C where possible, so selecting
+    across 100k rows needs no per-row objects or widgets.
+    """
+
+    def __init__(self, total: int = 0, selected: bool = True):
+        """Initialize the selection.
+
+        Args:
+            total (int): Number of rows
+            selected (bool): Initial state of every row, and of rows added later
+        """
+        self.default = selected
+        self.flags = bytearray([selected]) * total
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def __getitem__(self, index: int) -> bool:
+        return bool(self.flags[index])
+
+    def __setitem__(self, index: int, selected: bool):
+        self.flags[index] = selected
+
+    def toggle(self, index: int) -> bool:
+        """Flip one row and return its new state."""
+        self.flags[index] ^= 1
+        return bool(self.flags[index])
+
+    def reset(self, total: int, selected: bool = True):
+        """Start over with a number of rows all in the same state."""
+        self.default = selected
+        self.flags = bytearray([selected]) * total
+
+    def remap(self, old_keys: Sequence[str], new_keys: Sequence[str]):
+        """Carry every row's state over to its new position after rows were inserted or removed.
+
+        Only the keys whose state differs from the default are kept in a
+        set, so rows that didn't exist before take the default state.
+
+        Args:
+            old_keys (Sequence[str]): Key of each row the flags were set for, such as its file name
+            new_keys (Sequence[str]): Key of each row now
+        """
+        default = self.default
+        flipped = {key for key, flag in zip(old_keys, self.flags) if flag != default}
+        if not flipped:
+            self.flags = bytearray([default]) * len(new_keys)
+            return
+        self.flags = bytearray((key in flipped) != default for key in new_keys)
+
+    def set_all(self, selected: bool):
+        """Select or deselect every row."""
+        self.flags = bytearray([selected]) * len(self.flags)
+
+    def invert(self):
+        """Flip every row."""
+        self.flags = bytearray(self.flags.translate(_INVERT))
+
+    def select_range(self, start: int, stop: int, selected: bool = True):
+        """Set the rows from start up to, not including, stop."""
+        start, stop = max(0, start), min(stop, len(self.flags))
+        if start < stop:
+            self.flags[start:stop] = bytearray([selected]) * (stop - start)
+
+    def select_matching(self, rows: Sequence[Tuple[str, str]], pattern: str,
+                        column: int = 0):
+        """Select exactly the rows whose name matches a regular expression.
+
+        Args:
+            rows (Sequence[Tuple[str, str]]): (old_name, new_name) rows
+            pattern (str): Regular expression searched for anywhere in the name, case-insensitive
+            column (int): 0 to match the current names, 1 for the new names
+
+        Raises:
+            ValueError: If the regular expression is invalid
+        """
+        try:
+            search = re.compile(pattern, re.IGNORECASE).search
+        except re.error as e:
+            raise ValueError(f"Invalid pattern {pattern}: {str(e)}")
+        self.flags = bytearray(search(row[column]) is not None for row in rows)
+
+    def select_changed(self, rows: Sequence[Tuple[str, str]]):
+        """Select exactly the rows whose new name differs from the current one."""
+        self.flags = bytearray(old_name != new_name for old_name, new_name in rows)
+
+    def count(self) -> int:
+        """Number of selected rows."""
+        return self.flags.count(1)
+
+    def indices(self) -> Iterator[int]:
+        """Iterate over the selected rows in order."""
+        flags = self.flags
+        index = flags.find(1)
+        while index != -1:
+            yield index
+            index = flags.find(1, index + 1)
@@ -0,0 +1,81 @@
+import os
+import json
+import logging
+from typing import Dict
+from renamer_engine import DEFAULT_SEASON, DEFAULT_START_EPISODE, DEFAULT_EXTENSIONS
+from renamer_sidecars import DEFAULT_SIDECAR_EXTENSIONS
+from renamer_template import DEFAULT_TEMPLATE
+from renamer_transfer import DEFAULT_TRANSFER_WORKERS
+
+SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "renamer_settings.json")
+
+# Settings kept between sessions, named like the RenameEngine attributes and
+# GUI fields they fill. sidecar_extensions and transfer_workers have no field
+# and are only changed by editing the file.
+DEFAULT_SETTINGS: Dict[str, object] = {
+    "directory": "",
+    "season_number": DEFAULT_SEASON,
+    "start_episode": DEFAULT_START_EPISODE,
+    "end_episode": "",
+    "file_extensions": DEFAULT_EXTENSIONS,
+    "show_name": "",
+    "naming_template": DEFAULT_TEMPLATE,
+    "include_patterns": "",
+    "exclude_patterns": "",
+    "min_size_mb": "",
+    "sniff_headers": False,
+    "library_mode": False,
+    "skip_duplicates": False,
+    "rename_sidecars": False,
+    "sidecar_extensions": DEFAULT_SIDECAR_EXTENSIONS,
+    "destination": "",
+    "transfer_workers": DEFAULT_TRANSFER_WORKERS,
+}
+
+
+def load_settings(path: str = SETTINGS_FILE) -> Dict[str, object]:
+    """Load the saved settings, falling back to the default of any missing or invalid value.
+
+    Args:
+        path (str): Settings file
+
+    Returns:
+        Dict[str, object]: Every setting in DEFAULT_SETTINGS
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    if not os.path.isfile(path):
+        return settings
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object")
+    except Exception as e:
+        logging.error(f"Error loading settings {path}: {str(e)}")
+        return settings
+    for name, default in DEFAULT_SETTINGS.items():
+        value = data.get(name, default)
+        # bool is an int subclass, so compare types exactly
+        if type(value) is not type(default):
+            logging.error(f"Ignoring invalid setting {name}: {value!r}")
+            continue
+        settings[name] = value
+    return settings
+
+
+def save_settings(settings: Dict[str, object], path: str = SETTINGS_FILE):
+    """Write the known settings to disk atomically, logging failures.
+
+    Args:
+        settings (Dict[str, object]): Settings to save, unknown names are left out
+        path (str): Settings file
+    """
+    data = {name: settings.get(name, default) for name, default in DEFAULT_SETTINGS.items()}
+    try:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logging.error(f"Error saving settings {path}: {str(e)}")
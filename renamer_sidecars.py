@@ -0,0 +1,109 @@
+import re
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Tuple
+from renamer_filter import normalize_extensions
+
+# Subtitles, metadata and artwork that media players pair with a video by name
+DEFAULT_SIDECAR_EXTENSIONS = ".srt,.sub,.idx,.ass,.ssa,.vtt,.nfo,.jpg,.jpeg,.png,.tbn"
+
+# Characters that end the video's name inside a sidecar name, as in
+# 'Show.E03.en.srt' or 'Show.E03-thumb.jpg'
+_STEM_SEPARATOR = re.compile(r"[.-]")
+
+
+def parse_sidecar_extensions(extensions: str) -> FrozenSet[str]:
+    """Normalize a comma separated sidecar extension list, empty for none."""
+    return frozenset(normalize_extensions(extensions)) if extensions.strip() else frozenset()
+
+
+def stem(name: str) -> str:
+    """Strip the extension from a file name."""
+    dot = name.rfind(".")
+    return name[:dot] if dot > 0 else name
+
+
+def match_sidecars(videos: Iterable[str], candidates: Iterable[str]) -> Dict[str, List[str]]:
+    """Attach companion files to the video they belong to.
+
+    Video stems go into a dictionary; each candidate is then looked up by
+    its own prefixes ending at a '.' or '-', longest first, so matching is
+    linear in the total length of the names however many subtitles a
+    directory holds.
+
+    Args:
+        videos (Iterable[str]): Video file names
+        candidates (Iterable[str]): Names of possible sidecar files in the same directory
+
+    Returns:
+        Dict[str, List[str]]: Sidecar names by video name, only for videos that have any
+    """
+    by_stem: Dict[str, str] = {}
+    for video in videos:
+        by_stem.setdefault(stem(video), video)
+    sidecars: Dict[str, List[str]] = {}
+    if not by_stem:
+        return sidecars
+    video_names = set(by_stem.values())
+    for name in candidates:
+        if name in video_names:
+            continue
+        for end in reversed([match.start() for match in _STEM_SEPARATOR.finditer(name, 1)]):
+            video = by_stem.get(name[:end])
+            if video is not None:
+                sidecars.setdefault(video, []).append(name)
+                break
+    for names in sidecars.values():
+        names.sort()
+    return sidecars
+
+
+def sidecar_pairs(video: str, new_video: str, sidecars: Iterable[str]) -> List[Tuple[str, str]]:
+    """Pair each sidecar of a video with the name it gets when the video is renamed.
+
+    The part of a sidecar's name after the video's stem is kept, so
+    'Show.E03.en.srt' follows 'Show.E03.mkv' to 'S01E03.en.srt'.
+
+    Args:
+        video (str): The video's current name
+        new_video (str): The video's new name
+        sidecars (Iterable[str]): The video's sidecar files
+
+    Returns:
+        List[Tuple[str, str]]: (old_name, new_name) pairs
+    """
+    old_stem = stem(video)
+    new_stem = stem(new_video)
+    return [(name, new_stem + name[len(old_stem):]) for name in sidecars]
+
+
+def companion_owners(pairs: Sequence[Tuple[str, str]]) -> Dict[int, int]:
+    """Find the renames that carry a sidecar along with its video.
+
+    A pair is a companion when its old name extends another pair's old stem
+    at a '.' or '-' and its new name extends that pair's new stem the same
+    way, as sidecar_pairs makes them. Lookups go through a stem dictionary
+    like match_sidecars, so the order of the pairs doesn't matter.
+
+    Args:
+        pairs (Sequence[Tuple[str, str]]): (old_name, new_name) pairs
+
+    Returns:
+        Dict[int, int]: Index of the video's pair by index of each companion pair
+    """
+    by_stem: Dict[str, int] = {}
+    for index, (old_name, _) in enumerate(pairs):
+        by_stem.setdefault(stem(old_name), index)
+    owners: Dict[int, int] = {}
+    for index, (old_name, new_name) in enumerate(pairs):
+        for end in reversed([match.start() for match in _STEM_SEPARATOR.finditer(old_name, 1)]):
+            owner = by_stem.get(old_name[:end])
+            if owner is None or owner == index:
+                continue
+            if new_name == stem(pairs[owner][1]) + old_name[end:]:
+                owners[index] = owner
+            break
+    # 'Show.E03.en.forced.srt' matches 'Show.E03.en.srt', it depends on the video all the same
+    for index, owner in owners.items():
+        while owner in owners:
+            owner = owners[owner]
+        owners[index] = owner
+    return owners
@@ -0,0 +1,225 @@
+import os
+import re
+from string import Formatter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from renamer_ordering import season_from_dirname
+
+DEFAULT_TEMPLATE = "S{season:02}E{episode:02}[-E{episode_end:02}]{ext}"
+
+# Fields a template may use, with sample values used to validate format specs
+TEMPLATE_FIELDS: Dict[str, object] = {
+    "show": "Show",
+    "season": 1,
+    "episode": 1,
+    "episode_end": 2,
+    "title": "Title",
+    "ext": ".mkv",
+    "original": "original name",
+}
+
+# Characters that are invalid in file names on common filesystems
+_UNSAFE_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+TitleLookup = Callable[[int, int], Optional[str]]
+
+
+def safe_component(value: str) -> str:
+    """Strip characters that can't appear in a file name from a show name or title."""
+    return _UNSAFE_CHARS.sub("", value).strip()
+
+
+def infer_show_name(directory: str) -> str:
+    """Guess the show name from a directory, skipping a season folder.
+
+    Args:
+        directory (str): Directory holding the episodes, e.g. '/tv/Show/Season 01'
+
+    Returns:
+        str: The show folder's name, e.g. 'Show'
+    """
+    path = os.path.normpath(os.path.abspath(directory)) if directory else ""
+    name = os.path.basename(path)
+    if name and season_from_dirname(name) is not None:
+        name = os.path.basename(os.path.dirname(path))
+    return safe_component(name)
+
+
+def _split_sections(template: str) -> List[Tuple[str, bool]]:
+    """Split a template into (text, optional) sections; '[...]' marks optional text.
+
+    '[[' and ']]' stand for literal brackets.
+    """
+    sections: List[Tuple[str, bool]] = []
+    text: List[str] = []
+    optional = False
+    index = 0
+    while index < len(template):
+        char = template[index]
+        if char in "[]" and template[index + 1:index + 2] == char:
+            text.append(char)
+            index += 2
+            continue
+        if char == "[":
+            if optional:
+                raise ValueError("Optional sections can't be nested")
+            sections.append(("".join(text), False))
+            text, optional = [], True
+        elif char == "]":
+            if not optional:
+                raise ValueError("Unmatched ']'")
+            sections.append(("".join(text), True))
+            text, optional = [], False
+        else:
+            text.append(char)
+        index += 1
+    if optional:
+        raise ValueError("Unclosed '['")
+    sections.append(("".join(text), False))
+    return [section for section in sections if section[0]]
+
+
+class NameTemplate:
+    """A naming template validated and compiled once, then applied to whole plans.
+
+    Templates use str.format fields, e.g. '{show} - S{season:02}E{episode:03}{ext}'.
+    Text in square brackets is only kept when every field inside has a
+    value, so '[-E{episode_end:02}]' only shows up for double episodes and
+    '[ - {title}]' only when a title is known.
+    """
+
+    def __init__(self, template: str = DEFAULT_TEMPLATE):
+        """Validate and compile the template.
+
+        Args:
+            template (str): The template
+
+        Raises:
+            ValueError: If the template is malformed, uses unknown fields or has no episode number
+        """
+        self.template = template
+        try:
+            sections = _split_sections(template)
+            formatter = Formatter()
+            self.sections: List[Tuple[str, Tuple[str, ...], bool]] = []
+            used = set()
+            for text, optional in sections:
+                fields = []
+                for _, field, spec, _ in formatter.parse(text):
+                    if field is None:
+                        continue
+                    if field not in TEMPLATE_FIELDS:
+                        raise ValueError(f"Unknown field {{{field}}}")
+                    if "{" in (spec or ""):
+                        raise ValueError("Nested fields are not supported")
+                    fields.append(field)
+                # Formatting the sample values catches bad format specs up front
+                text.format_map(TEMPLATE_FIELDS)
+                self.sections.append((text, tuple(fields), optional))
+                used.update(fields)
+        except (ValueError, IndexError, KeyError) as e:
+            raise ValueError(f"Invalid naming template: {str(e)}")
+        if "episode" not in used:
+            raise ValueError("Invalid naming template: it must contain {episode}")
+        self.fields = frozenset(used)
+        self.function = self._compile()
+
+    def _compile(self) -> Callable[..., str]:
+        """Parse the sections once into literal text and (field, spec, conversion) parts.
+
+        The returned function takes the field values in TEMPLATE_FIELDS order
+        and only formats the values, skipping optional sections with a
+        field that has no value.
+        """
+        formatter = Formatter()
+        positions = {field: index for index, field in enumerate(TEMPLATE_FIELDS)}
+        sections = []
+        for text, fields, optional in self.sections:
+            parts: List[object] = []
+            for literal, field, spec, conversion in formatter.parse(text):
+                if literal:
+                    parts.append(literal)
+                if field is not None:
+                    parts.append((positions[field], spec or "", conversion))
+            required = tuple(positions[field] for field in fields) if optional else ()
+            sections.append((tuple(parts), required))
+
+        def render(*values: object) -> str:
+            out = []
+            for parts, required in sections:
+                if any(values[index] is _EMPTY for index in required):
+                    continue
+                for part in parts:
+                    if part.__class__ is str:
+                        out.append(part)
+                        continue
+                    index, spec, conversion = part
+                    value = values[index]
+                    if value is _EMPTY:
+                        continue
+                    if conversion:
+                        value = formatter.convert_field(value, conversion)
+                    out.append(format(value, spec))
+            return "".join(out)
+
+        return render
+
+    def render(self, values: Dict[str, object]) -> str:
+        """Render one name.
+
+        Args:
+            values (Dict[str, object]): Field values; None or a missing key marks a field without a value
+
+        Returns:
+            str: The name
+        """
+        return self.function(*(_EMPTY if values.get(field) is None else values[field]
+                               for field in TEMPLATE_FIELDS))
+
+    def render_batch(self, files: Sequence[str], season: int, episodes: Sequence[int],
+                     spans: Optional[Sequence[int]] = None, show: str = "",
+                     titles: Optional[TitleLookup] = None) -> List[str]:
+        """Render the names of a whole plan.
+
+        Args:
+            files (Sequence[str]): Original names, for the extension and {original}
+            season (int): Season number
+            episodes (Sequence[int]): First episode number of each file
+            spans (Optional[Sequence[int]]): Number of episodes in each file, 1 if omitted
+            show (str): Show name
+            titles (Optional[TitleLookup]): Looks up the title of (season, episode)
+
+        Returns:
+            List[str]: New names, one per file
+        """
+        function = self.function
+        show_value = show or _EMPTY
+        want_title = titles is not None and "title" in self.fields
+        names = []
+        for index, name in enumerate(files):
+            # Same split as os.path.splitext for the extension-filtered names planned here
+            dot = name.rfind(".")
+            if dot > 0:
+                stem, ext = name[:dot], name[dot:]
+            else:
+                stem, ext = name, ""
+            episode = episodes[index]
+            span = spans[index] if spans is not None else 1
+            title = _EMPTY
+            if want_title:
+                found = titles(season, episode)
+                if found:
+                    title = safe_component(found)
+            names.append(function(show_value, season, episode,
+                                  episode + span - 1 if span > 1 else _EMPTY,
+                                  title, ext, stem))
+        return names
+
+
+class _EmptyValue:
+    """Marks a field without a value, left out of the name along with its optional section."""
+
+    __slots__ = ()
+
+
+_EMPTY = _EmptyValue()
+
@@ -0,0 +1,242 @@
+import os
+import re
+import csv
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+TITLE_DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "renamer_titles.sqlite3")
+# Seasons kept in memory; a preview only ever touches the seasons of one show
+SEASON_CACHE_SIZE = 64
+IMPORT_BATCH_SIZE = 5000
+
+# (show, season, episode, title)
+TitleRow = Tuple[str, int, int, str]
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    show_key TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    episode INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    PRIMARY KEY (show_key, season, episode)
+) WITHOUT ROWID
+"""
+
+
+def show_key(show: str) -> str:
+    """Normalize a show name so 'Doctor.Who' and 'doctor who' find the same titles."""
+    return _NON_ALNUM.sub(" ", show.casefold()).strip()
+
+
+def _rows_from_records(records: Iterable[Dict], show: Optional[str], source: str
+                       ) -> Iterator[TitleRow]:
+    for number, record in enumerate(records, 1):
+        try:
+            name = record.get("show") or show
+            if not name:
+                raise ValueError("no show name")
+            title = str(record["title"]).strip()
+            if title:
+                yield name, int(record["season"]), int(record["episode"]), title
+        except (KeyError, TypeError, ValueError) as e:
+            logging.error(f"Skipping record {number} of {source}: {str(e)}")
+
+
+def read_csv(path: str, show: Optional[str] = None) -> Iterator[TitleRow]:
+    """Read titles from a CSV file with a show,season,episode,title header.
+
+    The show column may be left out when a show name is given.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        yield from _rows_from_records(csv.DictReader(f), show, path)
+
+
+def read_json(path: str, show: Optional[str] = None) -> Iterator[TitleRow]:
+    """Read titles from JSON.
+
+    Accepts a list of {show, season, episode, title} objects, or an object
+    with a "show" name and an "episodes" list of {season, episode, title}.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        show = data.get("show") or show
+        data = data.get("episodes", [])
+    yield from _rows_from_records(data, show, path)
+
+
+class ShowTitles:
+    """Title lookup for one show, reading each season from the database once."""
+
+    def __init__(self, database: "EpisodeTitleDB", show: str):
+        self.database = database
+        self.show = show
+
+    def __call__(self, season: int, episode: int) -> Optional[str]:
+        return self.database.season_titles(self.show, season).get(episode)
+
+
+class EpisodeTitleDB:
+    """Offline episode titles in an indexed SQLite file.
+
+    Lookups read one season at a time through the primary key index and
+    keep recent seasons in an LRU, so renaming a large season costs one
+    query and then a dictionary lookup per file. The database file is only
+    created by the first import.
+    """
+
+    def __init__(self, path: str = TITLE_DB_FILE, cache_size: int = SEASON_CACHE_SIZE):
+        """Initialize the database.
+
+        Args:
+            path (str): SQLite file holding the titles
+            cache_size (int): Number of seasons kept in memory
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.lock = threading.RLock()
+        self.connection = None
+        self.seasons: "OrderedDict[Tuple[str, int], Dict[int, str]]" = OrderedDict()
+        self.shows: Dict[str, ShowTitles] = {}
+        # Bumped by every import, so plans know their titles may be outdated
+        self.version = 0
+
+    def _connect(self, create: bool = False):
+        if self.connection is None:
+            if not create and not os.path.isfile(self.path):
+                return None
+            import sqlite3  # Only loaded once titles are actually used
+
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute(_SCHEMA)
+        return self.connection
+
+    def titles_for(self, show: str) -> ShowTitles:
+        """Get the title lookup of a show, the same object until the next import.
+
+        Args:
+            show (str): Show name
+
+        Returns:
+            ShowTitles: Callable mapping (season, episode) to a title or None
+        """
+        key = show_key(show)
+        with self.lock:
+            titles = self.shows.get(key)
+            if titles is None:
+                titles = self.shows[key] = ShowTitles(self, key)
+            return titles
+
+    def season_titles(self, show: str, season: int) -> Dict[int, str]:
+        """Get every known title of one season.
+
+        Args:
+            show (str): Normalized show name, see show_key()
+            season (int): Season number
+
+        Returns:
+            Dict[int, str]: Titles by episode number
+        """
+        cache_key = (show, season)
+        with self.lock:
+            titles = self.seasons.get(cache_key)
+            if titles is not None:
+                self.seasons.move_to_end(cache_key)
+                return titles
+            titles = {}
+            try:
+                connection = self._connect()
+                if connection is not None:
+                    titles = dict(connection.execute(
+                        "SELECT episode, title FROM episodes WHERE show_key = ? AND season = ?",
+                        (show, season)))
+            except Exception as e:
+                logging.error(f"Error reading titles from {self.path}: {str(e)}")
+            self.seasons[cache_key] = titles
+            while len(self.seasons) > self.cache_size:
+                self.seasons.popitem(last=False)
+            return titles
+
+    def add_titles(self, rows: Iterable[TitleRow]) -> int:
+        """Store titles, replacing existing titles of the same episodes.
+
+        Args:
+            rows (Iterable[TitleRow]): (show, season, episode, title) rows
+
+        Returns:
+            int: Number of titles stored
+        """
+        count = 0
+        with self.lock:
+            connection = self._connect(create=True)
+            with connection:
+                batch: List[Tuple[str, int, int, str]] = []
+                for show, season, episode, title in rows:
+                    batch.append((show_key(show), season, episode, title))
+                    if len(batch) >= IMPORT_BATCH_SIZE:
+                        connection.executemany(
+                            "INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?)", batch)
+                        count += len(batch)
+                        batch = []
+                if batch:
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?)", batch)
+                    count += len(batch)
+            self.seasons.clear()
+            self.shows.clear()
+            self.version += 1
+        return count
+
+    def import_file(self, path: str, show: Optional[str] = None) -> int:
+        """Import titles from a CSV, JSON or SQLite file.
+
+        A SQLite source needs an episodes table with show, season, episode
+        and title columns.
+
+        Args:
+            path (str): File to import
+            show (Optional[str]): Show name for files that don't name the show
+
+        Returns:
+            int: Number of titles imported
+
+        Raises:
+            ValueError: If the file type is not supported
+        """
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".csv":
+            return self.add_titles(read_csv(path, show))
+        if ext == ".json":
+            return self.add_titles(read_json(path, show))
+        if ext in (".sqlite", ".sqlite3", ".db"):
+            return self._import_sqlite(path, show)
+        raise ValueError(f"Unsupported title file type: {ext or path}")
+
+    def _import_sqlite(self, path: str, show: Optional[str]) -> int:
+        import sqlite3
+
+        source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            columns = {row[1] for row in source.execute("PRAGMA table_info(episodes)")}
+            if not {"season", "episode", "title"} <= columns:
+                raise ValueError(f"{path} has no episodes table with season, episode and title")
+            select = "SELECT {}, season, episode, title FROM episodes".format(
+                "show" if "show" in columns else "NULL")
+            records = ({"show": name, "season": season, "episode": episode, "title": title}
+                       for name, season, episode, title in source.execute(select))
+            return self.add_titles(_rows_from_records(records, show, path))
+        finally:
+            source.close()
+
+    def close(self):
+        """Close the database file."""
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
@@ -0,0 +1,343 @@
+import os
+import time
+import errno
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from renamer_duplicates import full_hash, partial_hash
+from renamer_profiling import instrumentation
+
+# Suffix of a copy in progress; an interrupted copy resumes from its size
+PART_SUFFIX = ".tvrenamer-part"
+COPY_CHUNK = 8 * 1024 * 1024
+DEFAULT_TRANSFER_WORKERS = 4
+# Files copied at once per device, more only makes spinning disks seek
+DEVICE_CONCURRENCY = 2
+# Seconds between progress callbacks
+TRANSFER_PROGRESS_INTERVAL = 0.1
+
+# (bytes done, bytes total, bytes per second)
+TransferCallback = Callable[[int, int, float], None]
+ErrorCallback = Callable[[str, Exception], None]
+
+# Errors meaning a kernel copy call doesn't support this pair of files
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+
+
+def format_bytes(count: float) -> str:
+    """Format a byte count for display, e.g. '1.5 GB'."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(count) < 1024:
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} TB"
+
+
+def check_destination(directory: str, destination: str):
+    """Refuse a destination that is the directory being renamed, however it is spelled.
+
+    Args:
+        directory (str): Directory the files are renamed in
+        destination (str): Directory they would be moved into, empty for none
+
+    Raises:
+        ValueError: If both paths lead to the same directory
+    """
+    if not destination:
+        return
+    try:
+        same = os.path.samefile(directory, destination)
+    except OSError:
+        return  # A destination that doesn't exist yet can't be the directory
+    if same:
+        raise ValueError(f"The destination is the directory being renamed: {destination}")
+
+
+def device_of(path: str) -> int:
+    """Get the device of a path, or of its closest existing parent for paths not created yet."""
+    path = os.path.abspath(path)
+    while True:
+        try:
+            return os.stat(path).st_dev
+        except FileNotFoundError:
+            parent = os.path.dirname(path)
+            if parent == path:
+                raise
+            path = parent
+
+
+class DeviceLimiter:
+    """Limits how many transfers read from or write to each device at once."""
+
+    def __init__(self, limit: int = DEVICE_CONCURRENCY):
+        """Initialize the limiter.
+
+        Args:
+            limit (int): Transfers allowed per device
+        """
+        self.limit = max(1, limit)
+        self.semaphores: Dict[int, threading.BoundedSemaphore] = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, *devices: int) -> Iterator[None]:
+        """Hold a slot on every given device, acquired in a fixed order so holders never deadlock."""
+        with self.lock:
+            semaphores = [self.semaphores.setdefault(device, threading.BoundedSemaphore(self.limit))
+                          for device in sorted(set(devices))]
+        for semaphore in semaphores:
+            semaphore.acquire()
+        try:
+            yield
+        finally:
+            for semaphore in reversed(semaphores):
+                semaphore.release()
+
+
+def _copy_range(source_fd: int, target_fd: int, offset: int, size: int,
+                on_bytes: Callable[[int], None],
+                cancel_event: Optional[threading.Event]) -> int:
+    """Copy source bytes from offset to size into the same offsets of target.
+
+    Tries copy_file_range, then sendfile, so the data never passes through
+    user space, and falls back to pread and write.
+
+    Returns:
+        int: Offset reached, less than size if cancelled
+    """
+    methods = []
+    if hasattr(os, "copy_file_range"):
+        methods.append("copy_file_range")
+    if hasattr(os, "sendfile"):
+        methods.append("sendfile")
+    methods.append("read")
+    while offset < size:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        count = min(COPY_CHUNK, size - offset)
+        method = methods[0]
+        try:
+            if method == "copy_file_range":
+                copied = os.copy_file_range(source_fd, target_fd, count, offset, offset)
+            elif method == "sendfile":
+                os.lseek(target_fd, offset, os.SEEK_SET)
+                copied = os.sendfile(target_fd, source_fd, offset, count)
+            else:
+                copied = os.pwrite(target_fd, os.pread(source_fd, count, offset), offset)
+        except OSError as e:
+            if method != "read" and e.errno in _UNSUPPORTED:
+                methods.pop(0)
+                continue
+            raise
+        if copied == 0:
+            raise OSError(errno.EIO, "Source ended before its recorded size")
+        offset += copied
+        on_bytes(copied)
+    return offset
+
+
+def _same_content(source: str, target: str, size: int) -> bool:
+    """Compare two files byte for byte through their hashes.
+
+    The size and the head and tail chunks reject most mismatches cheaply;
+    a source is only ever removed after its whole content matched.
+    """
+    return (os.path.getsize(target) == size
+            and partial_hash(source, size) == partial_hash(target, size)
+            and full_hash(source) == full_hash(target))
+
+
+def _copy_to_part(source: str, part: str, size: int, on_bytes: Callable[[int], None],
+                  cancel_event: Optional[threading.Event], resume: bool) -> Optional[bool]:
+    """Copy a file into its part file, picking up from the part's size if resuming.
+
+    Returns:
+        Optional[bool]: None if cancelled, otherwise whether an earlier copy was resumed
+    """
+    source_fd = os.open(source, os.O_RDONLY)
+    try:
+        target_fd = os.open(part, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            offset = os.fstat(target_fd).st_size if resume else 0
+            if offset > size or not resume:
+                os.ftruncate(target_fd, 0)
+                offset = 0
+            if offset:
+                instrumentation.count("copies_resumed")
+                on_bytes(offset)
+            if _copy_range(source_fd, target_fd, offset, size, on_bytes, cancel_event) < size:
+                return None
+            os.fsync(target_fd)
+            return offset > 0
+        finally:
+            os.close(target_fd)
+    finally:
+        os.close(source_fd)
+
+
+def move_file(source: str, target: str, on_bytes: Optional[Callable[[int], None]] = None,
+              cancel_event: Optional[threading.Event] = None) -> bool:
+    """Move a file, renaming on one device and copying across devices.
+
+    A cross-device copy goes to target + PART_SUFFIX, picks up from the
+    size of an existing part file and is compared with the source in full
+    before it takes the target name and the source is removed. A resumed
+    copy that doesn't match is copied again from the start.
+
+    Args:
+        source (str): File to move
+        target (str): New path, its directory is created if needed
+        on_bytes (Optional[Callable[[int], None]]): Called with each number of bytes moved
+        cancel_event (Optional[threading.Event]): Stops a copy between chunks, keeping the part file
+
+    Returns:
+        bool: True if the file was moved, False if a copy was cancelled
+
+    Raises:
+        FileExistsError: If the target exists with different content
+        ValueError: If the target is the source file itself
+        OSError: If the move fails
+    """
+    on_bytes = on_bytes or (lambda count: None)
+    size = os.path.getsize(source)
+    if os.path.exists(target):
+        if os.path.samefile(source, target):
+            # Removing the "copy" would remove the only file
+            raise ValueError(f"Source and target are the same file: {target}")
+        if not _same_content(source, target, size):
+            raise FileExistsError(f"File already exists: {target}")
+        # An earlier run copied the file but stopped before removing the source
+        os.unlink(source)
+        on_bytes(size)
+        return True
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    try:
+        os.rename(source, target)
+        on_bytes(size)
+        return True
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    part = target + PART_SUFFIX
+    st = os.stat(source)
+    resumed = _copy_to_part(source, part, size, on_bytes, cancel_event, resume=True)
+    if resumed is None:
+        return False
+    if not _same_content(source, part, size):
+        if resumed:
+            # The part file was damaged or came from another file, start over
+            logging.error(f"Resumed copy of {source} does not match, copying again")
+            if _copy_to_part(source, part, size, on_bytes, cancel_event, resume=False) is None:
+                return False
+        if not resumed or not _same_content(source, part, size):
+            os.unlink(part)
+            raise OSError(errno.EIO, f"Copy of {source} does not match the source")
+    os.utime(part, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.rename(part, target)
+    os.unlink(source)
+    return True
+
+
+class TransferResult:
+    """Outcome of moving a group of files."""
+
+    def __init__(self, total: int, total_bytes: int):
+        """Initialize an empty result.
+
+        Args:
+            total (int): Number of files to move
+            total_bytes (int): Their combined size
+        """
+        self.total = total
+        self.total_bytes = total_bytes
+        self.done: List[Tuple[str, str]] = []
+        self.errors: List[Tuple[str, str]] = []
+        self.bytes_done = 0
+        self.seconds = 0.0
+        self.cancelled = False
+
+    @property
+    def count(self) -> int:
+        return len(self.done)
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.bytes_done / self.seconds if self.seconds else 0.0
+
+
+def transfer_files(pairs: List[Tuple[str, str]], max_workers: int = DEFAULT_TRANSFER_WORKERS,
+                   per_device: int = DEVICE_CONCURRENCY,
+                   on_transfer: Optional[TransferCallback] = None,
+                   on_error: Optional[ErrorCallback] = None,
+                   cancel_event: Optional[threading.Event] = None) -> TransferResult:
+    """Move files in parallel, reporting progress in bytes on the calling thread.
+
+    Args:
+        pairs (List[Tuple[str, str]]): (source, target) paths
+        max_workers (int): Files moved at once overall
+        per_device (int): Files moved at once per source or target device
+        on_transfer (Optional[TransferCallback]): Called with (bytes done, bytes total, bytes per second)
+        on_error (Optional[ErrorCallback]): Called with (source, error) when a move fails
+        cancel_event (Optional[threading.Event]): Stops between chunks; partial copies resume next time
+
+    Returns:
+        TransferResult: The moved pairs, failures and throughput
+    """
+    sizes: Dict[str, int] = {}
+    for source, _ in pairs:
+        try:
+            sizes[source] = os.path.getsize(source)
+        except OSError:
+            sizes[source] = 0
+    result = TransferResult(len(pairs), sum(sizes.values()))
+    if not pairs:
+        return result
+
+    limiter = DeviceLimiter(per_device)
+    lock = threading.Lock()
+    progress = [0]
+    started = time.perf_counter()
+
+    def add(count: int):
+        with lock:
+            progress[0] += count
+
+    def move(source: str, target: str) -> Tuple[str, str, Optional[Exception], bool]:
+        if cancel_event is not None and cancel_event.is_set():
+            return source, target, None, False
+        try:
+            with limiter.hold(device_of(source), device_of(target)):
+                return source, target, None, move_file(source, target, add, cancel_event)
+        except Exception as e:
+            return source, target, e, False
+
+    def report():
+        with lock:
+            done = progress[0]
+        result.bytes_done = done
+        result.seconds = time.perf_counter() - started
+        if on_transfer:
+            on_transfer(done, result.total_bytes, result.bytes_per_sec)
+
+    with instrumentation.phase("transfer"), \
+            ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pairs)))) as executor:
+        pending = {executor.submit(move, source, target) for source, target in pairs}
+        while pending:
+            finished, pending = wait(pending, timeout=TRANSFER_PROGRESS_INTERVAL)
+            for future in finished:
+                source, target, error, moved = future.result()
+                if error is not None:
+                    logging.error(f"Error moving {source}: {str(error)}")
+                    result.errors.append((source, str(error)))
+                    if on_error:
+                        on_error(source, error)
+                elif moved:
+                    result.done.append((source, target))
+                else:
+                    result.cancelled = True
+            report()
+    instrumentation.count("bytes_moved", result.bytes_done)
+    return result
@@ -0,0 +1,212 @@
+import os
+import sys
+import time
+import queue
+import select
+import struct
+import logging
+import threading
+from typing import Optional, Set, Tuple
+from renamer_index import directory_signature
+
+# Quiet time that ends a burst of changes, and the longest a burst is held back
+COALESCE_SECONDS = 0.3
+MAX_COALESCE_SECONDS = 2.0
+# Seconds between directory stats when inotify isn't available
+POLL_INTERVAL = 1.0
+
+# ("changes", names) or ("rescan", None)
+WatchEvent = Tuple[str, Optional[Set[str]]]
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+               | _IN_DELETE_SELF | _IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_inotify():
+    """Get libc with the inotify calls, None where inotify isn't available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        import ctypes  # Only loaded once a directory is actually watched
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class DirectoryWatcher:
+    """Watch one directory on a worker thread and post coalesced changes through a queue.
+
+    Uses inotify where available, blocking without a timeout while the
+    directory is quiet, and otherwise stats the directory every
+    POLL_INTERVAL seconds, listing it only when its mtime changed. The
+    queue receives ("changes", names) with the set of entries added,
+    removed, renamed or rewritten during a burst, or ("rescan", None) when
+    changes may have been missed. Nothing is posted after stop().
+    """
+
+    def __init__(self, directory: str, coalesce: float = COALESCE_SECONDS,
+                 poll_interval: float = POLL_INTERVAL, use_inotify: bool = True):
+        """Initialize the watcher.
+
+        Args:
+            directory (str): Directory to watch
+            coalesce (float): Quiet seconds that end a burst of changes
+            poll_interval (float): Seconds between checks when polling
+            use_inotify (bool): Use inotify where available, otherwise always poll
+        """
+        self.directory = directory
+        self.coalesce = coalesce
+        self.poll_interval = poll_interval
+        self.queue: "queue.Queue[WatchEvent]" = queue.Queue()
+        self.stop_event = threading.Event()
+        self.libc = _load_inotify() if use_inotify else None
+        self.backend = "inotify" if self.libc is not None else "polling"
+        self.wake_read, self.wake_write = os.pipe()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start watching in the background."""
+        self.thread.start()
+
+    def stop(self):
+        """Stop watching, waking the worker so it exits right away."""
+        if self.stop_event.is_set():
+            return
+        self.stop_event.set()
+        os.write(self.wake_write, b"\0")
+        if self.thread.is_alive():
+            self.thread.join()
+        os.close(self.wake_read)
+        os.close(self.wake_write)
+
+    @property
+    def stopped(self) -> bool:
+        return self.stop_event.is_set()
+
+    def _post(self, kind: str, names: Optional[Set[str]] = None):
+        if not self.stopped:
+            self.queue.put((kind, names))
+
+    def _run(self):
+        try:
+            if self.libc is not None:
+                try:
+                    self._watch_inotify()
+                    return
+                except OSError as e:
+                    logging.error(f"Error watching {self.directory} with inotify, polling instead: "
+                                  f"{str(e)}")
+                    self.backend = "polling"
+            self._watch_polling()
+        except Exception as e:
+            logging.error(f"Error watching {self.directory}: {str(e)}")
+            self._post("rescan")
+
+    def _watch_inotify(self):
+        import ctypes
+
+        fd = self.libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        try:
+            if self.libc.inotify_add_watch(fd, os.fsencode(self.directory), _WATCH_MASK) < 0:
+                raise OSError(ctypes.get_errno(), f"Can't watch {self.directory}")
+            poller = select.poll()
+            poller.register(fd, select.POLLIN)
+            poller.register(self.wake_read, select.POLLIN)
+            pending: Set[str] = set()
+            first = last = 0.0
+            while not self.stopped:
+                if pending:
+                    now = time.monotonic()
+                    deadline = min(last + self.coalesce, first + MAX_COALESCE_SECONDS)
+                    timeout = max(0, int((deadline - now) * 1000))
+                else:
+                    timeout = None  # Sleep until something happens
+                ready = poller.poll(timeout)
+                if self.stopped:
+                    return
+                if ready:
+                    lost = self._read_events(fd, pending)
+                    if lost:
+                        pending.clear()
+                        self._post("rescan")
+                        if lost == "gone":
+                            return
+                        continue
+                    now = time.monotonic()
+                    if pending:
+                        first = first if first else now
+                        last = now
+                    continue
+                if pending:
+                    self._post("changes", set(pending))
+                    pending.clear()
+                    first = 0.0
+        finally:
+            os.close(fd)
+
+    def _read_events(self, fd: int, pending: Set[str]) -> Optional[str]:
+        """Add the names of every queued event to pending.
+
+        Returns:
+            Optional[str]: "overflow" if events were dropped, "gone" if the directory went away
+        """
+        while True:
+            try:
+                data = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                return None
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & _IN_Q_OVERFLOW:
+                    return "overflow"
+                if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                    return "gone"
+                if name and not mask & _IN_ISDIR:
+                    pending.add(os.fsdecode(name))
+
+    def _watch_polling(self):
+        signature = directory_signature(self.directory)
+        try:
+            names = set(os.listdir(self.directory))
+        except OSError:
+            names = set()
+        while not self.stop_event.wait(self.poll_interval):
+            current = directory_signature(self.directory)
+            if current == signature:
+                continue
+            # Let a burst of changes settle before listing
+            if self.stop_event.wait(self.coalesce):
+                return
+            signature = directory_signature(self.directory)
+            try:
+                listed = set(os.listdir(self.directory))
+            except OSError:
+                self._post("rescan")
+                return
+            changed = names.symmetric_difference(listed)
+            names = listed
+            if changed:
+                self._post("changes", changed)
@@ -0,0 +1,57 @@
+import os
+
+import renamer_duplicates
+from renamer_duplicates import PARTIAL_CHUNK, HashCache, find_duplicates
+from renamer_engine import RenameEngine, RenamePlan
+
+
+def write(path, data: bytes):
+    path.write_bytes(data)
+    return path.name
+
+
+def test_same_size_different_content_is_not_a_duplicate(tmp_path):
+    names = [write(tmp_path / "a.mkv", b"a" * 100), write(tmp_path / "b.mkv", b"b" * 100)]
+    assert find_duplicates(str(tmp_path), names, cache=HashCache()) == {}
+
+
+def test_small_identical_files_and_empty_files(tmp_path):
+    names = [write(tmp_path / "a.mkv", b"same"), write(tmp_path / "b.mkv", b"same"),
+             write(tmp_path / "c.mkv", b""), write(tmp_path / "d.mkv", b"")]
+    assert find_duplicates(str(tmp_path), names, cache=HashCache()) == {"b.mkv": "a.mkv"}
+
+
+def test_full_hash_confirms_a_partial_match(tmp_path, monkeypatch):
+    head = b"h" * PARTIAL_CHUNK
+    tail = b"t" * PARTIAL_CHUNK
+    names = [write(tmp_path / "a.mkv", head + b"1" * 10 + tail),
+             write(tmp_path / "b.mkv", head + b"2" * 10 + tail),
+             write(tmp_path / "c.mkv", head + b"1" * 10 + tail)]
+    hashed = []
+    real = renamer_duplicates.full_hash
+    monkeypatch.setattr(renamer_duplicates, "full_hash",
+                        lambda path: hashed.append(os.path.basename(path)) or real(path))
+
+    cache = HashCache()
+    # The middle bytes differ, so only the full hash tells b.mkv apart
+    assert find_duplicates(str(tmp_path), names, cache=cache) == {"c.mkv": "a.mkv"}
+    assert sorted(hashed) == ["a.mkv", "b.mkv", "c.mkv"]
+
+    hashed.clear()
+    assert find_duplicates(str(tmp_path), names, cache=cache) == {"c.mkv": "a.mkv"}
+    assert hashed == []
+
+
+def test_skip_duplicates_keeps_exactly_one_copy(tmp_path):
+    for name in ["Show.E01.mkv", "Show.E01.copy.mkv", "Show.E01.again.mkv"]:
+        (tmp_path / name).write_bytes(b"episode one")
+    (tmp_path / "Show.E02.mkv").write_bytes(b"episode two")
+    engine = RenameEngine(directory=str(tmp_path), skip_duplicates=True)
+    plan = RenamePlan()
+    engine.plan_files(plan, os.listdir(str(tmp_path)))
+    plan.update(engine)
+    renamed = dict(plan.pairs())
+    kept = [name for name in renamed if name.startswith("Show.E01")]
+    assert len(kept) == 1
+    assert sorted(renamed.values()) == ["S01E01.mkv", "S01E02.mkv"]
+    assert sum(map(plan.is_duplicate, range(len(plan)))) == 2
@@ -0,0 +1,52 @@
+import os
+import pytest
+from renamer_filter import FileFilter
+
+
+def test_extensions_are_case_insensitive():
+    file_filter = FileFilter("mkv, .MP4")
+    assert file_filter.matches_name("Show.S01E01.MKV")
+    assert file_filter.matches_name("Show.S01E02.mp4")
+    assert not file_filter.matches_name("Show.S01E01.srt")
+
+
+def test_globs_match_the_whole_name():
+    file_filter = FileFilter(".mkv", include="show*", exclude="*sample*")
+    assert file_filter.matches_name("Show.S01E01.mkv")  # Case-insensitive
+    assert not file_filter.matches_name("The.Show.mkv")
+    assert not file_filter.matches_name("Show.S01E01.sample.mkv")
+
+
+def test_regex_patterns_match_anywhere_in_the_name():
+    file_filter = FileFilter(".mkv", include="re:S01;re:^extra", exclude="re:sample")
+    assert file_filter.matches_name("Show.S01E01.mkv")
+    assert file_filter.matches_name("Extra.mkv")
+    assert not file_filter.matches_name("Show.S01E01.sample.mkv")
+    assert not file_filter.matches_name("Show.S02E01.mkv")
+
+
+def test_invalid_regex_is_refused():
+    with pytest.raises(ValueError):
+        FileFilter(".mkv", include="re:(")
+
+
+def test_minimum_size_and_header_sniffing(tmp_path):
+    small = tmp_path / "small.mkv"
+    small.write_bytes(b"\x1a\x45\xdf\xa3")
+    fake = tmp_path / "fake.mkv"
+    fake.write_bytes(b"not a video" * 200)
+    real = tmp_path / "real.mkv"
+    real.write_bytes(b"\x1a\x45\xdf\xa3" + bytes(2000))
+
+    entries = {entry.name: entry for entry in os.scandir(tmp_path)}
+    sized = FileFilter(".mkv", min_size=1000)
+    assert not sized.matches_entry(entries["small.mkv"])
+    assert sized.matches_entry(entries["fake.mkv"])
+    sniffing = FileFilter(".mkv", sniff=True)
+    assert sniffing.matches_entry(entries["real.mkv"])
+    assert not sniffing.matches_entry(entries["fake.mkv"])
+
+
+def test_key_changes_with_the_rules():
+    assert FileFilter(".mkv").key != FileFilter(".mkv", exclude="*sample*").key
+    assert FileFilter(".mkv,.avi").key == FileFilter(".avi,.mkv").key
@@ -0,0 +1,101 @@
+import os
+import time
+
+import renamer_index
+from renamer_index import DirectoryIndexCache, directory_signature
+from renamer_ordering import sort_keys
+
+FILES = ["Show.E01.mkv", "Show.E02.mkv"]
+
+
+def settle(directory):
+    """Date a directory back past the racy window so its listing can be trusted."""
+    past = time.time() - 60
+    os.utime(directory, (past, past))
+    return directory_signature(directory)
+
+
+def put(cache, directory, filter_key="f"):
+    cache.put(str(directory), filter_key, settle(directory), FILES, sort_keys(FILES))
+
+
+def test_hit_until_the_directory_changes(tmp_path):
+    cache = DirectoryIndexCache()
+    put(cache, tmp_path)
+    entry = cache.get(str(tmp_path), "f")
+    assert entry is not None and entry.files == FILES
+    assert cache.get(str(tmp_path), "other filter") is None
+
+    (tmp_path / "Show.E03.mkv").write_text("")
+    assert cache.get(str(tmp_path), "f") is None
+    # The stale entry is dropped, not only skipped
+    settle(tmp_path)
+    assert cache.get(str(tmp_path), "f") is None
+
+
+def test_replaced_directory_with_the_same_mtime_is_a_miss(tmp_path):
+    directory = tmp_path / "Season 01"
+    directory.mkdir()
+    cache = DirectoryIndexCache()
+    put(cache, directory)
+    mtime_ns = os.stat(directory).st_mtime_ns
+
+    # Keep the old directory so its inode can't be reused
+    directory.rename(tmp_path / "old")
+    directory.mkdir()
+    os.utime(directory, ns=(mtime_ns, mtime_ns))
+    assert directory_signature(str(directory))[0] == mtime_ns
+    assert cache.get(str(directory), "f") is None
+
+
+def test_racy_entries_are_never_trusted(tmp_path, monkeypatch):
+    cache = DirectoryIndexCache()
+    cache.put(str(tmp_path), "f", directory_signature(str(tmp_path)), FILES, sort_keys(FILES))
+    assert cache.get(str(tmp_path), "f") is None
+
+    signature = settle(tmp_path)
+    scanned_at = signature[0] / 1e9 + renamer_index.RACY_WINDOW_SECONDS - 0.5
+    monkeypatch.setattr(renamer_index.time, "time", lambda: scanned_at)
+    cache.put(str(tmp_path), "f", signature, FILES, sort_keys(FILES))
+    assert cache.get(str(tmp_path), "f") is None
+
+    monkeypatch.setattr(renamer_index.time, "time", lambda: scanned_at + 1)
+    cache.put(str(tmp_path), "f", signature, FILES, sort_keys(FILES))
+    assert cache.get(str(tmp_path), "f") is not None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    directories = []
+    for name in "abc":
+        directory = tmp_path / name
+        directory.mkdir()
+        directories.append(directory)
+    cache = DirectoryIndexCache(max_entries=2)
+    put(cache, directories[0])
+    put(cache, directories[1])
+    assert cache.get(str(directories[0]), "f") is not None
+    put(cache, directories[2])
+    assert cache.get(str(directories[1]), "f") is None
+    assert cache.get(str(directories[0]), "f") is not None
+    assert cache.get(str(directories[2]), "f") is not None
+
+
+def test_invalidate_and_persist(tmp_path):
+    path = str(tmp_path / "index.json")
+    directory = tmp_path / "show"
+    directory.mkdir()
+    cache = DirectoryIndexCache(path=path)
+    signature = settle(directory)
+    for filter_key in ["f", "other filter"]:
+        cache.put(str(directory), filter_key, signature, FILES, sort_keys(FILES))
+    cache.save()
+
+    loaded = DirectoryIndexCache(path=path)
+    loaded.load()
+    entry = loaded.get(str(directory), "f")
+    assert entry is not None
+    assert entry.files == FILES and entry.keys == sort_keys(FILES)
+
+    loaded.invalidate(str(directory))
+    assert loaded.get(str(directory), "f") is None
+    assert loaded.get(str(directory), "other filter") is None
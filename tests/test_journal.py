@@ -0,0 +1,166 @@
+import os
+import pytest
+from renamer_engine import RenameEngine
+from renamer_journal import RenameBatch, RenameJournal, UndoHistory, is_temp_name
+
+
+class Crash(BaseException):
+    """Stops a batch like a killed process, past the engine's error handling."""
+
+
+def make_files(directory, names):
+    for name in names:
+        (directory / name).write_text(name)
+
+
+def contents(directory):
+    return {path.name: path.read_text() for path in directory.iterdir()}
+
+
+def crash_after(monkeypatch, renames):
+    """Let a number of renames through, then crash on the next one."""
+    real_rename = os.rename
+    calls = []
+
+    def rename(source, target):
+        if len(calls) == renames:
+            raise Crash()
+        calls.append(source)
+        real_rename(source, target)
+
+    monkeypatch.setattr(os, "rename", rename)
+
+
+# A swap and a three-name rotation plus a chain: 3 + 4 + 2 operations
+PAIRS = [("a", "b"), ("b", "a"),
+         ("x", "y"), ("y", "z"), ("z", "x"),
+         ("c1", "c2"), ("c2", "c3")]
+FILES = ["a", "b", "x", "y", "z", "c1", "c2"]
+
+
+@pytest.mark.parametrize("renames", range(9))
+@pytest.mark.parametrize("roll_forward", [True, False])
+def test_recovery_after_a_crash(tmp_path, monkeypatch, renames, roll_forward):
+    directory = tmp_path / "files"
+    directory.mkdir()
+    make_files(directory, FILES)
+    journal_path = str(tmp_path / "journal.jsonl")
+    # Crashes land between fsyncs, so recovery relies on every record being flushed
+    engine = RenameEngine(journal=RenameJournal(journal_path, fsync_every=4))
+
+    crash_after(monkeypatch, renames)
+    with pytest.raises(Crash):
+        engine.apply_plan(PAIRS, directory=str(directory))
+    monkeypatch.undo()
+    # The killed process's file, and its lock, are closed by the OS
+    engine.journal.file.close()
+
+    restarted = RenameEngine(journal=RenameJournal(journal_path))
+    assert restarted.pending_recovery()
+    results = restarted.recover(roll_forward)
+    assert len(results) == 1 and results[0].errors == []
+    assert not restarted.pending_recovery()
+
+    files = contents(directory)
+    assert not any(is_temp_name(name) for name in files)
+    if roll_forward:
+        assert files == {new: old for old, new in PAIRS}
+        assert set(results[0].settled) <= set(PAIRS)
+        # The completed batch can be undone
+        restarted.undo_last()
+        assert contents(directory) == {name: name for name in FILES}
+    else:
+        assert files == {name: name for name in FILES}
+
+
+def test_committed_batches_leave_nothing_to_recover(tmp_path):
+    directory = tmp_path / "files"
+    directory.mkdir()
+    make_files(directory, FILES)
+    journal = RenameJournal(str(tmp_path / "journal.jsonl"))
+    engine = RenameEngine(journal=journal)
+    result = engine.apply_plan(PAIRS, directory=str(directory))
+    assert result.errors == []
+    assert journal.pending() == []
+    assert os.path.getsize(journal.path) == 0
+
+
+def test_undo_history_compacts_to_its_limit(tmp_path):
+    path = str(tmp_path / "undo.jsonl")
+    history = UndoHistory(path, limit=4)
+    for number in range(6):
+        history.append(RenameBatch("dir", [(f"old{number}", f"new{number}")]))
+    # Compaction runs once the history grows past limit + limit // 4
+    assert len(history) == 4
+
+    reopened = UndoHistory(path, limit=4)
+    assert len(reopened) == 4
+    assert [reopened.pop().pairs for _ in range(4)] == [
+        [("old5", "new5")], [("old4", "new4")], [("old3", "new3")], [("old2", "new2")]]
+    with pytest.raises(IndexError):
+        reopened.pop()
+
+
+def test_undo_history_drops_a_torn_last_batch(tmp_path):
+    path = str(tmp_path / "undo.jsonl")
+    history = UndoHistory(path)
+    history.append(RenameBatch("dir", [("a", "b")], "dest", ["b"]))
+    with open(path, "ab") as f:
+        f.write(b'{"directory":"dir","pa')
+    reopened = UndoHistory(path)
+    assert len(reopened) == 1
+    batch = reopened.pop()
+    assert (batch.pairs, batch.destination, batch.moved) == ([("a", "b")], "dest", ["b"])
+
+
+def test_undo_history_shared_by_several_processes(tmp_path):
+    path = str(tmp_path / "undo.jsonl")
+    # Each instance stands in for another process with the file open
+    first = UndoHistory(path, limit=2)
+    second = UndoHistory(path, limit=2)
+    first.append(RenameBatch("dir", [("a", "b")]))
+    second.append(RenameBatch("dir", [("c", "d")]))
+    first.append(RenameBatch("dir", [("e", "f")]))
+    assert len(UndoHistory(path)) == 3
+    # Compacted by the first instance, which saw the second one's batch
+    first.append(RenameBatch("dir", [("g", "h")]))
+    assert [second.pop().pairs, second.pop().pairs] == [[("g", "h")], [("e", "f")]]
+    with pytest.raises(IndexError):
+        first.pop()
+
+
+def test_command_line_renames_can_be_undone(tmp_path, monkeypatch):
+    import tv_show_renamer
+
+    history = UndoHistory(str(tmp_path / "undo.jsonl"))
+    monkeypatch.setattr(tv_show_renamer, "shared_undo_history", lambda: history)
+    directory = tmp_path / "show"
+    directory.mkdir()
+    (directory / "Show.E01.mkv").write_text("")
+    stats = tv_show_renamer.process_directory(str(directory), {})
+    assert stats["renamed"] == 1
+    assert os.listdir(directory) == ["S01E01.mkv"]
+
+    RenameEngine(undo_history=UndoHistory(history.path)).undo_last()
+    assert os.listdir(directory) == ["Show.E01.mkv"]
+
+
+def test_recovery_skips_a_journal_in_use(tmp_path):
+    import tv_show_renamer
+
+    directory = tmp_path / "files"
+    directory.mkdir()
+    make_files(directory, ["a"])
+    path = str(tmp_path / "journal.jsonl")
+    live = RenameJournal(f"{path}.123")
+    live.begin(str(directory), [("a", "b")])
+    assert tv_show_renamer.recover_journals(path) == []
+    assert live.pending() and RenameJournal(live.path).pending() == []
+
+    # Once its process is gone the batch is recovered and the journal removed
+    live.file.close()
+    live.file = None
+    results = tv_show_renamer.recover_journals(path)
+    assert len(results) == 1 and results[0].errors == []
+    assert not os.path.exists(live.path)
+    assert contents(directory) == {"b": "a"}
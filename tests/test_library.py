@@ -0,0 +1,76 @@
+import os
+
+from renamer_engine import RenameEngine
+from renamer_library import LibraryScanner, find_season_dirs, scan_library
+
+
+def make_tree(root):
+    layout = {
+        "Season 01": ["Show.S01E02.mkv", "Show.S01E01.mkv", "notes.txt"],
+        "Season 10": ["Show.S10E01.mkv"],
+        "Season 2": ["show.s02e01.avi"],
+        "Extras": ["Behind the scenes.mkv"],
+        os.path.join("Extras", "Specials"): ["Special.mkv"],
+    }
+    for directory, names in layout.items():
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+        for name in names:
+            with open(os.path.join(root, directory, name), "w") as f:
+                f.write(name)
+
+
+def listing(root):
+    return sorted(os.path.relpath(os.path.join(path, name), root)
+                  for path, _, names in os.walk(root) for name in names)
+
+
+def test_find_season_dirs_in_natural_order(tmp_path):
+    make_tree(str(tmp_path))
+    assert find_season_dirs(str(tmp_path)) == [
+        (os.path.join("Extras", "Specials"), 0), ("Season 01", 1), ("Season 2", 2),
+        ("Season 10", 10)]
+
+
+def test_library_renames_every_season_and_undoes(tmp_path):
+    root = str(tmp_path / "Show")
+    make_tree(root)
+    before = listing(root)
+    engine = RenameEngine(directory=root)
+
+    library = scan_library(engine, max_workers=2)
+    assert library.pairs() == [
+        (os.path.join("Extras", "Specials", "Special.mkv"),
+         os.path.join("Extras", "Specials", "S00E01.mkv")),
+        (os.path.join("Season 01", "Show.S01E01.mkv"), os.path.join("Season 01", "S01E01.mkv")),
+        (os.path.join("Season 01", "Show.S01E02.mkv"), os.path.join("Season 01", "S01E02.mkv")),
+        (os.path.join("Season 2", "show.s02e01.avi"), os.path.join("Season 2", "S02E01.avi")),
+        (os.path.join("Season 10", "Show.S10E01.mkv"), os.path.join("Season 10", "S10E01.mkv")),
+    ]
+    assert library[3] == library.pairs()[3]
+    assert not library.changed_on_disk()
+
+    result = engine.apply_plan(library.pairs(), max_workers=2)
+    assert not result.errors
+    assert listing(root) == sorted([
+        os.path.join("Extras", "Behind the scenes.mkv"),
+        os.path.join("Extras", "Specials", "S00E01.mkv"),
+        os.path.join("Season 01", "S01E01.mkv"), os.path.join("Season 01", "S01E02.mkv"),
+        os.path.join("Season 01", "notes.txt"), os.path.join("Season 2", "S02E01.avi"),
+        os.path.join("Season 10", "S10E01.mkv")])
+    with open(os.path.join(root, "Season 01", "S01E02.mkv")) as f:
+        assert f.read() == "Show.S01E02.mkv"
+    assert library.changed_on_disk()
+
+    engine.undo_last(max_workers=2)
+    assert listing(root) == before
+
+
+def test_library_scanner_posts_the_plan(tmp_path):
+    make_tree(str(tmp_path))
+    scanner = LibraryScanner(RenameEngine(directory=str(tmp_path)))
+    scanner.start()
+    scanner.thread.join()
+    kind, library = scanner.queue.get_nowait()
+    assert kind == "library"
+    assert scanner.queue.get_nowait() == ("done", 5)
+    assert len(library) == 5
@@ -0,0 +1,105 @@
+import random
+import pytest
+from renamer_engine import TEMP_PREFIX, order_renames
+from renamer_sidecars import companion_owners
+
+
+def is_temp_name(name):
+    return name.startswith(TEMP_PREFIX)
+
+
+def simulate(files, ops):
+    """Apply ops to a name -> content dict, failing on any overwrite."""
+    files = dict(files)
+    for source, target, _ in ops:
+        assert source in files, f"{source} is missing"
+        assert target not in files, f"{target} would be overwritten"
+        files[target] = files.pop(source)
+    return files
+
+
+def test_chain_is_renamed_from_its_free_end():
+    pairs = [("a", "b"), ("b", "c"), ("c", "d")]
+    ops, rejected = order_renames(pairs, {"a", "b", "c"})
+    assert rejected == []
+    assert [(source, target) for source, target, _ in ops] == [("c", "d"), ("b", "c"), ("a", "b")]
+    assert simulate({"a": 1, "b": 2, "c": 3}, ops) == {"b": 1, "c": 2, "d": 3}
+
+
+def test_swap_goes_through_a_temporary_name():
+    pairs = [("a", "b"), ("b", "a")]
+    ops, rejected = order_renames(pairs, {"a", "b"})
+    assert rejected == []
+    assert len(ops) == 3
+    assert is_temp_name(ops[0][1]) and ops[-1][0] == ops[0][1]
+    assert simulate({"a": 1, "b": 2}, ops) == {"b": 1, "a": 2}
+
+
+def test_cycles_and_chains_together():
+    # A three-name rotation next to a renumbering shift
+    pairs = [("e1", "e2"), ("e2", "e3"), ("e3", "e1"), ("s1", "s2"), ("s2", "s3")]
+    files = {"e1": 1, "e2": 2, "e3": 3, "s1": 4, "s2": 5}
+    ops, rejected = order_renames(pairs, set(files))
+    assert rejected == []
+    assert simulate(files, ops) == {"e2": 1, "e3": 2, "e1": 3, "s2": 4, "s3": 5}
+    assert [index for _, target, index in ops if not is_temp_name(target)].count(0) == 1
+
+
+def test_occupied_target_rejects_the_chain_behind_it():
+    pairs = [("a", "b"), ("c", "a"), ("x", "y")]
+    ops, rejected = order_renames(pairs, {"a", "b", "c", "x"})
+    assert [index for index, _ in rejected] == [0, 1]
+    assert [(source, target) for source, target, _ in ops] == [("x", "y")]
+
+
+def test_duplicate_target_is_rejected():
+    ops, rejected = order_renames([("a", "c"), ("b", "c")], {"a", "b"})
+    assert rejected == [(1, "Duplicate rename target: c")]
+    assert [(source, target) for source, target, _ in ops] == [("a", "c")]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_permutations_never_overwrite(seed):
+    rng = random.Random(seed)
+    names = [f"f{i}" for i in range(50)]
+    targets = names[:]
+    rng.shuffle(targets)
+    # Some files move to names nobody has yet
+    targets = [f"new{i}" if rng.random() < 0.2 else target for i, target in enumerate(targets)]
+    pairs = [(name, target) for name, target in zip(names, targets)
+             if targets.count(target) == 1]
+    files = {name: name for name in names}
+    ops, rejected = order_renames(pairs, set(files))
+    result = simulate(files, ops)
+    rejected_sources = {pairs[index][0] for index, _ in rejected}
+    for source, target in pairs:
+        if source not in rejected_sources and source != target:
+            assert result[target] == source
+    assert not any(is_temp_name(name) for name in result)
+
+
+def test_companions_follow_their_video():
+    pairs = [("Foo.Ep3.mkv", "S01E01.mkv"), ("Foo.Ep3.en.srt", "S01E01.en.srt"),
+             ("Foo.Ep4.mkv", "S01E02.mkv"), ("Foo.Ep4.en.srt", "S01E02.en.srt")]
+    owners = companion_owners(pairs)
+    assert owners == {1: 0, 3: 2}
+    existing = {"Foo.Ep3.mkv", "Foo.Ep3.en.srt", "Foo.Ep4.mkv", "Foo.Ep4.en.srt", "S01E01.mkv"}
+    ops, rejected = order_renames(pairs, existing, owners)
+    assert [index for index, _ in rejected] == [0, 1]
+    assert [index for _, _, index in ops] == [2, 3]
+
+
+def test_companions_are_ordered_after_every_video():
+    # The sidecar's new name is free before the video's is
+    pairs = [("a.mkv", "b.mkv"), ("a.srt", "b.srt"), ("b.mkv", "c.mkv")]
+    owners = companion_owners(pairs)
+    assert owners == {1: 0}
+    ops, rejected = order_renames(pairs, {"a.mkv", "a.srt", "b.mkv"}, owners)
+    assert rejected == []
+    assert [index for _, _, index in ops] == [2, 0, 1]
+
+
+def test_unrelated_files_with_a_shared_stem_are_not_companions():
+    pairs = [("Show.E03.mkv", "S01E03.mkv"), ("Show.E03.avi", "S01E04.avi"),
+             ("Show.E03.en.srt", "S01E03.en.srt")]
+    assert companion_owners(pairs) == {2: 0}
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from renamer_ordering import (episode_sort_key, episode_span, key_from_json, natural_key,
+                              season_from_dirname)
+
+
+def ordered(names):
+    return sorted(names, key=episode_sort_key)
+
+
+def test_episode_numbers_sort_by_value():
+    assert ordered(["Show.S01E10.mkv", "Show.S01E2.mkv", "Show.S01E01.mkv"]) \
+        == ["Show.S01E01.mkv", "Show.S01E2.mkv", "Show.S01E10.mkv"]
+    assert ordered(["Show.S02E01.mkv", "Show.S01E12.mkv"]) == ["Show.S01E12.mkv", "Show.S02E01.mkv"]
+
+
+def test_case_and_notation_do_not_matter():
+    assert ordered(["show.s01e03.mkv", "Show 1x02.mkv", "SHOW.S01.E01.mkv"]) \
+        == ["SHOW.S01.E01.mkv", "Show 1x02.mkv", "show.s01e03.mkv"]
+    assert episode_sort_key("Show Episode 7.mkv")[:4] == episode_sort_key("show ep7.MKV")[:4]
+    assert ordered(["Movie Pt 2.mkv", "Movie PART 1.mkv"]) == ["Movie PART 1.mkv", "Movie Pt 2.mkv"]
+
+
+def test_unparseable_names_follow_in_natural_order():
+    names = ["extra 10.mkv", "Show.S01E02.mkv", "Extra 9.mkv", "bonus.mkv"]
+    assert ordered(names) == ["Show.S01E02.mkv", "bonus.mkv", "Extra 9.mkv", "extra 10.mkv"]
+    assert natural_key("Episode 2") < natural_key("episode 10")
+    # Codec and resolution numbers are not episodes
+    assert episode_sort_key("Show.x264.1080p.mkv")[0] == 1
+
+
+def test_keys_survive_json():
+    key = episode_sort_key("Show.S01E02.Part3.mkv")
+    assert key_from_json(json.loads(json.dumps(key))) == key
+
+
+@pytest.mark.parametrize("name, span", [("Show.S01E01-E02.mkv", 2), ("Show.S01E01E03.mkv", 3),
+                                        ("Show.S01E01-02.mkv", 2), ("Show.S01E01.mkv", 1),
+                                        ("Show.S01E05-E02.mkv", 1), ("Show.S01E01-E09.mkv", 1)])
+def test_episode_span(name, span):
+    assert episode_span(name) == span
+
+
+@pytest.mark.parametrize("name, season", [("Season 02", 2), ("series.3", 3), ("S04", 4),
+                                          ("Specials", 0), ("Extras", None), ("Season", None)])
+def test_season_from_dirname(name, season):
+    assert season_from_dirname(name) == season
@@ -0,0 +1,113 @@
+import json
+import pytest
+from renamer_engine import RenameEngine
+from renamer_planfile import (PlanFileError, PlanInfo, PlanWriter, apply_plan_file,
+                              iter_plan_chunks, read_plan)
+
+
+def make_files(directory, names):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (directory / name).write_text(name)
+
+
+def contents(directory):
+    return {path.name: path.read_text() for path in directory.iterdir()}
+
+
+def write_plan(path, directory, pairs, destination=""):
+    with PlanWriter(str(path)) as writer:
+        skipped = writer.add(str(directory), pairs, destination)
+    return skipped
+
+
+PAIRS = [("a.mkv", "b.mkv"), ("b.mkv", "a.mkv"), ("c.mkv", "S01E03.mkv"),
+         ("d.mkv", "S01E04.mkv")]
+FILES = ["a.mkv", "b.mkv", "c.mkv", "d.mkv"]
+
+
+def test_round_trip(tmp_path):
+    directory = tmp_path / "show"
+    make_files(directory, FILES)
+    plan = tmp_path / "plan.jsonl"
+    assert write_plan(plan, directory, PAIRS) == []
+
+    info = PlanInfo(str(plan))
+    assert (info.operations, info.directories, info.moves) == (4, 1, False)
+    lines = list(read_plan(str(plan)))
+    assert [len(ops) for _, _, ops in lines] == [1, 1, 2]  # The swap shares one cycle line
+    # A chunk never splits the cycle
+    assert [len(ops) for _, _, ops in iter_plan_chunks(str(plan), chunk_size=1)] == [1, 1, 2]
+
+    result = apply_plan_file(RenameEngine(), str(plan), chunk_size=1)
+    assert (result.renamed, result.already_done, result.errors) == (4, 0, [])
+    assert contents(directory) == {new: old for old, new in PAIRS}
+
+    again = apply_plan_file(RenameEngine(), str(plan))
+    assert (again.renamed, again.already_done, again.errors) == (0, 4, [])
+    assert contents(directory) == {new: old for old, new in PAIRS}
+
+
+def test_changed_file_is_skipped(tmp_path):
+    directory = tmp_path / "show"
+    make_files(directory, FILES)
+    plan = tmp_path / "plan.jsonl"
+    write_plan(plan, directory, PAIRS)
+    (directory / "c.mkv").write_text("changed since the plan was made")
+
+    result = apply_plan_file(RenameEngine(), str(plan), chunk_size=1)
+    assert [name for name, _ in result.errors] == ["c.mkv"]
+    files = contents(directory)
+    assert files["c.mkv"] == "changed since the plan was made"
+    assert files["a.mkv"] == "b.mkv" and files["S01E04.mkv"] == "d.mkv"
+
+
+def test_sidecar_of_a_changed_video_is_skipped(tmp_path):
+    directory = tmp_path / "show"
+    make_files(directory, ["c.mkv", "c.en.srt"])
+    plan = tmp_path / "plan.jsonl"
+    write_plan(plan, directory, [("c.mkv", "S01E03.mkv"), ("c.en.srt", "S01E03.en.srt")])
+    ops = [op for _, _, line in read_plan(str(plan)) for op in line]
+    assert [op[4] for op in ops] == ["", "c.mkv"]  # The sidecar names its video
+    (directory / "c.mkv").write_text("changed since the plan was made")
+
+    # One operation per chunk, so the sidecar runs in a later batch than its video
+    result = apply_plan_file(RenameEngine(), str(plan), chunk_size=1)
+    assert [name for name, _ in result.errors] == ["c.mkv", "c.en.srt"]
+    assert sorted(contents(directory)) == ["c.en.srt", "c.mkv"]
+
+
+def test_destination_moves_every_planned_file(tmp_path):
+    directory = tmp_path / "show"
+    destination = tmp_path / "library"
+    make_files(directory, ["a.mkv", "S01E02.mkv"])
+    plan = tmp_path / "plan.jsonl"
+    write_plan(plan, directory, [("a.mkv", "S01E01.mkv"), ("S01E02.mkv", "S01E02.mkv")],
+               str(destination))
+    assert PlanInfo(str(plan)).moves
+
+    result = apply_plan_file(RenameEngine(), str(plan))
+    assert result.errors == []
+    assert contents(destination) == {"S01E01.mkv": "a.mkv", "S01E02.mkv": "S01E02.mkv"}
+    assert contents(directory) == {}
+
+
+def test_truncated_plan_is_refused(tmp_path):
+    directory = tmp_path / "show"
+    make_files(directory, FILES)
+    plan = tmp_path / "plan.jsonl"
+    write_plan(plan, directory, PAIRS)
+    lines = plan.read_text().splitlines(keepends=True)
+    plan.write_text("".join(lines[:-1]))
+    with pytest.raises(PlanFileError):
+        PlanInfo(str(plan))
+    with pytest.raises(PlanFileError):
+        apply_plan_file(RenameEngine(), str(plan))
+    assert contents(directory) == {name: name for name in FILES}
+
+
+def test_unknown_version_is_refused(tmp_path):
+    plan = tmp_path / "plan.jsonl"
+    plan.write_text(json.dumps({"format": "tvrenamer-plan", "version": 99}) + "\n")
+    with pytest.raises(PlanFileError):
+        PlanInfo(str(plan))
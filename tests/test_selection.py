@@ -0,0 +1,57 @@
+import pytest
+from renamer_selection import SelectionModel, parse_row_range
+
+ROWS = [("a.mkv", "S01E01.mkv"), ("S01E02.mkv", "S01E02.mkv"), ("b.avi", "S01E03.avi")]
+
+
+def test_bulk_operations():
+    selection = SelectionModel(5)
+    assert selection.count() == 5
+    selection.set_all(False)
+    selection.select_range(1, 3)
+    assert list(selection.indices()) == [1, 2]
+    selection.invert()
+    assert list(selection.indices()) == [0, 3, 4]
+    assert selection.toggle(0) is False
+    selection.select_range(3, 100, False)
+    assert selection.count() == 0
+
+
+def test_select_matching_and_changed():
+    selection = SelectionModel(len(ROWS))
+    selection.select_matching(ROWS, r"\.AVI$")
+    assert list(selection.indices()) == [2]
+    selection.select_matching(ROWS, "S01E0[12]", column=1)
+    assert list(selection.indices()) == [0, 1]
+    selection.select_changed(ROWS)
+    assert list(selection.indices()) == [0, 2]
+    with pytest.raises(ValueError):
+        selection.select_matching(ROWS, "(")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("5", (4, 5)), ("10-20", (9, 20)), ("-20", (0, 20)), ("10-", (9, 50)), ("40-99", (39, 50)),
+])
+def test_parse_row_range(text, expected):
+    assert parse_row_range(text, 50) == expected
+
+
+@pytest.mark.parametrize("text", ["", "-", "0", "5-3", "a-b"])
+def test_parse_row_range_rejects(text):
+    with pytest.raises(ValueError):
+        parse_row_range(text, 50)
+
+
+def test_remap_keeps_choices_on_their_files():
+    selection = SelectionModel(4)
+    selection[1] = False  # c.mkv
+    selection.remap(["a.mkv", "c.mkv", "e.mkv", "g.mkv"],
+                    ["a.mkv", "b.mkv", "c.mkv", "d.mkv", "g.mkv"])
+    assert list(selection.indices()) == [0, 1, 3, 4]
+
+
+def test_remap_gives_new_rows_the_default():
+    selection = SelectionModel(3, selected=False)
+    selection[2] = True
+    selection.remap(["x", "y", "z"], ["w", "z"])
+    assert [selection[0], selection[1]] == [False, True]
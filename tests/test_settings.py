@@ -0,0 +1,28 @@
+import json
+from renamer_settings import DEFAULT_SETTINGS, load_settings, save_settings
+
+
+def test_missing_file_gives_the_defaults(tmp_path):
+    assert load_settings(str(tmp_path / "settings.json")) == DEFAULT_SETTINGS
+
+
+def test_round_trip_keeps_known_settings_only(tmp_path):
+    path = str(tmp_path / "settings.json")
+    save_settings({"season_number": "3", "sniff_headers": True, "unknown": 1}, path)
+    settings = load_settings(path)
+    assert settings["season_number"] == "3"
+    assert settings["sniff_headers"] is True
+    assert "unknown" not in settings
+    assert settings["show_name"] == DEFAULT_SETTINGS["show_name"]
+
+
+def test_invalid_values_fall_back_to_the_default(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"season_number": 3, "library_mode": 1, "show_name": "Show"}))
+    settings = load_settings(str(path))
+    assert settings["season_number"] == DEFAULT_SETTINGS["season_number"]
+    assert settings["library_mode"] is False
+    assert settings["show_name"] == "Show"
+
+    path.write_text("[1, 2")
+    assert load_settings(str(path)) == DEFAULT_SETTINGS
@@ -0,0 +1,64 @@
+import os
+from renamer_engine import RenameEngine, RenamePlan
+from renamer_sidecars import match_sidecars, parse_sidecar_extensions, sidecar_pairs
+
+
+def test_sidecars_match_the_longest_video_stem():
+    videos = ["Show.E03.mkv", "Show.E03.extended.mkv"]
+    candidates = ["Show.E03.en.srt", "Show.E03.extended.en.srt", "Show.E03-thumb.jpg",
+                  "Other.en.srt", "Show.E03.extended.mkv"]
+    assert match_sidecars(videos, candidates) == {
+        "Show.E03.mkv": ["Show.E03-thumb.jpg", "Show.E03.en.srt"],
+        "Show.E03.extended.mkv": ["Show.E03.extended.en.srt"],
+    }
+
+
+def test_sidecar_pairs_keep_the_suffix():
+    assert sidecar_pairs("Show.E03.mkv", "S01E03.mkv", ["Show.E03.en.srt", "Show.E03-thumb.jpg"]) == [
+        ("Show.E03.en.srt", "S01E03.en.srt"), ("Show.E03-thumb.jpg", "S01E03-thumb.jpg")]
+
+
+def test_parse_sidecar_extensions():
+    assert parse_sidecar_extensions("srt, .NFO") == frozenset({".srt", ".nfo"})
+    assert parse_sidecar_extensions(" ") == frozenset()
+
+
+def test_plan_renames_sidecars_with_their_video(tmp_path):
+    for name in ["Show.E01.mkv", "Show.E01.en.srt", "Show.E02.mkv"]:
+        (tmp_path / name).write_text(name)
+    engine = RenameEngine(directory=str(tmp_path), rename_sidecars=True)
+    plan = RenamePlan()
+    plan.set_files(["Show.E01.mkv", "Show.E02.mkv"])
+    plan.set_sidecars(["Show.E01.en.srt"])
+    plan.update(engine)
+    assert plan.pairs() == [("Show.E01.mkv", "S01E01.mkv"), ("Show.E01.en.srt", "S01E01.en.srt"),
+                            ("Show.E02.mkv", "S01E02.mkv")]
+
+
+def test_sidecar_stays_when_its_video_target_is_taken(tmp_path):
+    for name in ["Foo.Ep3.mkv", "Foo.Ep3.en.srt", "S01E01.mkv"]:
+        (tmp_path / name).write_text(name)
+    result = RenameEngine().apply_plan(
+        [("Foo.Ep3.mkv", "S01E01.mkv"), ("Foo.Ep3.en.srt", "S01E01.en.srt")],
+        directory=str(tmp_path))
+    assert [name for name, _ in result.errors] == ["Foo.Ep3.mkv", "Foo.Ep3.en.srt"]
+    assert sorted(os.listdir(tmp_path)) == ["Foo.Ep3.en.srt", "Foo.Ep3.mkv", "S01E01.mkv"]
+
+
+def test_sidecar_stays_when_its_video_rename_fails(tmp_path, monkeypatch):
+    for name in ["Foo.Ep3.mkv", "Foo.Ep3.en.srt"]:
+        (tmp_path / name).write_text(name)
+    real_rename = os.rename
+
+    def rename(source, target):
+        if source.endswith(".mkv"):
+            raise PermissionError("denied")
+        real_rename(source, target)
+
+    monkeypatch.setattr(os, "rename", rename)
+    result = RenameEngine().apply_plan(
+        [("Foo.Ep3.mkv", "S01E01.mkv"), ("Foo.Ep3.en.srt", "S01E01.en.srt")],
+        directory=str(tmp_path))
+    assert [name for name, _ in result.errors] == ["Foo.Ep3.mkv", "Foo.Ep3.en.srt"]
+    assert result.done == []
+    assert sorted(os.listdir(tmp_path)) == ["Foo.Ep3.en.srt", "Foo.Ep3.mkv"]
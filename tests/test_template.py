@@ -0,0 +1,53 @@
+import pytest
+
+from renamer_template import DEFAULT_TEMPLATE, NameTemplate, infer_show_name
+
+
+def test_default_template_marks_double_episodes():
+    template = NameTemplate(DEFAULT_TEMPLATE)
+    assert template.render({"season": 1, "episode": 2, "ext": ".mkv"}) == "S01E02.mkv"
+    assert template.render({"season": 1, "episode": 2, "episode_end": 3,
+                            "ext": ".mkv"}) == "S01E02-E03.mkv"
+
+
+def test_optional_sections_need_every_field():
+    template = NameTemplate("{show} - S{season:02}E{episode:03}[ - {title}][ ({show}, {title})]{ext}")
+    assert template.render({"show": "Show", "season": 2, "episode": 5, "ext": ".mp4"}) \
+        == "Show - S02E005.mp4"
+    assert template.render({"show": "Show", "season": 2, "episode": 5, "title": "Pilot",
+                            "ext": ".mp4"}) == "Show - S02E005 - Pilot (Show, Pilot).mp4"
+
+
+def test_literal_braces_brackets_and_conversions():
+    template = NameTemplate("[[{{{episode!s:>3}}}]]{original!r}")
+    assert template.render({"episode": 7, "original": "a"}) == "[{  7}]'a'"
+
+
+def test_matches_str_format():
+    text = "{show}.{season}x{episode:02d}[.{episode_end:02d}].{title}{ext}"
+    values = {"show": "Show", "season": 3, "episode": 4, "episode_end": 5, "title": "T",
+              "ext": ".avi"}
+    assert NameTemplate(text).render(values) \
+        == text.replace("[", "").replace("]", "").format(**values)
+
+
+def test_render_batch():
+    template = NameTemplate("{show} S{season:02}E{episode:02}[-E{episode_end:02}][ {title}]{ext}")
+    titles = {(1, 1): "Pilot: Part/One"}
+    names = template.render_batch(["a.mkv", "b.avi", "noext"], 1, [1, 2, 4], [1, 2, 1],
+                                  show="Show", titles=lambda s, e: titles.get((s, e)))
+    assert names == ["Show S01E01 Pilot PartOne.mkv", "Show S01E02-E03.avi", "Show S01E04"]
+
+
+@pytest.mark.parametrize("text", ["S{season}", "{episode}{bogus}", "[{episode}", "{episode}]",
+                                  "[[{episode}][x]]", "[a[{episode}]]", "{episode:{season}}",
+                                  "{episode:q}", "{episode"])
+def test_invalid_templates(text):
+    with pytest.raises(ValueError):
+        NameTemplate(text)
+
+
+def test_infer_show_name_skips_season_folder(tmp_path):
+    season = tmp_path / "My Show" / "Season 02"
+    assert infer_show_name(str(season)) == "My Show"
+    assert infer_show_name(str(tmp_path / "My Show")) == "My Show"
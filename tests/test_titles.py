@@ -0,0 +1,82 @@
+import json
+import sqlite3
+
+import pytest
+
+from renamer_engine import RenameEngine, RenamePlan
+from renamer_titles import EpisodeTitleDB, show_key
+
+
+def test_missing_database_has_no_titles_and_creates_no_file(tmp_path):
+    path = tmp_path / "titles.sqlite3"
+    database = EpisodeTitleDB(str(path))
+    assert database.titles_for("Show")(1, 1) is None
+    assert database.season_titles("show", 1) == {}
+    assert not path.exists()
+
+
+def test_lookups_use_the_normalized_show_name(tmp_path):
+    database = EpisodeTitleDB(str(tmp_path / "titles.sqlite3"))
+    assert database.add_titles([("Doctor.Who", 1, 1, "Rose"), ("Doctor Who", 1, 2, "The End")]) == 2
+    titles = database.titles_for("doctor who")
+    assert titles is database.titles_for("DOCTOR-WHO")
+    assert titles(1, 1) == "Rose"
+    assert titles(1, 2) == "The End"
+    assert titles(1, 3) is None
+    assert titles(2, 1) is None
+    assert show_key("  Doctor.Who! ") == "doctor who"
+
+
+def test_titles_persist_on_disk_and_imports_replace_them(tmp_path):
+    path = str(tmp_path / "titles.sqlite3")
+    database = EpisodeTitleDB(path)
+    database.add_titles([("Show", 1, 1, "Old")])
+    titles = database.titles_for("Show")
+    assert titles(1, 1) == "Old"
+    version = database.version
+    database.add_titles([("Show", 1, 1, "New")])
+    assert database.version == version + 1
+    assert database.titles_for("Show") is not titles
+    assert database.titles_for("Show")(1, 1) == "New"
+    database.close()
+
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT show_key, season, episode, title FROM episodes"
+                                  ).fetchall() == [("show", 1, 1, "New")]
+    assert EpisodeTitleDB(path).titles_for("Show")(1, 1) == "New"
+
+
+def test_import_csv_json_and_sqlite(tmp_path):
+    database = EpisodeTitleDB(str(tmp_path / "titles.sqlite3"))
+    csv_path = tmp_path / "show.csv"
+    csv_path.write_text("season,episode,title\n1,1,Pilot\n1,x,Broken\n1,2,\n")
+    assert database.import_file(str(csv_path), show="Show") == 1
+
+    json_path = tmp_path / "show.json"
+    json_path.write_text(json.dumps({"show": "Show", "episodes": [
+        {"season": 1, "episode": 2, "title": "Second"}]}))
+    assert database.import_file(str(json_path)) == 1
+
+    source = tmp_path / "source.db"
+    with sqlite3.connect(str(source)) as connection:
+        connection.execute("CREATE TABLE episodes (show, season, episode, title)")
+        connection.execute("INSERT INTO episodes VALUES ('Other', 3, 4, 'Elsewhere')")
+    connection.close()
+    assert database.import_file(str(source)) == 1
+
+    assert database.titles_for("Show")(1, 1) == "Pilot"
+    assert database.titles_for("Show")(1, 2) == "Second"
+    assert database.titles_for("Other")(3, 4) == "Elsewhere"
+    with pytest.raises(ValueError):
+        database.import_file(str(tmp_path / "titles.txt"))
+
+
+def test_plan_leaves_out_missing_titles(tmp_path):
+    database = EpisodeTitleDB(str(tmp_path / "titles.sqlite3"))
+    database.add_titles([("Show", 1, 1, "Pilot: Part 1")])
+    engine = RenameEngine(directory=str(tmp_path / "Show" / "Season 01"), title_db=database,
+                          naming_template="S{season:02}E{episode:02}[ - {title}]{ext}")
+    plan = RenamePlan()
+    plan.set_files(["Show.E01.mkv", "Show.E02.mkv"])
+    plan.update(engine)
+    assert [new for _, new in plan] == ["S01E01 - Pilot Part 1.mkv", "S01E02.mkv"]
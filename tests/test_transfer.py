@@ -0,0 +1,197 @@
+import os
+import errno
+import pytest
+import renamer_transfer
+from renamer_engine import RenameEngine
+from renamer_journal import UndoHistory
+from renamer_planfile import PlanWriter
+from renamer_transfer import check_destination, move_file, transfer_files
+from tv_show_renamer import cli_main
+
+
+def make_files(directory, names):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (directory / name).write_text(name)
+
+
+def test_move_onto_itself_keeps_the_file(tmp_path):
+    path = tmp_path / "a.mkv"
+    path.write_text("episode")
+    with pytest.raises(ValueError):
+        move_file(str(path), str(tmp_path / "." / "a.mkv"))
+    assert path.read_text() == "episode"
+
+
+@pytest.mark.parametrize("suffix", ["", os.sep, os.sep + "."])
+def test_destination_is_the_directory_itself(tmp_path, suffix):
+    make_files(tmp_path, ["a.mkv", "b.mkv"])
+    destination = str(tmp_path) + suffix
+    with pytest.raises(ValueError):
+        check_destination(str(tmp_path), destination)
+    with pytest.raises(ValueError):
+        RenameEngine().apply_plan([("a.mkv", "S01E01.mkv"), ("b.mkv", "b.mkv")],
+                                  directory=str(tmp_path), destination=destination)
+    with pytest.raises(ValueError):
+        with PlanWriter(str(tmp_path / "plan.jsonl")) as writer:
+            writer.add(str(tmp_path), [("a.mkv", "S01E01.mkv")], destination)
+    assert sorted(os.listdir(tmp_path)) == ["a.mkv", "b.mkv"]
+
+
+def test_cli_refuses_the_directory_as_destination(tmp_path, monkeypatch, capsys):
+    show = tmp_path / "show"
+    make_files(show, ["Show.E01.mkv", "Show.E02.mkv"])
+    monkeypatch.chdir(tmp_path)
+    assert cli_main([str(show), "--dest", str(show) + os.sep, "--no-journal"]) == 1
+    assert "destination" in capsys.readouterr().err
+    assert sorted(os.listdir(show)) == ["Show.E01.mkv", "Show.E02.mkv"]
+
+
+class Crash(BaseException):
+    """Stops a move like a killed process."""
+
+
+def test_crash_while_moving_leaves_the_batch_undoable(tmp_path, monkeypatch):
+    show = tmp_path / "show"
+    library = tmp_path / "library"
+    make_files(show, ["a.mkv", "b.mkv", "c.mkv"])
+    history_path = str(tmp_path / "undo.jsonl")
+    engine = RenameEngine(undo_history=UndoHistory(history_path), transfer_workers=1)
+    real_move = renamer_transfer.move_file
+    moves = []
+
+    def move_file(source, target, *args):
+        if moves:
+            raise Crash()
+        moves.append(source)
+        return real_move(source, target, *args)
+
+    monkeypatch.setattr(renamer_transfer, "move_file", move_file)
+    with pytest.raises(Crash):
+        engine.apply_plan([("a.mkv", "S01E01.mkv"), ("b.mkv", "S01E02.mkv"), ("c.mkv", "S01E03.mkv")],
+                          directory=str(show), destination=str(library))
+    monkeypatch.undo()
+    assert len(os.listdir(library)) == 1
+
+    restarted = RenameEngine(undo_history=UndoHistory(history_path))
+    result = restarted.undo_last()
+    assert result.errors == []
+    assert sorted(os.listdir(show)) == ["a.mkv", "b.mkv", "c.mkv"]
+    assert os.listdir(library) == []
+    assert len(restarted.undo_stack) == 0
+
+
+def test_only_moved_files_stay_recorded(tmp_path):
+    show = tmp_path / "show"
+    library = tmp_path / "library"
+    make_files(show, ["a.mkv", "b.mkv"])
+    make_files(library, ["S01E02.mkv"])  # Another file already holds the name
+    engine = RenameEngine()
+    result = engine.apply_plan([("a.mkv", "S01E01.mkv"), ("b.mkv", "S01E02.mkv")],
+                               directory=str(show), destination=str(library))
+    assert [name for name, _ in result.errors] == [str(show / "S01E02.mkv")]
+    assert engine.undo_stack[-1].moved == ["S01E01.mkv"]
+    engine.undo_last()
+    assert sorted(os.listdir(show)) == ["a.mkv", "b.mkv"]
+    assert os.listdir(library) == ["S01E02.mkv"]
+
+
+def cross_device(monkeypatch):
+    """Make renames of the moved file fail like across filesystems, leaving part files alone."""
+    real_rename = os.rename
+
+    def rename(source, target):
+        if not str(source).endswith(renamer_transfer.PART_SUFFIX):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        real_rename(source, target)
+
+    monkeypatch.setattr(os, "rename", rename)
+
+
+DATA = bytes(range(256)) * 4096  # 1 MB
+
+
+def test_same_device_move_renames(tmp_path):
+    source = tmp_path / "a.mkv"
+    source.write_bytes(DATA)
+    inode = source.stat().st_ino
+    moved = []
+    target = tmp_path / "library" / "S01E01.mkv"
+    assert move_file(str(source), str(target), moved.append)
+    assert target.stat().st_ino == inode
+    assert sum(moved) == len(DATA)
+    assert not source.exists()
+
+
+def test_cross_device_move_copies(tmp_path, monkeypatch):
+    source = tmp_path / "a.mkv"
+    source.write_bytes(DATA)
+    mtime = source.stat().st_mtime_ns
+    target = tmp_path / "library" / "S01E01.mkv"
+    cross_device(monkeypatch)
+    assert move_file(str(source), str(target))
+    assert target.read_bytes() == DATA
+    assert target.stat().st_mtime_ns == mtime
+    assert not source.exists()
+    assert not os.path.exists(str(target) + renamer_transfer.PART_SUFFIX)
+
+
+def test_matching_part_file_is_resumed(tmp_path, monkeypatch):
+    source = tmp_path / "a.mkv"
+    source.write_bytes(DATA)
+    target = tmp_path / "S01E01.mkv"
+    part = tmp_path / ("S01E01.mkv" + renamer_transfer.PART_SUFFIX)
+    part.write_bytes(DATA[:len(DATA) // 2])
+    cross_device(monkeypatch)
+    moved = []
+    assert move_file(str(source), str(target), moved.append)
+    assert target.read_bytes() == DATA
+    assert sum(moved) == len(DATA)  # The resumed half is counted once
+    assert not part.exists() and not source.exists()
+
+
+def test_damaged_part_file_is_copied_again(tmp_path, monkeypatch):
+    source = tmp_path / "a.mkv"
+    source.write_bytes(DATA)
+    target = tmp_path / "S01E01.mkv"
+    part = tmp_path / ("S01E01.mkv" + renamer_transfer.PART_SUFFIX)
+    damaged = bytearray(DATA[:len(DATA) // 2])
+    damaged[len(damaged) // 2:len(damaged) // 2 + 100] = bytes(100)
+    part.write_bytes(bytes(damaged))
+    cross_device(monkeypatch)
+    assert move_file(str(source), str(target))
+    assert target.read_bytes() == DATA
+    assert not part.exists() and not source.exists()
+
+
+def test_existing_target_with_other_content_is_refused(tmp_path):
+    source = tmp_path / "a.mkv"
+    source.write_bytes(DATA)
+    target = tmp_path / "S01E01.mkv"
+    target.write_bytes(DATA[::-1])
+    with pytest.raises(FileExistsError):
+        move_file(str(source), str(target))
+    assert source.read_bytes() == DATA
+    assert target.read_bytes() == DATA[::-1]
+
+
+def test_existing_identical_target_completes_the_move(tmp_path):
+    # An earlier run copied the file but stopped before removing the source
+    source = tmp_path / "a.mkv"
+    source.write_bytes(DATA)
+    target = tmp_path / "S01E01.mkv"
+    target.write_bytes(DATA)
+    assert move_file(str(source), str(target))
+    assert not source.exists()
+    assert target.read_bytes() == DATA
+
+
+def test_transfer_files_reports_each_move(tmp_path):
+    make_files(tmp_path / "show", ["a.mkv", "b.mkv"])
+    (tmp_path / "library").mkdir()
+    (tmp_path / "library" / "b.mkv").write_text("other")
+    result = transfer_files([(str(tmp_path / "show" / name), str(tmp_path / "library" / name))
+                             for name in ["a.mkv", "b.mkv"]], max_workers=2)
+    assert [os.path.basename(source) for source, _ in result.done] == ["a.mkv"]
+    assert [os.path.basename(source) for source, _ in result.errors] == ["b.mkv"]
+    assert result.bytes_done == len("a.mkv")
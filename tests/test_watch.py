@@ -0,0 +1,50 @@
+from renamer_engine import RenameEngine, RenamePlan
+
+
+def test_apply_changes_adds_and_removes_files(tmp_path):
+    for name in ["Show.E01.mkv", "Show.E03.mkv", "notes.txt"]:
+        (tmp_path / name).write_text(name)
+    engine = RenameEngine(directory=str(tmp_path))
+    plan = RenamePlan()
+    plan.set_files(["Show.E01.mkv", "Show.E03.mkv"])
+    plan.update(engine)
+
+    (tmp_path / "Show.E02.mkv").write_text("new")
+    (tmp_path / "Show.E03.mkv").unlink()
+    assert engine.apply_changes(plan, ["Show.E02.mkv", "Show.E03.mkv"])
+    plan.update(engine)
+    assert list(plan) == [("Show.E01.mkv", "S01E01.mkv"), ("Show.E02.mkv", "S01E02.mkv")]
+
+    (tmp_path / "more.txt").write_text("ignored")
+    assert not engine.apply_changes(plan, ["more.txt"])
+
+
+def test_update_duplicates_hashes_only_affected_sizes(tmp_path, monkeypatch):
+    import renamer_duplicates
+
+    for name, content in [("Show.E01.mkv", "aaaa"), ("Show.E01.copy.mkv", "aaaa"),
+                          ("Show.E02.mkv", "bbbbbb"), ("Show.E03.mkv", "cc")]:
+        (tmp_path / name).write_text(content)
+    engine = RenameEngine(directory=str(tmp_path), skip_duplicates=True)
+    files = ["Show.E01.mkv", "Show.E01.copy.mkv", "Show.E02.mkv", "Show.E03.mkv"]
+    duplicates = engine.find_duplicates(files)
+    assert duplicates == {"Show.E01.copy.mkv": "Show.E01.mkv"}
+
+    hashed = []
+    real = renamer_duplicates.find_duplicates
+    monkeypatch.setattr(renamer_duplicates, "find_duplicates",
+                        lambda directory, names, *args: hashed.append(list(names))
+                        or real(directory, names, *args))
+
+    (tmp_path / "Show.E02.copy.mkv").write_text("bbbbbb")
+    files.append("Show.E02.copy.mkv")
+    duplicates = engine.update_duplicates(files, duplicates, ["Show.E02.copy.mkv"])
+    assert duplicates == {"Show.E01.copy.mkv": "Show.E01.mkv",
+                          "Show.E02.copy.mkv": "Show.E02.mkv"}
+    assert hashed == [["Show.E02.mkv", "Show.E02.copy.mkv"]]
+
+    # Removing the kept copy leaves the other copy to be renamed
+    (tmp_path / "Show.E01.mkv").unlink()
+    files.remove("Show.E01.mkv")
+    duplicates = engine.update_duplicates(files, duplicates, ["Show.E01.mkv"])
+    assert duplicates == {"Show.E02.copy.mkv": "Show.E02.mkv"}
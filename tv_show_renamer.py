@@ -1,571 +1,388 @@
 import os
-import tkinter as tk
-import tkinter.ttk as ttk
-from tkinter import filedialog, messagebox
-import re
-from functools import lru_cache
-from threading import Timer
+import sys
+import glob
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
-from typing import List, Tuple, Dict, Optional
-import mimetypes
-
-# Set up logging
-logging.basicConfig(filename='tv_show_renamer.log', level=logging.ERROR,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
-
-def debounce(wait: float):
-    """ Decorator that will postpone a function's execution until after wait seconds
-        have elapsed since the last time it was invoked. 
-        
-        Args:
-            wait (float): Time to wait in seconds before executing the function
-    """
-    def decorator(fn):
-        def debounced(*args, **kwargs):
-            def call_it():
-                fn(*args, **kwargs)
-            try:
-                debounced.t.cancel()
-            except(AttributeError):
-                pass
-            debounced.t = Timer(wait, call_it)
-            debounced.t.start()
-        return debounced
-    return decorator
-
-class TVShowRenamer:
-    """A GUI application for renaming TV show files with consistent naming patterns."""
-    
-    def __init__(self, master: tk.Tk):
-        """Initialize the TV Show Renamer application.
-        
-        Args:
-            master (tk.Tk): The root window of the application
-        """
-        self.master = master
-        master.title("TV Show File Renamer")
-        master.geometry("800x800")
-        
-        # Make the window resizable
-        master.resizable(True, True)
-        
-        self.configure_styles()
-
-        # Initialize variables
-        self.directory = tk.StringVar()
-        self.season_number = tk.StringVar(value="01")
-        self.start_episode = tk.StringVar(value="01")
-        self.end_episode = tk.StringVar(value="")
-        self.file_extensions = tk.StringVar(value=".mp4,.mkv,.avi")
-
-        self.previous_directory = None  # Track the previous directory
-        self.undo_stack: List[List[Tuple[str, str]]] = []
-        self.selected_files: Dict[str, tk.BooleanVar] = {}
-        
-        # Create progress bar (hidden by default)
-        self.progress_var = tk.DoubleVar()
-        self.progress_bar = None
-        
-        self.create_widgets()
-
-    def configure_styles(self):
-        """Configure the visual styles for the application."""
-        try:
-            self.style = ttk.Style()
-            self.style.theme_use('clam')
-            
-            colors = {
-                "PRIMARY_COLOR": "#2196F3",
-                "SECONDARY_COLOR": "#1976D2",
-                "BACKGROUND_COLOR": "#F5F5F5",
-                "SURFACE_COLOR": "#FFFFFF",
-                "TEXT_COLOR": "#212121",
-                "ACCENT_COLOR": "#FF4081",
-                "BORDER_COLOR": "#E0E0E0"
-            }
-            
-            # Configure widget styles
-            self.style.configure('TFrame', background=colors["BACKGROUND_COLOR"])
-            self.style.configure('TLabel', 
-                               background=colors["BACKGROUND_COLOR"], 
-                               foreground=colors["TEXT_COLOR"], 
-                               font=('Segoe UI', 11))
-            self.style.configure('TEntry', 
-                               fieldbackground=colors["SURFACE_COLOR"], 
-                               foreground=colors["TEXT_COLOR"], 
-                               font=('Segoe UI', 11),
-                               borderwidth=1)
-            self.style.configure('TButton', 
-                               background=colors["PRIMARY_COLOR"], 
-                               foreground=colors["SURFACE_COLOR"], 
-                               font=('Segoe UI', 11, 'bold'),
-                               borderwidth=0,
-                               padding=(10, 5))
-            self.style.configure('Horizontal.TProgressbar',
-                               background=colors["PRIMARY_COLOR"],
-                               troughcolor=colors["BACKGROUND_COLOR"])
-            
-            # Configure widget states
-            self.style.map('TEntry', 
-                          fieldbackground=[('readonly', colors["SURFACE_COLOR"])])
-            self.style.map('TButton', 
-                          background=[('active', colors["SECONDARY_COLOR"])])
-            
-        except Exception as e:
-            self.handle_error("Error configuring styles", e)
+from typing import List, Dict, Optional
+from renamer_engine import (RenameEngine, DEFAULT_SEASON, DEFAULT_START_EPISODE,
+                            DEFAULT_EXTENSIONS, DEFAULT_LIBRARY_WORKERS)
+from renamer_filter import PATTERN_SEPARATOR
+from renamer_library import scan_library
+from renamer_sidecars import DEFAULT_SIDECAR_EXTENSIONS
+from renamer_transfer import DEFAULT_TRANSFER_WORKERS, check_destination, format_bytes
+from renamer_template import DEFAULT_TEMPLATE
+from renamer_titles import EpisodeTitleDB, TITLE_DB_FILE
+from renamer_journal import RenameJournal, UndoHistory, JOURNAL_FILE, UNDO_HISTORY_FILE
+from renamer_planfile import PlanFileError, PlanWriter, apply_plan_file
+from renamer_profiling import instrumentation
+
+# The GUI lives in renamer_gui and is only imported when the window opens,
+# so scripts and the command line never load tkinter
+LOG_FILE = 'tv_show_renamer.log'
+_GUI_EXPORTS = ("TVShowRenamer", "VirtualPreviewList", "debounce")
+
+def __getattr__(name: str):
+    """Load GUI classes on first access, keeping `from tv_show_renamer import TVShowRenamer` working."""
+    if name in _GUI_EXPORTS:
+        import renamer_gui
+        return getattr(renamer_gui, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def setup_logging():
+    """Send errors to the log file, which is only created once something is logged."""
+    root_logger = logging.getLogger()
+    if any(getattr(handler, "baseFilename", None) == os.path.abspath(LOG_FILE)
+           for handler in root_logger.handlers):
+        return
+    handler = logging.FileHandler(LOG_FILE, delay=True)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    root_logger.addHandler(handler)
+    root_logger.setLevel(logging.ERROR)
 
-    def create_widgets(self):
-        """Create and arrange all GUI widgets."""
-        try:
-            # Create main frame
-            main_frame = ttk.Frame(self.master, padding="50 50 50 50", style='TFrame')
-            main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-            self.master.columnconfigure(0, weight=1)
-            self.master.rowconfigure(0, weight=1)
-
-            # Configure main_frame to be expandable
-            main_frame.columnconfigure(1, weight=1)
-            main_frame.rowconfigure(7, weight=1)
-
-            # Directory selection
-            ttk.Label(main_frame, text="Directory:").grid(row=0, column=0, sticky="w", padx=5, pady=10)
-            entry_frame = ttk.Frame(main_frame, style='TFrame')
-            entry_frame.grid(row=0, column=1, padx=5, pady=10, sticky="we")
-            entry_frame.columnconfigure(0, weight=1)
-            self.dir_entry = tk.Entry(entry_frame, textvariable=self.directory, 
-                                    font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
-            self.dir_entry.grid(row=0, column=0, sticky="we", ipady=5, ipadx=5)
-            ttk.Button(main_frame, text="Browse", command=self.browse_directory).grid(row=0, column=2, padx=(10,0), pady=10)
-
-            # Season number
-            ttk.Label(main_frame, text="Season Number:").grid(row=1, column=0, sticky="w", padx=5, pady=10)
-            self.season_entry = tk.Entry(main_frame, textvariable=self.season_number, width=10, 
-                                       font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
-            self.season_entry.grid(row=1, column=1, sticky="w", padx=5, pady=10, ipady=5, ipadx=5)
-
-            # Episode range
-            ttk.Label(main_frame, text="Start Episode:").grid(row=2, column=0, sticky="w", padx=5, pady=10)
-            self.start_ep_entry = tk.Entry(main_frame, textvariable=self.start_episode, width=10, 
-                                         font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
-            self.start_ep_entry.grid(row=2, column=1, sticky="w", padx=5, pady=10, ipady=5, ipadx=5)
-
-            ttk.Label(main_frame, text="End Episode:").grid(row=3, column=0, sticky="w", padx=5, pady=10)
-            self.end_ep_entry = tk.Entry(main_frame, textvariable=self.end_episode, width=10, 
-                                       font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
-            self.end_ep_entry.grid(row=3, column=1, sticky="w", padx=5, pady=10, ipady=5, ipadx=5)
-
-            # File extensions
-            ttk.Label(main_frame, text="File Extensions:").grid(row=4, column=0, sticky="w", padx=5, pady=10)
-            self.ext_entry = tk.Entry(main_frame, textvariable=self.file_extensions, width=30, 
-                                    font=('Segoe UI', 11), bd=1, relief=tk.SOLID)
-            self.ext_entry.grid(row=4, column=1, sticky="w", padx=5, pady=10, ipady=5, ipadx=5)
-
-            # Buttons
-            button_frame = ttk.Frame(main_frame, style='TFrame')
-            button_frame.grid(row=6, column=0, columnspan=3, pady=20)
-            ttk.Button(button_frame, text="Preview", command=self.preview_rename).grid(row=0, column=0, padx=5)
-            ttk.Button(button_frame, text="Rename", command=self.rename_files).grid(row=0, column=1, padx=5)
-            ttk.Button(button_frame, text="Undo", command=self.undo_rename).grid(row=0, column=2, padx=5)
-            ttk.Button(button_frame, text="Reset", command=self.reset_fields).grid(row=0, column=3, padx=5)
-
-            # Progress bar
-            self.progress_bar = ttk.Progressbar(main_frame, variable=self.progress_var,
-                                              maximum=100, mode='determinate')
-            self.progress_bar.grid(row=7, column=0, columnspan=3, sticky="ew", pady=10)
-            self.progress_bar.grid_remove()  # Hide initially
-
-            # Preview area
-            preview_frame = ttk.Frame(main_frame, style='TFrame')
-            preview_frame.grid(row=8, column=0, columnspan=3, sticky="nsew", pady=20)
-            preview_frame.columnconfigure(0, weight=1)
-            preview_frame.rowconfigure(2, weight=1)
-
-            ttk.Label(preview_frame, text="File Names Preview", font=('Segoe UI', 11, 'bold')).grid(row=0, column=0, pady=(0, 5))
-
-            self.select_all_var = tk.BooleanVar(value=True)
-            select_all_checkbox = tk.Checkbutton(preview_frame, text="Select All", 
-                                               variable=self.select_all_var, 
-                                               command=self.toggle_select_all)
-            select_all_checkbox.grid(row=1, column=0, sticky="w", padx=5)
-
-            # Preview frame with scrollbars
-            self.preview_frame_inner = ttk.Frame(preview_frame, style='TFrame')
-            self.preview_frame_inner.grid(row=2, column=0, sticky="nsew")
-            self.preview_frame_inner.columnconfigure(0, weight=1)
-            self.preview_frame_inner.rowconfigure(0, weight=1)
-
-            # Scrollbars
-            preview_v_scrollbar = ttk.Scrollbar(preview_frame, orient="vertical")
-            preview_v_scrollbar.grid(row=2, column=1, sticky="ns")
-
-            preview_h_scrollbar = ttk.Scrollbar(preview_frame, orient="horizontal")
-            preview_h_scrollbar.grid(row=3, column=0, sticky="ew")
-
-            # Canvas configuration
-            self.preview_canvas = tk.Canvas(self.preview_frame_inner,
-                                          yscrollcommand=preview_v_scrollbar.set,
-                                          xscrollcommand=preview_h_scrollbar.set,
-                                          height=300)
-            self.preview_canvas.grid(row=0, column=0, sticky="nsew")
-
-            # Content frame
-            self.preview_content_frame = ttk.Frame(self.preview_canvas, style='TFrame')
-            self.preview_canvas.create_window((0, 0), window=self.preview_content_frame,
-                                           anchor="nw", tags="preview_content")
-
-            # Configure scrollbars
-            preview_v_scrollbar.config(command=self.preview_canvas.yview)
-            preview_h_scrollbar.config(command=self.preview_canvas.xview)
-
-            # Bind events
-            self.preview_content_frame.bind("<Configure>", self.on_frame_configure)
-            self.preview_canvas.bind("<Configure>", self.on_canvas_configure)
-            self.preview_canvas.bind_all("<MouseWheel>", self._on_mousewheel)
-
-            # Bind input fields to preview update
-            for widget in (self.dir_entry, self.season_entry, self.start_ep_entry, 
-                         self.end_ep_entry, self.ext_entry):
-                widget.bind('<KeyRelease>', self.update_preview)
-
-        except Exception as e:
-            self.handle_error("Error creating widgets", e)
-
-    def validate_file_type(self, filename: str) -> bool:
-        """Validate if the file extension matches user-specified extensions.
-        
-        Args:
-            filename (str): The name of the file to validate
-            
-        Returns:
-            bool: True if file extension matches specified extensions, False otherwise
-        """
-        try:
-            # Get file extension (including the dot)
-            ext = os.path.splitext(filename)[1].lower()
-            
-            # Get user-specified extensions and normalize them
-            allowed_extensions = [
-                ext.strip().lower() if ext.strip().startswith('.') else f'.{ext.strip().lower()}'
-                for ext in self.file_extensions.get().split(',')
-            ]
-            
-            # Return True only if the extension matches one of the specified extensions
-            return ext in allowed_extensions
-            
-        except Exception:
-            return False
-
-    def _on_mousewheel(self, event):
-        """Handle mousewheel scrolling."""
-        self.preview_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-
-    def on_frame_configure(self, event=None):
-        """Reset the scroll region to encompass the inner frame"""
-        self.preview_canvas.configure(scrollregion=self.preview_canvas.bbox("all"))
-
-    def on_canvas_configure(self, event):
-        """Handle canvas resize events."""
-        self.preview_canvas.itemconfig("preview_content", width=event.width)
-        self.preview_content_frame.configure(width=event.width)
-        self.preview_canvas.configure(scrollregion=self.preview_canvas.bbox("all"))
-
-    def browse_directory(self):
-        """Open directory selection dialog and update the directory path."""
-        try:
-            directory = filedialog.askdirectory()
-            if directory:
-                if not os.path.isdir(directory):
-                    raise NotADirectoryError(f"Selected path is not a directory: {directory}")
-                self.directory.set(directory)
-                self.get_files.cache_clear()
-                self.update_preview()
-        except Exception as e:
-            self.handle_error("Error browsing directory", e)
-
-    def preview_rename(self):
-        """Generate preview of renamed files."""
-        try:
-            self.clear_preview()
-            files = self.get_files()
-            if not files:
-                self.show_info("No Files", "No matching files found in the selected directory.")
-                return
-
-            # Sort files to ensure consistent ordering
-            files.sort()
-            
-            # Get episode range
-            start_ep = int(self.start_episode.get() or 1)
-            end_ep = int(self.end_episode.get() or (start_ep + len(files) - 1))
-            
-            if end_ep < start_ep:
-                self.show_error("Invalid Episode Range", 
-                              "End episode number must be greater than or equal to start episode.")
-                return
-
-            # Clear existing checkboxes
-            self.selected_files.clear()
-
-            # Create preview entries
-            for i, old_name in enumerate(files):
-                ep_num = start_ep + i
-                if ep_num > end_ep:
-                    break
-
-                new_name = self.generate_new_filename(old_name, ep_num)
-                
-                # Create a frame for each file
-                file_frame = ttk.Frame(self.preview_content_frame)
-                file_frame.grid(row=i, column=0, sticky="ew", pady=2)
-                file_frame.columnconfigure(1, weight=1)
-                file_frame.columnconfigure(2, weight=1)
-
-                # Add checkbox
-                self.selected_files[old_name] = tk.BooleanVar(value=True)
-                checkbox = tk.Checkbutton(file_frame, variable=self.selected_files[old_name])
-                checkbox.grid(row=0, column=0, padx=(5,10))
-
-                # Add old and new filenames
-                ttk.Label(file_frame, text=old_name).grid(row=0, column=1, sticky="w", padx=5)
-                ttk.Label(file_frame, text="→").grid(row=0, column=2, padx=5)
-                ttk.Label(file_frame, text=new_name).grid(row=0, column=3, sticky="w", padx=5)
-
-        except ValueError as ve:
-            self.show_error("Invalid Input", str(ve))
-        except Exception as e:
-            self.handle_error("Error generating preview", e)
+def main():
+    """Main entry point of the application."""
+    setup_logging()
+    from renamer_gui import main as gui_main
+    gui_main()
 
-    def rename_files(self):
-        """Rename the selected files according to the preview."""
-        try:
-            if not self.directory.get() or not os.path.isdir(self.directory.get()):
-                self.show_error("Invalid Directory", "Please select a valid directory.")
-                return
-
-            files_to_rename = []
-            total_files = 0
-            renamed_count = 0
-
-            # Get episode range
-            start_ep = int(self.start_episode.get() or 1)
-            
-            # Collect files to rename
-            for i, old_name in enumerate(self.selected_files.keys()):
-                if self.selected_files[old_name].get():
-                    ep_num = start_ep + i
-                    new_name = self.generate_new_filename(old_name, ep_num)
-                    files_to_rename.append((old_name, new_name))
-                    total_files += 1
-
-            if not files_to_rename:
-                self.show_info("No Files Selected", "Please select files to rename.")
-                return
-
-            # Show progress bar
-            self.progress_bar.grid()
-            self.progress_var.set(0)
-
-            # Perform renaming
-            renamed_files = []
-            for old_name, new_name in files_to_rename:
-                try:
-                    old_path = os.path.join(self.directory.get(), old_name)
-                    new_path = os.path.join(self.directory.get(), new_name)
-                    
-                    # Check if destination file already exists
-                    if os.path.exists(new_path):
-                        raise FileExistsError(f"File already exists: {new_name}")
-                    
-                    os.rename(old_path, new_path)
-                    renamed_files.append((old_name, new_name))
-                    renamed_count += 1
-                    
-                    # Update progress
-                    progress = (renamed_count / total_files) * 100
-                    self.progress_var.set(progress)
-                    self.master.update_idletasks()
-                    
-                except Exception as e:
-                    self.show_error("Rename Error", f"Error renaming {old_name}: {str(e)}")
-                    # Continue with remaining files
-
-            # Add to undo stack if any files were renamed
-            if renamed_files:
-                self.undo_stack.append(renamed_files)
-
-            # Hide progress bar
-            self.progress_bar.grid_remove()
-            self.progress_var.set(0)
-
-            # Show completion message
-            self.show_info("Rename Complete", 
-                         f"Successfully renamed {renamed_count} out of {total_files} files.")
-            
-            # Clear preview and cache
-            self.clear_preview()
-            self.get_files.cache_clear()
-            self.preview_rename()
-
-        except ValueError as ve:
-            self.show_error("Invalid Input", str(ve))
-        except Exception as e:
-            self.handle_error("Error renaming files", e)
-            self.progress_bar.grid_remove()
+def expand_directories(patterns: List[str]) -> List[str]:
+    """Expand directory arguments and glob patterns into a sorted list of directories.
 
-    def undo_rename(self):
-        """Undo the last rename operation."""
-        try:
-            if not self.undo_stack:
-                self.show_info("Nothing to Undo", "No rename operations to undo.")
-                return
+    Args:
+        patterns (List[str]): Directory paths or glob patterns
 
-            # Get the last rename operation
-            renamed_files = self.undo_stack[-1]
-            total_files = len(renamed_files)
-            restored_count = 0
+    Returns:
+        List[str]: Unique existing directories matched by the patterns
+    """
+    directories = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern) if glob.has_magic(pattern) else [pattern]
+        directories.update(os.path.abspath(path) for path in matches if os.path.isdir(path))
+    return sorted(directories)
 
-            # Show progress bar
-            self.progress_bar.grid()
-            self.progress_var.set(0)
+_journals: Dict[str, RenameJournal] = {}
+_journals_lock = threading.Lock()
 
-            # Perform undo
-            for old_name, new_name in renamed_files:
-                try:
-                    current_path = os.path.join(self.directory.get(), new_name)
-                    original_path = os.path.join(self.directory.get(), old_name)
-                    
-                    # Check if original filename is available
-                    if os.path.exists(original_path):
-                        raise FileExistsError(f"Cannot restore original filename: {old_name}")
-                    
-                    os.rename(current_path, original_path)
-                    restored_count += 1
-                    
-                    # Update progress
-                    progress = (restored_count / total_files) * 100
-                    self.progress_var.set(progress)
-                    self.master.update_idletasks()
-                    
-                except Exception as e:
-                    self.show_error("Undo Error", f"Error restoring {new_name}: {str(e)}")
-                    # Continue with remaining files
-
-            # Remove the operation from undo stack
-            self.undo_stack.pop()
-
-            # Hide progress bar
-            self.progress_bar.grid_remove()
-            self.progress_var.set(0)
-
-            # Show completion message
-            self.show_info("Undo Complete", 
-                         f"Successfully restored {restored_count} out of {total_files} files.")
-            
-            # Refresh preview
-            self.get_files.cache_clear()
-            self.preview_rename()
+def shared_journal(path: str, per_process: bool = False) -> RenameJournal:
+    """Get the journal shared by every worker thread of this process.
 
-        except Exception as e:
-            self.handle_error("Error undoing rename", e)
-            self.progress_bar.grid_remove()
+    Args:
+        path (str): Journal file
+        per_process (bool): Give each process its own journal file next to path
 
-    def reset_fields(self):
-        """Reset all input fields to their default values."""
-        try:
-            self.directory.set("")
-            self.season_number.set("01")
-            self.start_episode.set("01")
-            self.end_episode.set("")
-            self.file_extensions.set(".mp4,.mkv,.avi")
-            self.clear_preview()
-            self.get_files.cache_clear()
-        except Exception as e:
-            self.handle_error("Error resetting fields", e)
+    Returns:
+        RenameJournal: The journal
+    """
+    if per_process:
+        path = f"{path}.{os.getpid()}"
+    with _journals_lock:
+        if path not in _journals:
+            _journals[path] = RenameJournal(path)
+        return _journals[path]
 
-    def clear_preview(self):
-        """Clear the preview area."""
-        for widget in self.preview_content_frame.winfo_children():
-            widget.destroy()
-        self.selected_files.clear()
+_undo_histories: Dict[str, UndoHistory] = {}
 
-    def toggle_select_all(self):
-        """Toggle selection state of all files."""
-        try:
-            select_all = self.select_all_var.get()
-            for var in self.selected_files.values():
-                var.set(select_all)
-        except Exception as e:
-            self.handle_error("Error toggling selection", e)
+def shared_undo_history(path: str = UNDO_HISTORY_FILE) -> UndoHistory:
+    """Get the undo history shared by every worker thread of this process.
 
-    @debounce(0.5)
-    def update_preview(self, event=None):
-        """Update the preview when input fields change."""
-        # Clear the file cache if extension field changes
-        if event and event.widget == self.ext_entry:
-            self.get_files.cache_clear()
-        self.preview_rename()
+    Worker processes each open the file themselves; UndoHistory locks it
+    around every change.
 
+    Args:
+        path (str): History file
 
-    @lru_cache(maxsize=1)
-    def get_files(self) -> List[str]:
-        """Get list of valid files in the selected directory."""
-        try:
-            if not self.directory.get() or not os.path.isdir(self.directory.get()):
-                return []
-
-            files = []
-            for filename in os.listdir(self.directory.get()):
-                if os.path.isfile(os.path.join(self.directory.get(), filename)) and \
-                   self.validate_file_type(filename):
-                    files.append(filename)
-            return files
-        except Exception as e:
-            self.handle_error("Error getting files", e)
-            return []
-
-    def generate_new_filename(self, old_name: str, episode_number: int) -> str:
-        """Generate new filename based on season and episode numbers."""
-        try:
-            # Get file extension
-            ext = os.path.splitext(old_name)[1]
-            
-            # Format season and episode numbers
-            season = str(int(self.season_number.get())).zfill(2)
-            episode = str(episode_number).zfill(2)
-            
-            # Generate new name
-            return f"S{season}E{episode}{ext}"
-            
-        except ValueError as ve:
-            raise ValueError("Invalid season or episode number")
-        except Exception as e:
-            raise Exception(f"Error generating filename: {str(e)}")
+    Returns:
+        UndoHistory: The history
+    """
+    with _journals_lock:
+        if path not in _undo_histories:
+            _undo_histories[path] = UndoHistory(path)
+        return _undo_histories[path]
 
-    def show_error(self, title: str, message: str):
-        """Show error message dialog."""
-        messagebox.showerror(title, message)
-        logging.error(f"{title}: {message}")
+def recover_journals(path: str, roll_forward: bool = True) -> List:
+    """Recover the journal and any per-process journals left by an interrupted run.
 
-    def show_info(self, title: str, message: str):
-        """Show information message dialog."""
-        messagebox.showinfo(title, message)
+    Journals a running process still holds are skipped.
 
-    def handle_error(self, context: str, error: Exception):
-        """Handle and log errors."""
-        message = f"{context}: {str(error)}"
-        logging.error(message)
-        self.show_error("Error", message)
+    Args:
+        path (str): Journal file
+        roll_forward (bool): Complete interrupted batches if True, revert them if False
 
-def main():
-    """Main entry point of the application."""
+    Returns:
+        List: RecoveryResult for every interrupted batch
+    """
+    results = []
+    for journal_path in [path] + glob.glob(f"{glob.escape(path)}.*"):
+        results.extend(RenameJournal(journal_path).recover(roll_forward,
+                                                           remove=journal_path != path))
+    return results
+
+def process_directory(directory: str, settings: Dict[str, str], dry_run: bool = False,
+                      journal_path: Optional[str] = None, per_process: bool = False,
+                      library: bool = False,
+                      season_workers: int = DEFAULT_LIBRARY_WORKERS,
+                      title_db_path: Optional[str] = None, export: bool = False) -> Dict:
+    """Plan and apply renames for one directory without any GUI.
+
+    Args:
+        directory (str): Directory to process
+        settings (Dict[str, str]): Keyword arguments for RenameEngine besides the directory
+        dry_run (bool): Only plan the renames, do not touch the files
+        journal_path (Optional[str]): Write-ahead journal to record renames in, None to disable
+        per_process (bool): Use one journal file per worker process
+        library (bool): Treat the directory as a show root and rename every season folder
+        season_workers (int): Number of season folders scanned and renamed at once
+        title_db_path (Optional[str]): Episode title database for {title}, None to disable
+        export (bool): Only plan the renames and return the pairs as "plan" for a plan file
+
+    Returns:
+        Dict: Per-directory statistics (planned, renamed, errors, seconds, files_per_sec,
+        bytes_moved, bytes_per_sec)
+    """
+    started = time.perf_counter()
+    stats = {"directory": directory, "planned": 0, "renamed": 0, "errors": [],
+             "bytes_moved": 0, "bytes_per_sec": 0.0}
+    title_db = EpisodeTitleDB(title_db_path) if title_db_path else None
     try:
-        root = tk.Tk()
-        app = TVShowRenamer(root)
-        root.mainloop()
+        journal = shared_journal(journal_path, per_process) if journal_path else None
+        # The GUI's Undo reverts command line batches too, most recent first
+        undo_history = shared_undo_history() if not (dry_run or export) else None
+        engine = RenameEngine(directory=directory, journal=journal, title_db=title_db,
+                              undo_history=undo_history, **settings)
+        if library:
+            plan = scan_library(engine, max_workers=season_workers).pairs()
+        else:
+            plan = engine.build_plan()
+        stats["planned"] = len(plan)
+        if export:
+            stats["plan"] = plan
+        elif not dry_run:
+            result = engine.apply_plan(plan, max_workers=season_workers if library else 1)
+            stats["renamed"] = result.count
+            stats["errors"] = [f"{name}: {message}" for name, message in result.errors]
+            if result.transfer is not None:
+                stats["bytes_moved"] = result.transfer.bytes_done
+                stats["bytes_per_sec"] = result.transfer.bytes_per_sec
     except Exception as e:
-        logging.error(f"Application error: {str(e)}")
-        messagebox.showerror("Fatal Error", f"Application failed to start: {str(e)}")
+        logging.error(f"Error processing {directory}: {str(e)}")
+        stats["errors"].append(str(e))
+    finally:
+        if title_db is not None:
+            title_db.close()
+    stats["seconds"] = time.perf_counter() - started
+    processed = stats["planned"] if dry_run or export else stats["renamed"]
+    stats["files_per_sec"] = processed / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+def apply_plan_command(path: str, journal_path: Optional[str], transfer_workers: int) -> int:
+    """Apply a plan file chunk by chunk, recording each chunk in the undo history.
+
+    Args:
+        path (str): Plan file written by --export-plan or the GUI
+        journal_path (Optional[str]): Write-ahead journal to record renames in, None to disable
+        transfer_workers (int): Number of files moved at once
+
+    Returns:
+        int: Process exit code, non-zero if the plan is invalid or any operation failed
+    """
+    journal = shared_journal(journal_path) if journal_path else None
+    # The GUI's Undo reverts the chunks one at a time, most recent first
+    engine = RenameEngine(journal=journal, undo_history=UndoHistory(),
+                          transfer_workers=transfer_workers)
+    started = time.perf_counter()
+    try:
+        result = apply_plan_file(engine, path)
+    except (OSError, PlanFileError) as e:
+        print(f"Error reading plan {path}: {str(e)}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - started
+    rate = result.count / elapsed if elapsed else 0.0
+    print(f"{path}: renamed {result.count}/{result.total} files in {result.batches} batches "
+          f"in {elapsed:.2f}s ({rate:.0f} files/s), {result.already_done} already renamed")
+    if result.transfer is not None and result.transfer.bytes_done:
+        print(f"  moved {format_bytes(result.transfer.bytes_done)} "
+              f"at {format_bytes(result.transfer.bytes_per_sec)}/s")
+    for name, message in result.errors:
+        print(f"  error: {name}: {message}", file=sys.stderr)
+    return 1 if result.errors else 0
+
+def cli_main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point that renames many directories concurrently.
+
+    Args:
+        argv (Optional[List[str]]): Arguments, defaults to sys.argv[1:]
+
+    Returns:
+        int: Process exit code, non-zero if any directory had errors
+    """
+    parser = argparse.ArgumentParser(description="Rename TV show files without the GUI.")
+    parser.add_argument("directories", nargs="*", help="Directories or glob patterns to process")
+    parser.add_argument("--season", default=DEFAULT_SEASON, help="Season number")
+    parser.add_argument("--start", default=DEFAULT_START_EPISODE, help="Start episode number")
+    parser.add_argument("--end", default="", help="End episode number")
+    parser.add_argument("--extensions", default=DEFAULT_EXTENSIONS,
+                        help="Comma separated list of file extensions")
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE,
+                        help="Naming template, e.g. '{show} - S{season:02}E{episode:02}{ext}'")
+    parser.add_argument("--show", default="",
+                        help="Show name for {show}, taken from the folder names by default")
+    parser.add_argument("--titles", action="append", default=[],
+                        help="Import episode titles for {title} from a CSV, JSON or SQLite file")
+    parser.add_argument("--title-db", default=TITLE_DB_FILE,
+                        help="Episode title database the titles are imported into and read from")
+    parser.add_argument("--include", action="append", default=[],
+                        help="Only rename files matching this glob, or 're:' regex found anywhere in the name")
+    parser.add_argument("--exclude", action="append", default=[],
+                        help="Skip files matching this glob, or 're:' regex found anywhere in the name")
+    parser.add_argument("--min-size", default="",
+                        help="Skip files smaller than this many megabytes, e.g. samples")
+    parser.add_argument("--sniff", action="store_true",
+                        help="Skip files whose header doesn't match their extension")
+    parser.add_argument("--skip-duplicates", action="store_true",
+                        help="Hash the files and leave copies with identical content "
+                             "out of the episode numbering")
+    parser.add_argument("--sidecars", action="store_true",
+                        help="Rename subtitles, .nfo files and thumbnails named after a video "
+                             "along with it")
+    parser.add_argument("--sidecar-extensions", default=DEFAULT_SIDECAR_EXTENSIONS,
+                        help="Comma separated list of sidecar extensions")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of directories processed at once")
+    parser.add_argument("--processes", action="store_true",
+                        help="Use a process pool instead of a thread pool")
+    parser.add_argument("--library", action="store_true",
+                        help="Treat each directory as a show root and rename every season "
+                             "folder, taking the season number from the folder name")
+    parser.add_argument("--season-workers", type=int, default=DEFAULT_LIBRARY_WORKERS,
+                        help="Number of season folders processed at once in library mode")
+    parser.add_argument("--dest", default="",
+                        help="Move renamed files into this directory, copying across devices; "
+                             "with several directories each gets a subdirectory named after it")
+    parser.add_argument("--transfer-workers", type=int, default=DEFAULT_TRANSFER_WORKERS,
+                        help="Number of files moved to --dest at once")
+    parser.add_argument("--dry-run", action="store_true", help="Only plan the renames")
+    parser.add_argument("--export-plan", metavar="FILE",
+                        help="Write the planned renames to a plan file instead of renaming")
+    parser.add_argument("--apply-plan", metavar="FILE",
+                        help="Apply a plan file written by --export-plan or the GUI, "
+                             "in place of scanning directories")
+    parser.add_argument("--journal", default=JOURNAL_FILE,
+                        help="Write-ahead journal used to recover interrupted runs")
+    parser.add_argument("--no-journal", action="store_true", help="Don't journal renames")
+    parser.add_argument("--recover", choices=("forward", "back"), default="forward",
+                        help="Complete or roll back batches interrupted in a previous run")
+    parser.add_argument("--profile", choices=("off", "stats", "cprofile"), default=None,
+                        help="Record phase timings (and a cProfile trace), "
+                             "defaults to the TVRENAMER_PROFILE environment variable")
+    args = parser.parse_args(argv)
+    if bool(args.apply_plan) == bool(args.directories):
+        parser.error("give either directories to process or --apply-plan")
+    if args.apply_plan and args.export_plan:
+        parser.error("--export-plan can't be combined with --apply-plan")
+    setup_logging()
+    instrumentation.configure(args.profile)
+
+    journal_path = None if args.no_journal else args.journal
+    if journal_path:
+        for result in recover_journals(journal_path, args.recover == "forward"):
+            action = "completed" if result.rolled_forward else "rolled back"
+            print(f"Recovered {result.directory}: {action} {len(result.settled)} renames "
+                  f"interrupted in a previous run, {len(result.errors)} errors")
+
+    if args.titles:
+        title_db = EpisodeTitleDB(args.title_db)
+        try:
+            for path in args.titles:
+                count = title_db.import_file(path, show=args.show or None)
+                print(f"Imported {count} episode titles from {path}")
+        except Exception as e:
+            print(f"Error importing titles: {str(e)}", file=sys.stderr)
+            return 1
+        finally:
+            title_db.close()
+
+    if args.apply_plan:
+        return apply_plan_command(args.apply_plan, journal_path, max(1, args.transfer_workers))
+
+    directories = expand_directories(args.directories)
+    if not directories:
+        print("No matching directories found.", file=sys.stderr)
+        return 1
+
+    settings = {"season_number": args.season, "start_episode": args.start,
+                "end_episode": args.end, "file_extensions": args.extensions,
+                "include_patterns": PATTERN_SEPARATOR.join(args.include),
+                "exclude_patterns": PATTERN_SEPARATOR.join(args.exclude),
+                "min_size_mb": args.min_size, "sniff_headers": args.sniff,
+                "skip_duplicates": args.skip_duplicates,
+                "rename_sidecars": args.sidecars,
+                "sidecar_extensions": args.sidecar_extensions,
+                "transfer_workers": max(1, args.transfer_workers),
+                "naming_template": args.template, "show_name": args.show}
+    executor_class = ThreadPoolExecutor
+    if args.processes:
+        # Importing the process pool pulls in multiprocessing, so only do it on request
+        from concurrent.futures import ProcessPoolExecutor
+        executor_class = ProcessPoolExecutor
+    verb = "planned" if args.dry_run or args.export_plan else "renamed"
+
+    started = time.perf_counter()
+    total_files = 0
+    failed_dirs = 0
+    def destination(directory: str) -> str:
+        if not args.dest or len(directories) == 1:
+            return args.dest
+        return os.path.join(args.dest, os.path.basename(os.path.normpath(directory)))
+
+    for directory in directories:
+        try:
+            check_destination(directory, destination(directory))
+        except ValueError as e:
+            print(f"Error: {str(e)}", file=sys.stderr)
+            return 1
+
+    writer = PlanWriter(args.export_plan) if args.export_plan else None
+    with executor_class(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(process_directory, directory,
+                                   dict(settings, destination=destination(directory)),
+                                   args.dry_run, journal_path, args.processes, args.library,
+                                   max(1, args.season_workers), args.title_db, writer is not None)
+                   for directory in directories]
+        for future in as_completed(futures):
+            stats = future.result()
+            if writer is not None and "plan" in stats:
+                try:
+                    skipped = writer.add(stats["directory"], stats.pop("plan"),
+                                         destination(stats["directory"]))
+                except ValueError as e:
+                    skipped = [(stats["directory"], str(e))]
+                stats["errors"].extend(f"{name}: not exported, {reason}" for name, reason in skipped)
+            processed = stats["planned"] if args.dry_run or writer is not None else stats["renamed"]
+            total_files += processed
+            print(f"{stats['directory']}: {verb} {processed}/{stats['planned']} files "
+                  f"in {stats['seconds']:.2f}s ({stats['files_per_sec']:.0f} files/s)")
+            if stats["bytes_moved"]:
+                print(f"  moved {format_bytes(stats['bytes_moved'])} "
+                      f"at {format_bytes(stats['bytes_per_sec'])}/s")
+            for error in stats["errors"]:
+                print(f"  error: {error}", file=sys.stderr)
+            if stats["errors"]:
+                failed_dirs += 1
+
+    if writer is not None:
+        writer.close()
+        print(f"Wrote {writer.operations} renames to {args.export_plan}")
+    elapsed = time.perf_counter() - started
+    rate = total_files / elapsed if elapsed else 0.0
+    print(f"Summary: {verb} {total_files} files in {len(directories)} directories "
+          f"in {elapsed:.2f}s ({rate:.0f} files/s), {failed_dirs} with errors")
+    return 1 if failed_dirs else 0
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(cli_main())
     main()
 